@@ -0,0 +1,142 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+This benchmark measures the conversion between character arrays and string
+arrays done by `pnetcdf.chartostring` and `pnetcdf.stringtochar`, which the
+indexer of an NC_CHAR variable with the `_Encoding` attribute applies to the
+data read and written. Each process converts an array of strings of fixed
+length (1,000,000 strings of 16 characters by default), with the functions of
+the module and with the implementation they replaced, copied below, and then
+writes and reads the strings with the indexer.
+
+To run:
+  % mpiexec -n num_process python3 char_strings.py [-n iterations] [-s nstrings] [-c nchars] [file_name]
+
+  The program prints the time per call, the maximum among all processes.
+"""
+
+import sys, os, argparse
+import numpy as np
+from mpi4py import MPI
+import pnetcdf
+
+
+def chartostring_v0(src, encoding='utf-8'):
+    # the previous implementation of pnetcdf.chartostring
+    if encoding in ['none','None','bytes']:
+        src_str = src.tobytes()
+    else:
+        src_str = src.tobytes().decode(encoding)
+    slen = int(src.shape[-1])
+    if encoding in ['none','None','bytes']:
+        out_str = np.array([src_str[n1:n1+slen] for n1 in range(0,len(src_str),slen)],'S'+repr(slen))
+    else:
+        out_str = np.array([src_str[n1:n1+slen] for n1 in range(0,len(src_str),slen)],'U'+repr(slen))
+    out_str.shape = src.shape[:-1]
+    return out_str
+
+
+def stringtochar_v0(src, encoding='utf-8'):
+    # the previous implementation of pnetcdf.stringtochar
+    dtype = src.dtype.kind
+    if encoding in ['none','None','bytes']:
+        out_array = np.array(tuple(src.tobytes()),'S1')
+    else:
+        out_array = np.array(tuple(src.tobytes().decode(encoding)),dtype+'1')
+    out_array.shape = src.shape + (src.itemsize,)
+    return out_array
+
+
+def timeit(func, ntimes):
+    comm.Barrier()
+    t = MPI.Wtime()
+    for i in range(ntimes):
+        func()
+    t = (MPI.Wtime() - t) / ntimes
+    return comm.allreduce(t, op=MPI.MAX)
+
+
+def benchmark(filename, ntimes, nstrings, nchars):
+    rng = np.random.default_rng(rank)
+    chars = rng.integers(ord('a'), ord('z') + 1, size=(nstrings, nchars), dtype=np.uint8).view('S1')
+    strings = pnetcdf.chartostring(chars, encoding='none')
+
+    timing = []
+    timing.append(timeit(lambda: chartostring_v0(chars, 'utf-8'), ntimes))
+    timing.append(timeit(lambda: pnetcdf.chartostring(chars, 'utf-8'), ntimes))
+    timing.append(timeit(lambda: pnetcdf.chartostring(chars, 'none', copy=False), ntimes))
+    timing.append(timeit(lambda: stringtochar_v0(strings, 'ascii'), ntimes))
+    timing.append(timeit(lambda: pnetcdf.stringtochar(strings, 'ascii'), ntimes))
+
+    f = pnetcdf.File(filename=filename, mode='w', format="NC_64BIT_DATA", comm=comm, info=None)
+    f.def_dim('n', nstrings * nprocs)
+    f.def_dim('nchar', nchars)
+    v = f.def_var('labels', pnetcdf.NC_CHAR, ('n', 'nchar'))
+    v._Encoding = 'utf-8'
+    f.enddef()
+    index = slice(rank * nstrings, (rank + 1) * nstrings)
+    def write():
+        v[index] = strings
+    def read():
+        v[index]
+    timing.append(timeit(write, ntimes))
+    timing.append(timeit(read, ntimes))
+    f.close()
+
+    if verbose and rank == 0:
+        print("{}: {} strings of {} characters".format(os.path.basename(__file__), nstrings, nchars))
+        print("chartostring, previous      : %9.4f sec per call" % timing[0])
+        print("chartostring, utf-8         : %9.4f sec per call" % timing[1])
+        print("chartostring, view of bytes : %9.4f sec per call" % timing[2])
+        print("stringtochar, previous      : %9.4f sec per call" % timing[3])
+        print("stringtochar, ascii         : %9.4f sec per call" % timing[4])
+        print("indexer write, _Encoding    : %9.4f sec per call" % timing[5])
+        print("indexer read, _Encoding     : %9.4f sec per call" % timing[6])
+
+
+def parse_help():
+    help_flag = "-h" in sys.argv or "--help" in sys.argv
+    if help_flag and rank == 0:
+        help_text = (
+            "Usage: {} [-h] | [-q] [-n iterations] [-s nstrings] [-c nchars] [file_name]\n"
+            "       [-h] Print help\n"
+            "       [-q] Quiet mode (reports when fail)\n"
+            "       [-n iterations] number of times each call is made\n"
+            "       [-s nstrings] number of strings per process\n"
+            "       [-c nchars] number of characters per string\n"
+            "       [filename] (Optional) output netCDF file name\n"
+        ).format(sys.argv[0])
+        print(help_text)
+    return help_flag
+
+
+if __name__ == "__main__":
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    nprocs = comm.Get_size()
+
+    if parse_help():
+        MPI.Finalize()
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dir", nargs="?", type=str, help="(Optional) output netCDF file name",\
+                         default = "testfile.nc")
+    parser.add_argument("-q", help="Quiet mode (reports when fail)", action="store_true")
+    parser.add_argument("-n", help="Number of times each call is made", type=int, default=5)
+    parser.add_argument("-s", help="Number of strings per process", type=int, default=1000000)
+    parser.add_argument("-c", help="Number of characters per string", type=int, default=16)
+    args = parser.parse_args()
+
+    verbose = False if args.q else True
+
+    try:
+        benchmark(args.dir, args.n, args.s, args.c)
+    except BaseException as err:
+        print("Error: type:", type(err), str(err))
+        raise
+
+    MPI.Finalize()
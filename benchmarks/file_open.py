@@ -0,0 +1,95 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+This benchmark measures the time of opening an existing file containing a
+large number of variables, which is dominated by the construction of the
+`Dimension` and `Variable` objects of the file. It creates a file with NVARS
+2D variables defined on a record dimension and one of NDIMS fixed-size
+dimensions, like many climate model output files, and then opens it for
+reading a number of times, with and without lazy creation of the objects,
+accessing a few variables each time.
+
+To run:
+  % mpiexec -n num_process python3 file_open.py [-n iterations] [-v nvars] [-d ndims] [file_name]
+
+  The program prints the time per open, the maximum among all processes.
+"""
+
+import sys, os, argparse
+from mpi4py import MPI
+import pnetcdf
+
+
+def benchmark(filename, ntimes, nvars, ndims):
+    f = pnetcdf.File(filename=filename, mode='w', format="NC_64BIT_DATA", comm=comm, info=None)
+    dim_t = f.def_dim('time', -1)
+    dims = [f.def_dim('dim_%d' % i, 8 + i) for i in range(ndims)]
+    for i in range(nvars):
+        f.def_var('var_%d' % i, pnetcdf.NC_FLOAT, (dim_t, dims[i % ndims]))
+    f.close()
+
+    timing = []
+    for lazy in (False, True):
+        comm.Barrier()
+        t = MPI.Wtime()
+        for i in range(ntimes):
+            f = pnetcdf.File(filename=filename, mode='r', comm=comm, info=None, lazy=lazy)
+            # access a few variables, as an analysis program would do
+            for j in range(0, nvars, max(nvars // 4, 1)):
+                f.variables['var_%d' % j].shape
+            f.close()
+        t = (MPI.Wtime() - t) / ntimes
+        timing.append(comm.allreduce(t, op=MPI.MAX))
+
+    if verbose and rank == 0:
+        print("{}: {} variables, {} dimensions".format(os.path.basename(__file__), nvars, ndims + 1))
+        print("File open                 : %9.4f sec per open" % timing[0])
+        print("File open, lazy=True      : %9.4f sec per open" % timing[1])
+
+
+def parse_help():
+    help_flag = "-h" in sys.argv or "--help" in sys.argv
+    if help_flag and rank == 0:
+        help_text = (
+            "Usage: {} [-h] | [-q] [-n iterations] [-v nvars] [-d ndims] [file_name]\n"
+            "       [-h] Print help\n"
+            "       [-q] Quiet mode (reports when fail)\n"
+            "       [-n iterations] number of times the file is opened\n"
+            "       [-v nvars] number of variables in the file\n"
+            "       [-d ndims] number of fixed-size dimensions in the file\n"
+            "       [filename] (Optional) output netCDF file name\n"
+        ).format(sys.argv[0])
+        print(help_text)
+    return help_flag
+
+
+if __name__ == "__main__":
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    nprocs = comm.Get_size()
+
+    if parse_help():
+        MPI.Finalize()
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dir", nargs="?", type=str, help="(Optional) output netCDF file name",\
+                         default = "testfile.nc")
+    parser.add_argument("-q", help="Quiet mode (reports when fail)", action="store_true")
+    parser.add_argument("-n", help="Number of times the file is opened", type=int, default=5)
+    parser.add_argument("-v", help="Number of variables in the file", type=int, default=50000)
+    parser.add_argument("-d", help="Number of fixed-size dimensions in the file", type=int, default=200)
+    args = parser.parse_args()
+
+    verbose = False if args.q else True
+
+    try:
+        benchmark(args.dir, args.n, args.v, args.d)
+    except BaseException as err:
+        print("Error: type:", type(err), str(err))
+        raise
+
+    MPI.Finalize()
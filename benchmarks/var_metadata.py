@@ -0,0 +1,103 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+This benchmark measures the per-call cost of accessing the metadata of a
+`Variable` (its shape and dimension names) and of reading many small slices
+through the indexer, whose every call needs the variable's current shape. It
+creates a 3D record variable of size NREC * NY * NX and then, in independent
+data mode, reads one row at a time.
+
+To run:
+  % mpiexec -n num_process python3 var_metadata.py [-n iterations] [file_name]
+
+  The program prints the time per call, the maximum among all processes, of
+  each timing loop.
+"""
+
+import sys, os, argparse
+import numpy as np
+from mpi4py import MPI
+import pnetcdf
+
+
+def timed(func, ntimes):
+    # return the max time per call in microseconds among all processes
+    comm.Barrier()
+    t = MPI.Wtime()
+    for i in range(ntimes):
+        func(i)
+    t = (MPI.Wtime() - t) / ntimes * 1.0e6
+    return comm.allreduce(t, op=MPI.MAX)
+
+
+def benchmark(filename, ntimes):
+    NREC = 8
+    NY = 16
+    NX = 32
+
+    f = pnetcdf.File(filename=filename, mode='w', comm=comm, info=None)
+    dim_t = f.def_dim('time', -1)
+    dim_y = f.def_dim('Y', NY * nprocs)
+    dim_x = f.def_dim('X', NX)
+    var = f.def_var('var', pnetcdf.NC_FLOAT, (dim_t, dim_y, dim_x))
+    f.enddef()
+
+    buf = np.full((NREC, NY, NX), rank, dtype=np.float32)
+    var[0:NREC, rank * NY:(rank + 1) * NY, :] = buf
+
+    f.begin_indep()
+    t_shape = timed(lambda i: var.shape, ntimes)
+    t_dims = timed(lambda i: var.dimensions, ntimes)
+    t_read = timed(lambda i: var[i % NREC, rank * NY + i % NY, :], ntimes)
+    f.end_indep()
+    f.close()
+
+    if verbose and rank == 0:
+        print("{}: {} iterations per timing loop".format(os.path.basename(__file__), ntimes))
+        print("var.shape                 : %9.2f usec per call" % t_shape)
+        print("var.dimensions            : %9.2f usec per call" % t_dims)
+        print("var[rec, j, :]            : %9.2f usec per call" % t_read)
+
+
+def parse_help():
+    help_flag = "-h" in sys.argv or "--help" in sys.argv
+    if help_flag and rank == 0:
+        help_text = (
+            "Usage: {} [-h] | [-q] [-n iterations] [file_name]\n"
+            "       [-h] Print help\n"
+            "       [-q] Quiet mode (reports when fail)\n"
+            "       [-n iterations] number of calls per timing loop\n"
+            "       [filename] (Optional) output netCDF file name\n"
+        ).format(sys.argv[0])
+        print(help_text)
+    return help_flag
+
+
+if __name__ == "__main__":
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    nprocs = comm.Get_size()
+
+    if parse_help():
+        MPI.Finalize()
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dir", nargs="?", type=str, help="(Optional) output netCDF file name",\
+                         default = "testfile.nc")
+    parser.add_argument("-q", help="Quiet mode (reports when fail)", action="store_true")
+    parser.add_argument("-n", help="Number of calls per timing loop", type=int, default=10000)
+    args = parser.parse_args()
+
+    verbose = False if args.q else True
+
+    try:
+        benchmark(args.dir, args.n)
+    except BaseException as err:
+        print("Error: type:", type(err), str(err))
+        raise
+
+    MPI.Finalize()
@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+This benchmark measures the time of writing and reading a large number of
+small subarrays (100,000 by default) with a single call to
+`Variable.put_varn_all` and `Variable.get_varn_all`, in which the handling of
+the `starts` and `counts` arguments adds to the time of the I/O. Each process
+accesses every other element of its own part of a 1D variable, and passes
+`starts` and `counts` either as C-contiguous int64 arrays, which are used
+without a copy, or as lists of lists. It also measures the time of completing
+and of cancelling a large number of `Variable.iput_var` requests (100,000 by
+default) with `File.wait_all` and `File.cancel`, with the request IDs passed
+as an int32 array or as a list.
+
+To run:
+  % mpiexec -n num_process python3 varn_segments.py [-n iterations] [-s nsegs] [-r nreqs] [file_name]
+
+  The program prints the time per call, the maximum among all processes.
+"""
+
+import sys, os, argparse
+import numpy as np
+from mpi4py import MPI
+import pnetcdf
+
+
+def benchmark(filename, ntimes, nsegs, nreqs):
+    f = pnetcdf.File(filename=filename, mode='w', format="NC_64BIT_DATA", comm=comm, info=None)
+    dim = f.def_dim('x', 2 * nsegs * nprocs)
+    v = f.def_var('var', pnetcdf.NC_INT, (dim,))
+    f.enddef()
+
+    starts = (rank * 2 * nsegs + 2 * np.arange(nsegs, dtype=np.int64)).reshape(nsegs, 1)
+    counts = np.ones((nsegs, 1), dtype=np.int64)
+    starts_list = starts.tolist()
+    counts_list = counts.tolist()
+    buf = np.arange(nsegs, dtype=np.int32)
+    out = np.empty(nsegs, dtype=np.int32)
+
+    timing = []
+    for s, c in ((starts, counts), (starts_list, counts_list)):
+        comm.Barrier()
+        t = MPI.Wtime()
+        for i in range(ntimes):
+            v.put_varn_all(buf, nsegs, s, c)
+        t = (MPI.Wtime() - t) / ntimes
+        timing.append(comm.allreduce(t, op=MPI.MAX))
+
+        comm.Barrier()
+        t = MPI.Wtime()
+        for i in range(ntimes):
+            v.get_varn_all(out, nsegs, s, c)
+        t = (MPI.Wtime() - t) / ntimes
+        timing.append(comm.allreduce(t, op=MPI.MAX))
+
+    # one element per request, within the part of the variable of the
+    # process
+    elems = np.arange(nreqs) % nsegs
+    for as_array in (True, False):
+        for cancel in (False, True):
+            t = 0.0
+            for i in range(ntimes):
+                reqs = [v.iput_var(buf[j:j+1], start=[rank * 2 * nsegs + 2 * j]) for j in elems]
+                if as_array:
+                    reqs = np.array(reqs, dtype=np.int32)
+                comm.Barrier()
+                t0 = MPI.Wtime()
+                if cancel:
+                    f.cancel(nreqs, reqs)
+                else:
+                    f.wait_all(nreqs, reqs)
+                t += MPI.Wtime() - t0
+            timing.append(comm.allreduce(t / ntimes, op=MPI.MAX))
+    f.close()
+
+    if verbose and rank == 0:
+        print("{}: {} segments, {} requests".format(os.path.basename(__file__), nsegs, nreqs))
+        print("put_varn_all, int64 arrays : %9.4f sec per call" % timing[0])
+        print("get_varn_all, int64 arrays : %9.4f sec per call" % timing[1])
+        print("put_varn_all, lists        : %9.4f sec per call" % timing[2])
+        print("get_varn_all, lists        : %9.4f sec per call" % timing[3])
+        print("wait_all, int32 array      : %9.4f sec per call" % timing[4])
+        print("cancel, int32 array        : %9.4f sec per call" % timing[5])
+        print("wait_all, list             : %9.4f sec per call" % timing[6])
+        print("cancel, list               : %9.4f sec per call" % timing[7])
+
+
+def parse_help():
+    help_flag = "-h" in sys.argv or "--help" in sys.argv
+    if help_flag and rank == 0:
+        help_text = (
+            "Usage: {} [-h] | [-q] [-n iterations] [-s nsegs] [-r nreqs] [file_name]\n"
+            "       [-h] Print help\n"
+            "       [-q] Quiet mode (reports when fail)\n"
+            "       [-n iterations] number of times each call is made\n"
+            "       [-s nsegs] number of subarrays per varn call\n"
+            "       [-r nreqs] number of nonblocking requests per wait_all or cancel call\n"
+            "       [filename] (Optional) output netCDF file name\n"
+        ).format(sys.argv[0])
+        print(help_text)
+    return help_flag
+
+
+if __name__ == "__main__":
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    nprocs = comm.Get_size()
+
+    if parse_help():
+        MPI.Finalize()
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dir", nargs="?", type=str, help="(Optional) output netCDF file name",\
+                         default = "testfile.nc")
+    parser.add_argument("-q", help="Quiet mode (reports when fail)", action="store_true")
+    parser.add_argument("-n", help="Number of times each call is made", type=int, default=5)
+    parser.add_argument("-s", help="Number of subarrays per varn call", type=int, default=100000)
+    parser.add_argument("-r", help="Number of nonblocking requests per wait_all or cancel call", type=int, default=100000)
+    args = parser.parse_args()
+
+    verbose = False if args.q else True
+
+    try:
+        benchmark(args.dir, args.n, args.s, args.r)
+    except BaseException as err:
+        print("Error: type:", type(err), str(err))
+        raise
+
+    MPI.Finalize()
@@ -6,37 +6,21 @@
 # This is the I/O module for reading input samples using PnetCDF-Python
 
 from mpi4py import MPI
-from pnetcdf import File
+from pnetcdf import VariableDataset, DistributedBatchSampler
 
-class dataset():
+class dataset(VariableDataset):
+    # Samples and their labels are read a batch at a time, with one
+    # iget_varn call per variable for all samples of the batch (see
+    # VariableDataset.__getitems__, used by torch.utils.data.DataLoader)
     def __init__(self, path, samples, labels, transform=None, comm=None):
+        super().__init__(path, [samples, labels], comm=comm, transform=transform)
         self.path = path
-        self.samples = samples
-        self.labels = labels
-        self.transform = transform
-        self.comm = comm
-
-        # Open the NetCDF file
-        self.f = File(self.path, mode='r', comm=self.comm)
-        self.f.begin_indep() # To use independent I/O mode
 
         # Get dimensions of the variables
-        self.data_shape = self.f.variables[self.samples].shape
-        self.label_shape = self.f.variables[self.labels].shape
-
-    def __len__(self):
-        return self.data_shape[0]
-
-    def __getitem__(self, idx):
-        # Read the data and label at the given index
-        image = self.f.variables[self.samples][idx, ...]
-        label = self.f.variables[self.labels][idx]
-
-        if self.transform:
-            image = self.transform(image)
-
-        return image, label
-
-    def close(self):
-        self.f.close()
+        self.data_shape = self.variables[0].shape
+        self.label_shape = self.variables[1].shape
 
+def batch_sampler(data, batch_size, comm, shuffle):
+    # Partition the samples among the processes of comm and prefetch the next
+    # batch while the current one is consumed
+    return DistributedBatchSampler(data, batch_size, comm=comm, shuffle=shuffle)
@@ -116,6 +116,8 @@ cdef extern from "pnetcdf.h":
         NC_EBADID
         NC_EPERM
         NC_ENOTVAR
+        NC_ENOTATT
+        NC_EBADDIM
         NC_EGLOBAL
         NC_EINVAL
         NC_EBADNAME
@@ -182,6 +184,7 @@ cdef extern from "pnetcdf.h":
     int ncmpi_inq_unlimdim(int ncid, int *unlimdimidp) nogil
     int ncmpi_inq_dimlen(int ncid, int dimid, MPI_Offset *lenp) nogil
     int ncmpi_inq_dimname(int ncid, int dimid, char *name) nogil
+    int ncmpi_inq_dimid(int ncid, const char *name, int *idp) nogil
     int ncmpi_inq_varnatts(int ncid, int varid, int *nattsp) nogil
     int ncmpi_inq_nvars(int ncid, int *nvarsp) nogil
     int ncmpi_inq_vardimid(int ncid, int varid, int *dimidsp) nogil
@@ -220,8 +223,11 @@ cdef extern from "pnetcdf.h":
     int ncmpi_def_var(int ncid, const char *name, nc_type xtype, int ndims, const int *dimidsp, int *varidp) nogil
     int ncmpi_def_var_fill(int ncid, int varid, int no_fill, const void *fill_value) nogil
     int ncmpi_fill_var_rec (int ncid, int varid, MPI_Offset recno) nogil
+    int ncmpi_inq_var(int ncid, int varid, char *name, nc_type *xtypep, int *ndimsp,\
+     int *dimidsp, int *nattsp) nogil
     int ncmpi_inq_varndims(int ncid, int varid, int *ndimsp) nogil
     int ncmpi_inq_varname(int ncid, int varid, char *name) nogil
+    int ncmpi_inq_varid(int ncid, const char *name, int *varidp) nogil
     int ncmpi_inq_vartype(int ncid, int varid, nc_type *xtypep) nogil
     int ncmpi_put_vara(int ncid, int varid, const MPI_Offset start[], const MPI_Offset count[],\
      const void *buf, MPI_Offset bufcount, MPI_Datatype buftype) nogil
@@ -11,6 +11,7 @@ cdef class Dimension:
     cdef public int _dimid, _file_id
     cdef public File _file
     cdef public _name, _file_format
+    cdef object _isunlim, _len
 
     """
     A netCDF `Dimension` is used to describe the coordinates of a `Variable`.
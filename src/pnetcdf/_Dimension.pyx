@@ -108,12 +108,25 @@ cdef class Dimension:
                 (type(self), self._name, len(self))
 
     def __len__(self):
-        # len(`Dimension` instance) returns current size of dimension
+        # len(`Dimension` instance) returns current size of dimension.
+        # The size of a fixed-size dimension never changes once defined and is
+        # cached here. The size of the unlimited dimension is the number of
+        # records, which is cached at the file level and dropped whenever a
+        # write or a mode change may have modified it.
         cdef int ierr
         cdef MPI_Offset lengthp
+        if self.isunlimited():
+            if self._file._numrecs is not None:
+                return self._file._numrecs
+        elif self._len is not None:
+            return self._len
         with nogil:
             ierr = ncmpi_inq_dimlen(self._file_id, self._dimid, &lengthp)
         _check_err(ierr)
+        if self._isunlim:
+            self._file._numrecs = lengthp
+        else:
+            self._len = lengthp
         return lengthp
 
     def getfile(self):
@@ -137,11 +150,12 @@ cdef class Dimension:
         """
         cdef int ierr, n, numunlimdims, ndims, nvars, ngatts, xdimid
         cdef int *unlimdimids
-        with nogil:
-            ierr = ncmpi_inq(self._file_id, &ndims, &nvars, &ngatts, &xdimid)
-        if self._dimid == xdimid:
-            return True
-        else:
-            return False
+        if self._isunlim is None:
+            # whether a dimension is unlimited is fixed at its definition
+            with nogil:
+                ierr = ncmpi_inq(self._file_id, &ndims, &nvars, &ngatts, &xdimid)
+            _check_err(ierr)
+            self._isunlim = self._dimid == xdimid
+        return self._isunlim
 
 
@@ -11,7 +11,21 @@ cdef class File:
     cdef int ierr
     cdef public int _ncid
     cdef public int _isopen, indep_mode
+    cdef bint _mmap
     cdef public file_format, dimensions, variables
+    cdef public object profiler, buff_manager, block_cache
+    cdef object _numrecs, _atts, _appendrec, _appendend
+    cdef dict _requests
+    cdef object _executor
+    cdef public object _async_wait
+    cdef object _write_behind
+    cdef list _deferred
+    cdef Py_ssize_t _deferred_nbytes, _nassign
+    cdef _complete_requests(self, int num, ids, stats, bint cancelled)
+    cdef _complete_all_requests(self, int num, int status, bint cancelled)
+    cdef _defer_write(self, req)
+    cdef _check_write_behind(self)
+    cdef _commit_writes(self)
 
 cdef class Dataset(File):
     pass
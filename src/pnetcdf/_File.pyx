@@ -14,25 +14,38 @@ include "PnetCDF.pxi"
 cimport mpi4py.MPI as MPI
 from mpi4py.libmpi cimport MPI_Comm, MPI_Info, MPI_Comm_dup, MPI_Info_dup, \
                                MPI_Comm_free, MPI_Info_free, MPI_INFO_NULL,\
-                               MPI_COMM_WORLD, MPI_Offset
+                               MPI_COMM_WORLD, MPI_Offset, MPI_Query_thread, MPI_THREAD_MULTIPLE
 
 
 
 from libc.string cimport memcpy, memset
 from libc.stdlib cimport malloc, free
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
 
 from ._Dimension cimport Dimension
 from ._Variable cimport Variable
-from ._utils cimport _strencode, _check_err, _set_att, _get_att, _get_att_names, _get_format, _private_atts
+from ._utils cimport _strencode, _check_err, _set_att, _get_att, _get_att_names, _get_atts, _cached_att, _get_format, _private_atts
 from._utils cimport _nctonptype
+from ._profile import Profiler, _profiled
+from ._request import Request
+from ._buffer import BufferManager
+from ._cache import BlockCache, _DEFAULT_NBYTES
 import numpy as np
+cimport numpy
+numpy.import_array()
 
+# number of requests from which the completed ones are looked up among the
+# registered requests with numpy rather than one by one
+_VECTOR_MIN_NREQS = 64
 
 
 cdef class File:
-    def __init__(self, filename, mode="w", format=None, MPI.Comm comm=None, MPI.Info info=None):
+    def __init__(self, filename, mode="w", format=None, MPI.Comm comm=None, MPI.Info info=None, lazy=False, profile=False, write_behind=False, block_cache=False, mmap=False):
         """
-        __init__(self, filename, format=None, mode="w", MPI.Comm comm=None, MPI.Info info=None)
+        __init__(self, filename, format=None, mode="w", MPI.Comm comm=None, MPI.Info info=None, lazy=False, profile=False, write_behind=False, block_cache=False, mmap=False)
 
         The constructor for :class:`pnetcdf.File`.
 
@@ -72,6 +85,56 @@ cdef class File:
             ``MPI_INFO_NULL``.
         :type info: mpi4py.MPI.Info or None
 
+        :param bool lazy: [Optional]
+            If ``True``, :attr:`File.dimensions` and :attr:`File.variables`
+            are mappings that create a ``Dimension`` or ``Variable`` instance
+            the first time it is accessed by name, instead of creating the
+            instances of all dimensions and variables in the file when it is
+            opened. Iteration and ``len()`` work as for dictionaries. Default
+            is ``False``.
+
+        :param bool profile: [Optional]
+            If ``True``, the calls to the I/O methods of the file and its
+            variables are recorded in a :class:`pnetcdf.Profiler`, available
+            as :attr:`File.profiler`. Calls are also recorded, whatever this
+            argument, while :func:`pnetcdf.profile` is active. Default is
+            ``False``.
+
+        :param write_behind: [Optional]
+            If ``True`` or a number of bytes, assignments to variables with
+            the indexer (``var[...] = data``) are posted as nonblocking write
+            requests, from a copy of `data`, instead of being written at once.
+            The pending requests are committed together, by a single call to
+            :meth:`File.wait_all` in collective data mode or :meth:`File.wait`
+            in independent data mode, when :meth:`File.flush`,
+            :meth:`File.sync`, :meth:`File.redef`, :meth:`File.begin_indep`,
+            :meth:`File.end_indep` or :meth:`File.close` is called, before a
+            variable is read with the indexer or :meth:`Variable.get`, and,
+            if a number of bytes is given, when the copies of the pending
+            assignments of a process exceed it. In collective data mode, this
+            limit must then be exceeded by all processes at the same
+            assignment, for instance because all processes assign the same
+            number of bytes. Default is ``False``.
+        :type write_behind: bool or int
+
+        :param block_cache: [Optional]
+            If ``True`` or a number of bytes, the reads of variables with the
+            indexer in independent data mode go through a per-process cache
+            of blocks of the variables, of this size (64 MiB if ``True``),
+            with least recently used eviction and read-ahead of sequential
+            reads, see :class:`pnetcdf.BlockCache`. The cache is available as
+            :attr:`File.block_cache`. Default is ``False``.
+        :type block_cache: bool or int
+
+        :param bool mmap: [Optional]
+            If ``True``, the reads of variables with the indexer, for an
+            integer or a slice of step 1 along each dimension, and with
+            :meth:`Variable.get` are served by each process from the memory
+            map of the variable returned by :meth:`Variable.as_memmap`,
+            instead of MPI-IO. This requires
+            `mode` ``'r'``, and the file to be on a file system local to, or
+            coherently shared by, the processes. Default is ``False``.
+
         :return: The created file instance.
         :rtype: :class:`pnetcdf.File`
 
@@ -93,6 +156,28 @@ cdef class File:
         cdef MPI_Info mpiinfo = MPI_INFO_NULL
         cdef int cmode
 
+        # pending nonblocking requests, by request ID
+        self._requests = {}
+        # global attributes by name, read from the file on first access
+        self._atts = None
+        # record where the variables not appended yet start, and the end of
+        # the records written by appends
+        self._appendrec = None
+        self._appendend = None
+        # future of the pending asynchronous wait and identifier of the
+        # thread running it, 0 before it starts, or None
+        self._async_wait = None
+        # requests posted by the assignments of write-behind mode
+        self._write_behind = None
+        if write_behind is not False and write_behind is not None:
+            self._write_behind = 0 if write_behind is True else int(write_behind)
+        self._deferred = []
+        self._deferred_nbytes = 0
+        self._nassign = 0
+        self.buff_manager = None
+        self.block_cache = None
+        if block_cache is not False and block_cache is not None:
+            self.block_cache = BlockCache(self, _DEFAULT_NBYTES if block_cache is True else block_cache)
         if comm is not None:
             mpicomm = comm.ob_mpi
         if info is not None:
@@ -105,6 +190,10 @@ cdef class File:
                 msg="underlying file format must be one of `'NETCDF3_CLASSIC'`, `'NETCDF3_64BIT_OFFSET'` (same as `'NC_64BIT_OFFSET'`) or `'NETCDF3_64BIT_DATA'` (same as `'NC_64BIT_DATA'`)"
                 raise ValueError(msg)
 
+        if mmap and mode != 'r':
+            raise ValueError("mmap requires mode 'r', got '%s'" % mode)
+        self._mmap = mmap
+
         clobber = True
         # mode='x' is the same as mode='w' with clobber=False
         if mode == 'x':
@@ -137,8 +226,13 @@ cdef class File:
         self.indep_mode = 0
         self._ncid = ncid
         self.file_format = _get_format(ncid)
-        self.dimensions = _get_dims(self)
-        self.variables = _get_variables(self)
+        if lazy:
+            self.dimensions = _LazyDimensions(self)
+            self.variables = _LazyVariables(self)
+        else:
+            self.dimensions = _get_dims(self)
+            self.variables = _get_variables(self)
+        self.profiler = Profiler() if profile else None
 
     def close(self):
         """
@@ -156,15 +250,27 @@ cdef class File:
            f.close()
 
         """
+        self._check_async()
+        self._commit_writes()
         self._close(True)
 
     def _close(self, check_err):
         cdef int ierr
+        if self._executor is not None:
+            # let the pending asynchronous waits complete first
+            self._executor.shutdown(wait=True)
+            self._executor = None
         with nogil:
             ierr = ncmpi_close(self._ncid)
         if check_err:
             _check_err(ierr)
         self._isopen = 0 # indicates file already closed, checked by __dealloc__
+        self._requests.clear()
+        self._deferred = []
+        self._nassign = 0
+        self.buff_manager = None
+        if self.block_cache is not None:
+            self.block_cache.clear()
 
     def filepath(self, encoding=None):
         """
@@ -219,8 +325,13 @@ cdef class File:
 
         Writes all buffered data in the `File` to the disk file."""
         cdef int ierr
+        self._check_async()
+        self._commit_writes()
         with nogil:
             ierr = ncmpi_sync(self._ncid)
+        self._numrecs = None
+        if self.block_cache is not None:
+            self.block_cache.clear()
         _check_err(ierr)
 
     def redef(self):
@@ -238,6 +349,8 @@ cdef class File:
             is to guarantee the data consistency when running application
             programs in parallel.
         """
+        self._check_async()
+        self._commit_writes()
         self._redef()
 
     def _redef(self):
@@ -246,6 +359,7 @@ cdef class File:
         with nogil:
             ierr = ncmpi_redef(fileid)
         _check_err(ierr)
+        self._invalidate_cache()
 
     def enddef(self):
         """
@@ -262,6 +376,7 @@ cdef class File:
             is to guarantee the data consistency when running application
             programs in parallel.
         """
+        self._check_async()
         self._enddef()
 
     def _enddef(self):
@@ -270,6 +385,23 @@ cdef class File:
         with nogil:
             ierr = ncmpi_enddef(fileid)
         _check_err(ierr)
+        self._invalidate_cache()
+
+    def _invalidate_cache(self):
+        # Private method to drop the cached number of records, the cached
+        # attributes, the dimension names, sizes and attributes cached by the
+        # variables of this file, the record where the variables not appended
+        # yet start and the blocks of the block cache.
+        cdef Variable var
+        self._numrecs = None
+        self._atts = None
+        self._appendrec = None
+        if self.block_cache is not None:
+            self.block_cache.clear()
+        for var in _created_values(self.variables):
+            var._dimnames = None
+            var._shape = None
+            var._atts = None
 
     def begin_indep(self):
         """
@@ -281,8 +413,13 @@ cdef class File:
         """
         cdef int ierr
         cdef int fileid = self._ncid
+        self._check_async()
+        self._commit_writes()
         with nogil:
             ierr = ncmpi_begin_indep_data(fileid)
+        self._numrecs = None
+        if self.block_cache is not None:
+            self.block_cache.clear()
         _check_err(ierr)
         self.indep_mode = 1
 
@@ -296,8 +433,11 @@ cdef class File:
         """
         cdef int ierr
         cdef int fileid = self._ncid
+        self._check_async()
+        self._commit_writes()
         with nogil:
             ierr = ncmpi_end_indep_data(fileid)
+        self._numrecs = None
         _check_err(ierr)
         self.indep_mode = 0
 
@@ -309,8 +449,13 @@ cdef class File:
         """
         cdef int ierr
         cdef int fileid = self._ncid
+        self._check_async()
+        self._commit_writes()
         with nogil:
             ierr = ncmpi_flush(fileid)
+        self._numrecs = None
+        if self.block_cache is not None:
+            self.block_cache.clear()
         _check_err(ierr)
 
 
@@ -383,6 +528,7 @@ cdef class File:
         with nogil:
             ierr = ncmpi_rename_var(_file_id, _var_id, namstring)
         _check_err(ierr)
+        var._name = newname
         # remove old key from dimensions dict.
         self.variables.pop(oldname)
         # add new key.
@@ -426,6 +572,10 @@ cdef class File:
         with nogil:
             ierr = ncmpi_rename_dim(_file_id, _dim_id, namstring)
         _check_err(ierr)
+        dim._name = newname
+        # variables defined on this dimension cache its name
+        for var in _created_values(self.variables):
+            var._dimnames = None
         # remove old key from dimensions dict.
         self.dimensions.pop(oldname)
         # add new key.
@@ -551,8 +701,26 @@ cdef class File:
 
         :rtype: list
         """
+        if self._atts is not None:
+            return list(self._atts)
         return _get_att_names(self._ncid, NC_GLOBAL)
 
+    property attrs:
+        """A dictionary of the global attributes of this file, a snapshot
+        that is not updated when the attributes change. All the global
+        attributes are read at the first access to any of them, and kept until
+        they are modified or the file enters or leaves define mode."""
+        def __get__(self):
+            atts = self._attributes()
+            return {name: _cached_att(atts, name) for name in atts}
+
+    def _attributes(self):
+        # Private method to get the dict of the cached global attributes,
+        # reading all of them if they are not cached.
+        if self._atts is None:
+            self._atts = _get_atts(self, NC_GLOBAL)
+        return self._atts
+
     def put_att(self,name,value):
         """
         put_att(self,name,value)
@@ -584,6 +752,8 @@ cdef class File:
         cdef nc_type xtype
         xtype=-99
         _set_att(self, NC_GLOBAL, name, value, xtype=xtype)
+        if self._atts is not None:
+            self._atts[name] = _get_att(self, NC_GLOBAL, name)
 
 
     def get_att(self, name, encoding='utf-8'):
@@ -616,7 +786,9 @@ cdef class File:
            str_att = v.foo_attr
 
         """
-        return _get_att(self, NC_GLOBAL, name, encoding=encoding)
+        if encoding != 'utf-8':
+            return _get_att(self, NC_GLOBAL, name, encoding=encoding)
+        return _cached_att(self._attributes(), name)
 
 
     def __delattr__(self, name):
@@ -646,6 +818,8 @@ cdef class File:
         with nogil:
             ierr = ncmpi_del_att(self._ncid, NC_GLOBAL, attname)
         _check_err(ierr)
+        if self._atts is not None:
+            self._atts.pop(name, None)
 
     def __setattr__(self,name,value):
     # if name in _private_atts, it is stored at the python
@@ -665,11 +839,7 @@ cdef class File:
         if name.startswith('__') and name.endswith('__'):
             # if __dict__ requested, return a dict with netCDF attributes.
             if name == '__dict__':
-                names = self.ncattrs()
-                values = []
-                for name in names:
-                    values.append(_get_att(self, NC_GLOBAL, name))
-                return dict(zip(names, values))
+                return self.attrs
             else:
                 raise AttributeError
         elif name in _private_atts:
@@ -703,6 +873,10 @@ cdef class File:
         with nogil:
             ierr = ncmpi_rename_att(_file_id, NC_GLOBAL, oldnamec, newnamec)
         _check_err(ierr)
+        if self._atts is not None:
+            # the attribute keeps its position
+            self._atts = {(newname if key == oldname else key): value
+                          for key, value in self._atts.items()}
 
     def renameAttribute(self, oldname, newname):
         """
@@ -729,28 +903,98 @@ cdef class File:
             else:
                 with nogil:
                     ierr = ncmpi_wait_all(_file_id, num_req, NULL, NULL)
+            self._numrecs = None
+            self._complete_all_requests(num, ierr, False)
+            if self.buff_manager is not None:
+                self.buff_manager._completed()
+            if self.block_cache is not None:
+                self.block_cache._completed()
             _check_err(ierr)
         else:
-            requestp = <int *>malloc(sizeof(int) * num)
-            statusp = <int *>malloc(sizeof(int) * num)
+            reqs, ids = _request_array(requests, num)
+            stats = _status_array(status, num)
+            requestp = <int *>PyArray_DATA(reqs)
+            statusp = <int *>PyArray_DATA(stats)
             num_req = num
-            for n from 0 <= n < num:
-                requestp[n] = requests[n]
             if not collective:
                 with nogil:
                     ierr = ncmpi_wait(_file_id, num_req, requestp, statusp)
             else:
                 with nogil:
                     ierr = ncmpi_wait_all(_file_id, num_req, requestp, statusp)
-            for n from 0 <= n < num:
-                requests[n] = requestp[n]
-
-            if status is not None:
-                for n from 0 <= n < num:
-                    status[n] = statusp[n]
+            self._numrecs = None
+            self._complete_requests(num, ids, stats, False)
+            _copy_back(requests, reqs, num)
+            if self.buff_manager is not None:
+                self.buff_manager._completed()
+            if self.block_cache is not None:
+                self.block_cache._completed()
+            _copy_back(status, stats, num)
             _check_err(ierr)
         return None
 
+    cdef _complete_requests(self, int num, ids, stats, bint cancelled):
+        # Private method to mark the Request objects of the completed or
+        # cancelled requests whose IDs are in the int32 array ids, with their
+        # error codes in stats. For many requests, the registered ones are
+        # found with a single vectorized lookup.
+        if not self._requests:
+            return
+        if num >= _VECTOR_MIN_NREQS and 4 * num >= len(self._requests):
+            registered = np.fromiter(self._requests, np.int32, len(self._requests))
+            index = np.flatnonzero(np.isin(ids[:num], registered)).tolist()
+        else:
+            index = range(num)
+        idlist = ids[:num].tolist()
+        statlist = stats[:num].tolist()
+        for n in index:
+            req = self._requests.pop(idlist[n], None)
+            if req is not None:
+                req._complete(statlist[n], cancelled)
+
+    cdef _complete_all_requests(self, int num, int status, bint cancelled):
+        # Private method to mark the Request objects of all pending requests,
+        # or only the write or read requests, as completed with error code
+        # status.
+        for req in list(self._requests.values()):
+            if num == NC_REQ_ALL_C or (num == NC_GET_REQ_ALL_C) == req.is_read():
+                del self._requests[req]
+                req._complete(status, cancelled)
+
+    cdef _defer_write(self, req):
+        # Private method to add a write request posted by an assignment in
+        # write-behind mode to the requests committed by _commit_writes.
+        self._deferred.append(req)
+        self._deferred_nbytes += req.nbytes
+
+    cdef _check_write_behind(self):
+        # Private method to count an assignment in write-behind mode, and to
+        # commit the pending writes if their copies exceed the limit. The
+        # decision is made once per assignment, so that all processes take it
+        # at the same assignment in collective data mode.
+        self._nassign += 1
+        if self._write_behind and self._deferred_nbytes >= self._write_behind:
+            self._commit_writes()
+
+    cdef _commit_writes(self):
+        # Private method to complete the write requests posted by the
+        # assignments made in write-behind mode since the last commit. It is
+        # called by all processes in collective data mode, as long as one
+        # assignment has been made, even by the processes with no pending
+        # request.
+        if self._write_behind is None or self._nassign == 0:
+            return
+        # requests completed meanwhile by an explicit wait are skipped
+        reqs = [req for req in self._deferred if not req.done()]
+        self._deferred = []
+        self._deferred_nbytes = 0
+        self._nassign = 0
+        status = [0] * len(reqs)
+        self._wait(len(reqs), list(reqs), status, collective=not self.indep_mode)
+        for err in status:
+            _check_err(err)
+
+    @_profiled('collective', file_method=True)
     def wait_all(self, num=None, requests=None, status=None):
         """
         wait_all(self, num=None, requests=None, status=None)
@@ -769,16 +1013,20 @@ cdef class File:
             - ``pnetcdf.NC_PUT_REQ_ALL``: flush all pending nonblocking PUT requests
 
         :param requests: [Optional]
-            Integers specifying the nonblocking request IDs returned from the
-            nonblocking requests posted earlier.
-        :type requests: list of int
+            The nonblocking requests posted earlier, as the
+            :class:`pnetcdf.Request` objects or the integer request IDs
+            returned by the nonblocking methods. A C-contiguous array of type
+            ``numpy.int32`` is passed to PnetCDF without a copy and updated in
+            place.
+        :type requests: list of :class:`pnetcdf.Request` or int, or numpy.ndarray
 
         :param status: [Optional]
             List of integers to hold returned error codes from the call, each
             specifying the status of corresponding nonblocking request. The
             values can be used in a call to :meth:`pnetcdf.strerror` to obtain
-            the error messages.
-        :type status: list
+            the error messages. A C-contiguous array of type ``numpy.int32`` receives
+            them without a copy.
+        :type status: list or numpy.ndarray
 
         :Operational mode: it is an collective subroutine and must be called
             while the file is in collective data mode.
@@ -800,6 +1048,7 @@ cdef class File:
         """
         return self._wait(num, requests, status, collective=True)
 
+    @_profiled('independent', file_method=True)
     def wait(self, num=None, requests=None, status=None):
         """
         wait(self, num=None, requests=None, status=None)
@@ -811,6 +1060,97 @@ cdef class File:
         """
         return self._wait(num, requests, status, collective=False)
 
+    def wait_all_async(self, num=None, requests=None, status=None):
+        """
+        wait_all_async(self, num=None, requests=None, status=None)
+
+        Same as :meth:`File.wait_all`, but run in a thread dedicated to this
+        file, so that the event loop of the calling coroutine keeps running
+        other coroutines while the requests are completed. The wait starts
+        when the method is called and the returned future must be awaited.
+        The argument usage is the same as :meth:`File.wait_all`.
+
+        :return: A future completed when the requests are.
+        :rtype: asyncio.Future
+
+        :Operational mode: it is an collective subroutine and must be called
+            while the file is in collective data mode. Until the future is
+            done, the I/O methods of the file and of its variables, and those
+            changing its data mode, raise ``RuntimeError``. As the other
+            coroutines of the event loop may make MPI calls while the wait is
+            in progress in another thread, the MPI library must provide the
+            thread support level ``MPI.THREAD_MULTIPLE``, which mpi4py
+            requests by default.
+
+        :Example:
+
+         ::
+
+           async def write_step(f, v, buf, start, count):
+               v.iput_var(buf, start = start, count = count)
+               await f.wait_all_async()
+        """
+        return self._wait_async(self.wait_all, num, requests, status)
+
+    def wait_async(self, num=None, requests=None, status=None):
+        """
+        wait_async(self, num=None, requests=None, status=None)
+
+        Same as :meth:`File.wait_all_async` but called in independent data
+        mode, see :meth:`File.wait`.
+
+        :Operational mode: it is an independent subroutine and must be called
+            while the file is in independent data mode.
+        """
+        return self._wait_async(self.wait, num, requests, status)
+
+    def _wait_async(self, wait, num, requests, status):
+        # Private method to run wait in the thread of the file and return the
+        # future of its completion in the running event loop.
+        cdef int provided
+        self._check_async()
+        loop = asyncio.get_running_loop()
+        if self._executor is None:
+            MPI_Query_thread(&provided)
+            if provided < MPI_THREAD_MULTIPLE:
+                raise RuntimeError("asynchronous wait requires MPI thread support level MPI.THREAD_MULTIPLE")
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pnetcdf-wait')
+        # the file is guarded from the call until the future is done
+        self._async_wait = [None, 0]
+        try:
+            future = loop.run_in_executor(self._executor, self._run_async, wait, num, requests, status)
+        except:
+            self._async_wait = None
+            raise
+        self._async_wait[0] = future
+        return future
+
+    def _run_async(self, wait, num, requests, status):
+        # Private method running wait in the thread of the file, the only
+        # thread allowed to call the file while the wait is running.
+        guard = self._async_wait
+        guard[1] = threading.get_ident()
+        try:
+            return wait(num, requests, status)
+        finally:
+            guard[1] = None
+
+    def _check_async(self):
+        # Private method to raise RuntimeError when an asynchronous wait is
+        # pending and the calling thread is not the one running it, as the
+        # PnetCDF state of a file is not safe to use from several threads.
+        # The guard is lifted once the future is done and the wait returned,
+        # or the event loop of the future closed.
+        if self._async_wait is None:
+            return
+        future, thread = self._async_wait
+        if thread == threading.get_ident():
+            return
+        if future is not None and (future.done() and not thread or future.get_loop().is_closed()):
+            self._async_wait = None
+            return
+        raise RuntimeError("an asynchronous wait is in progress on the file, await its future first")
+
     def cancel(self, num=None, requests=None, status=None):
         """
         cancel(self, num=None, requests=None, status=None)
@@ -828,16 +1168,20 @@ cdef class File:
             - ``pnetcdf.NC_PUT_REQ_ALL``: flush all pending nonblocking PUT requests
 
         :param requests: [Optional]
-            Integers specifying the nonblocking request IDs that were made
-            earlier.
-        :type requests: list of int
+            The nonblocking requests posted earlier, as the
+            :class:`pnetcdf.Request` objects or the integer request IDs
+            returned by the nonblocking methods. A C-contiguous array of type
+            ``numpy.int32`` is passed to PnetCDF without a copy and updated in
+            place.
+        :type requests: list of :class:`pnetcdf.Request` or int, or numpy.ndarray
 
         :param status: [Optional]
             List of integers to hold returned error codes from the call, each
             specifying the status of corresponding nonblocking request. The
             values can be used in a call to :meth:`pnetcdf.strerror` to obtain
-            the status messages.
-        :type status: list
+            the status messages. A C-contiguous array of type ``numpy.int32`` receives
+            them without a copy.
+        :type status: list or numpy.ndarray
 
         :Operational mode: it can be called in either independent or collective
             data mode or define mode.
@@ -846,6 +1190,7 @@ cdef class File:
         cdef int num_req
         cdef int *requestp
         cdef int *statusp
+        self._check_async()
         _file_id = self._ncid
         if num is None:
             num = NC_REQ_ALL_C
@@ -853,22 +1198,202 @@ cdef class File:
             num_req = num
             with nogil:
                 ierr = ncmpi_cancel(_file_id, num_req, NULL, NULL)
+            self._complete_all_requests(num, ierr, True)
             _check_err(ierr)
         else:
-            requestp = <int *>malloc(sizeof(int) * num)
-            statusp = <int *>malloc(sizeof(int) * num)
+            reqs, ids = _request_array(requests, num)
+            stats = _status_array(status, num)
+            requestp = <int *>PyArray_DATA(reqs)
+            statusp = <int *>PyArray_DATA(stats)
             num_req = num
-            for n from 0 <= n < num:
-                requestp[n] = requests[n]
             with nogil:
                 ierr = ncmpi_cancel(_file_id, num_req, requestp, statusp)
-            for n from 0 <= n < num:
-                requests[n] = requestp[n]
-            if status is not None:
-                for n from 0 <= n < num:
-                    status[n] = statusp[n]
+            self._complete_requests(num, ids, stats, True)
+            _copy_back(requests, reqs, num)
+            _copy_back(status, stats, num)
             _check_err(ierr)
 
+    def put_many(self, accesses):
+        """
+        put_many(self, accesses)
+
+        Write to several variables at once. A nonblocking write request is
+        posted for each variable, as by :meth:`Variable.iput_var`, and all of
+        them are completed by a single call to :meth:`File.wait_all` in
+        collective data mode, or :meth:`File.wait` in independent data mode,
+        which lets PnetCDF aggregate the writes into fewer and larger MPI-IO
+        requests.
+
+        :param accesses: The writes, by variable. The keys are
+            :class:`pnetcdf.Variable` instances or variable names. A value is
+            either the data to write to the entire variable, or a tuple
+            ``(data,)``, ``(data, start)``, ``(data, start, count)`` or
+            ``(data, start, count, stride)`` with the arguments of
+            :meth:`Variable.put_var_all`. As a tuple always holds the
+            arguments, data given as a tuple must be wrapped, as in
+            ``((1.0, 2.0),)``, or converted to an array.
+        :type accesses: dict
+
+        :Operational mode: This method must be called while the file is in
+            data mode. In collective data mode, it is collective: all
+            processes must call it, with dictionaries that may differ and be
+            empty.
+
+        :Example:
+
+         ::
+
+           # write one time step of all the variables of a file
+           f.put_many({name: (data[name], [step, 0, 0], [1, NY, NX])
+                       for name in names})
+        """
+        self._check_async()
+        reqs = []
+        try:
+            for key, value in accesses.items():
+                var = self.variables[key] if isinstance(key, (str, bytes)) else key
+                args = _write_args(value, key, 'put_many', 4)
+                reqs.append(var.iput_var(*args))
+        except BaseException:
+            if reqs:
+                self.cancel(len(reqs), reqs)
+            raise
+        self._wait_many(reqs)
+
+    def get_many(self, accesses):
+        """
+        get_many(self, accesses)
+
+        Read from several variables at once. A nonblocking read request is
+        posted for each variable, as by :meth:`Variable.iget_var`, and all of
+        them are completed by a single call to :meth:`File.wait_all` in
+        collective data mode, or :meth:`File.wait` in independent data mode,
+        which lets PnetCDF aggregate the reads into fewer and larger MPI-IO
+        requests.
+
+        :param accesses: The reads, by variable. The keys are
+            :class:`pnetcdf.Variable` instances or variable names. A value is
+            either `None` to read the entire variable, or a tuple ``(start,)``,
+            ``(start, count)`` or ``(start, count, stride)`` with the arguments
+            of :meth:`Variable.get_var_all`.
+        :type accesses: dict
+
+        :return: The data read, by the keys of `accesses`, as arrays of the
+            data type of the variables, of shape `count`, of the shape of the
+            variable when reading it entirely, or with no dimension when
+            reading a single element.
+        :rtype: dict
+
+        :Operational mode: This method must be called while the file is in
+            data mode. In collective data mode, it is collective: all
+            processes must call it, with dictionaries that may differ and be
+            empty.
+
+        :Example:
+
+         ::
+
+           # read one time step of all the variables of a file
+           data = f.get_many({name: ([step, 0, 0], [1, NY, NX])
+                              for name in names})
+        """
+        self._check_async()
+        # pending writes of write-behind mode are visible to the read
+        self._commit_writes()
+        reqs = []
+        results = {}
+        try:
+            for key, value in accesses.items():
+                var = self.variables[key] if isinstance(key, (str, bytes)) else key
+                args = () if value is None else tuple(value)
+                if len(args) > 3:
+                    raise ValueError("get_many takes (start, count, stride), got %d items for %r" % (len(args), key))
+                if not args:
+                    shape = var.shape
+                elif len(args) == 1:
+                    shape = ()
+                else:
+                    shape = tuple(args[1])
+                buff = np.empty(shape, var.dtype)
+                reqs.append(var.iget_var(buff, *args))
+                results[key] = buff
+        except BaseException:
+            if reqs:
+                self.cancel(len(reqs), reqs)
+            raise
+        self._wait_many(reqs)
+        return results
+
+    def append_records(self, records, record=None):
+        """
+        append_records(self, records, record=None)
+
+        Append records to several record variables at once, after the last
+        record appended to each, as by :meth:`Variable.append`. A nonblocking
+        write request is posted for each variable, and all of them are
+        completed by a single call to :meth:`File.wait_all` in collective
+        data mode, or :meth:`File.wait` in independent data mode, so that the
+        number of records of the file is updated once for all the variables.
+
+        The index of the next record of each variable is local to each
+        process, as for :meth:`Variable.append`: all processes must append
+        the same number of records to a variable.
+
+        :param records: The records to append, by variable. The keys are
+            :class:`pnetcdf.Variable` instances or variable names. A value is
+            either the records to write, or a tuple ``(data,)`` or ``(data,
+            start)`` with the arguments of :meth:`Variable.append`. As for
+            :meth:`File.put_many`, data given as a tuple must be wrapped.
+        :type records: dict
+
+        :param record: [Optional] The index of the first record written to
+            all the variables, from which the following appends to them
+            continue. Default is the next record of each variable.
+        :type record: int
+
+        :Operational mode: This method must be called while the file is in
+            data mode. In collective data mode, it is collective: all
+            processes must call it.
+
+        :Example:
+
+         ::
+
+           # each process writes its part of a new record of all the
+           # variables at every step
+           for step in range(nsteps):
+               f.append_records({name: (data[name][step], [rank * NX])
+                                 for name in names})
+        """
+        cdef Variable var
+        self._check_async()
+        reqs = []
+        # variables appended to, with their next record before the call
+        appended = []
+        try:
+            for key, value in records.items():
+                var = self.variables[key] if isinstance(key, (str, bytes)) else key
+                args = _write_args(value, key, 'append_records', 2)
+                data, start, count = var._append_args(args[0], args[1] if len(args) > 1 else None, record)
+                reqs.append(var.iput_var(data, start, count))
+                appended.append((var, var._nextrec))
+                var._appended(start[0] + count[0])
+        except BaseException:
+            for var, nextrec in appended:
+                var._nextrec = nextrec
+            if reqs:
+                self.cancel(len(reqs), reqs)
+            raise
+        self._wait_many(reqs)
+
+    def _wait_many(self, reqs):
+        # Private method to complete the requests posted by put_many,
+        # get_many or append_records, raising the error of the first that
+        # failed.
+        status = [0] * len(reqs)
+        self._wait(len(reqs), reqs, status, collective=not self.indep_mode)
+        for err in status:
+            _check_err(err)
 
     def inq_nreqs(self):
         """
@@ -886,20 +1411,49 @@ cdef class File:
         _check_err(ierr)
         return num_req
 
-    def attach_buff(self, bufsize):
+    def attach_buff(self, bufsize=None, policy=None, nsample=8, threshold=1.0, max_bufsize=None):
         """
-        attach_buff(self, bufsize)
+        attach_buff(self, bufsize=None, policy=None, nsample=8, threshold=1.0, max_bufsize=None)
 
         Allow PnetCDF to allocate an internal buffer for accommodating the
         write requests. This method call is the prerequisite of buffered
         non-blocking write. A call to :meth:`File.detach_buff` is required when
         this buffer is no longer needed.
 
-        :param bufsize:
+        If `policy` is given, or `bufsize` is not, the buffer is managed by a
+        :class:`pnetcdf.BufferManager`, which sizes it, flushes it or posts
+        the writes that do not fit in it as non-buffered nonblocking writes,
+        instead of letting :meth:`Variable.bput_var` and
+        :meth:`Variable.bput_varn` fail, and grows it between flushes.
+
+        :param bufsize: [Optional]
             Size of the buffer in the unit of bytes. Can be obtained using
-            ``numpy.ndarray.nbytes``
+            ``numpy.ndarray.nbytes``. If not given, the size of the managed
+            buffer is determined by the first `nsample` buffered writes.
         :type bufsize: int
 
+        :param policy: [Optional]
+            ``'fixed'`` to keep the size of the managed buffer, or
+            ``'high_water'`` to grow it to the largest size of the pending
+            buffered writes. Default is ``'high_water'`` if `bufsize` is not
+            given, and no management otherwise.
+        :type policy: str
+
+        :param int nsample: [Optional]
+            Number of buffered writes whose sizes determine the size of the
+            managed buffer when `bufsize` is not given. Default is 8.
+
+        :param float threshold: [Optional]
+            Fraction of the size of the managed buffer above which its usage
+            triggers a flush. Default is 1.0.
+
+        :param int max_bufsize: [Optional]
+            Upper limit of the size of the managed buffer in bytes.
+
+        :return: The buffer manager, also available as
+            :attr:`File.buff_manager`, or `None` if the buffer is not managed.
+        :rtype: :class:`pnetcdf.BufferManager`
+
         :Example: A example is available in ``examples/nonblocking/nonblocking_write.py``
 
          ::
@@ -909,7 +1463,22 @@ cdef class File:
 
            f.attach_buff(bbufsize)
 
+           # or let the buffer be sized by the first bput calls
+           f.attach_buff(policy = 'high_water')
+
         """
+        self._check_async()
+        if self.buff_manager is not None:
+            raise RuntimeError("a buffer is already attached")
+        if policy is None and bufsize is not None:
+            self._attach_buff(bufsize)
+            return None
+        self.buff_manager = BufferManager(self, bufsize, policy or 'high_water',
+                                          nsample, threshold, max_bufsize)
+        return self.buff_manager
+
+    def _attach_buff(self, bufsize):
+        # Private method to attach a buffer of bufsize bytes
         cdef MPI_Offset buffsize
         cdef int _file_id
         buffsize = bufsize
@@ -923,7 +1492,7 @@ cdef class File:
         detach_buff(self)
 
         Detach the write buffer previously attached for buffered non-blocking
-        write
+        write, and its :class:`pnetcdf.BufferManager` if any.
 
         :Example: A example is available in ``examples/nonblocking/nonblocking_write.py``
 
@@ -937,6 +1506,16 @@ cdef class File:
            f.detach_buff()
 
         """
+        self._check_async()
+        if self.buff_manager is not None:
+            if self.buff_manager._bufsize:
+                self._detach_buff()
+            self.buff_manager = None
+            return
+        self._detach_buff()
+
+    def _detach_buff(self):
+        # Private method to detach the attached buffer
         cdef int _file_id = self._ncid
         with nogil:
             ierr = ncmpi_buffer_detach(_file_id)
@@ -988,14 +1567,16 @@ cdef class File:
         """
 
         cdef int ierr, unlimdimid
+        cdef char namstring[NC_MAX_NAME+1]
         with nogil:
             ierr = ncmpi_inq_unlimdim(self._ncid, &unlimdimid)
         _check_err(ierr)
         if unlimdimid == -1:
             return None
-        for name, dim in self.dimensions.items():
-            if dim._dimid == unlimdimid:
-                return dim
+        with nogil:
+            ierr = ncmpi_inq_dimname(self._ncid, unlimdimid, namstring)
+        _check_err(ierr)
+        return self.dimensions[namstring.decode('utf-8')]
 
 
     def set_fill(self, fillmode):
@@ -1063,6 +1644,82 @@ cdef class File:
         for var in _vars.values():
             var.set_auto_chartostring(value)
 
+    def set_auto_maskandscale(self, value):
+        """
+        set_auto_maskandscale(self, value)
+
+        Call :meth:`Variable.set_auto_maskandscale` for all variables contained in this
+        `File`. Calling this method only affects existing variables.
+        Variables defined after calling this method will follow the default
+        behaviour.
+
+        :param value: True or False
+        :type value: bool
+
+        :Operational mode: Any
+        """
+
+        _vars = self.variables
+        for var in _vars.values():
+            var.set_auto_maskandscale(value)
+
+    def set_auto_mask(self, value):
+        """
+        set_auto_mask(self, value)
+
+        Call :meth:`Variable.set_auto_mask` for all variables contained in this
+        `File`. Calling this method only affects existing variables.
+        Variables defined after calling this method will follow the default
+        behaviour.
+
+        :param value: True or False
+        :type value: bool
+
+        :Operational mode: Any
+        """
+
+        _vars = self.variables
+        for var in _vars.values():
+            var.set_auto_mask(value)
+
+    def set_auto_scale(self, value):
+        """
+        set_auto_scale(self, value)
+
+        Call :meth:`Variable.set_auto_scale` for all variables contained in this
+        `File`. Calling this method only affects existing variables.
+        Variables defined after calling this method will follow the default
+        behaviour.
+
+        :param value: True or False
+        :type value: bool
+
+        :Operational mode: Any
+        """
+
+        _vars = self.variables
+        for var in _vars.values():
+            var.set_auto_scale(value)
+
+    def set_auto_byteswap(self, value):
+        """
+        set_auto_byteswap(self, value)
+
+        Call :meth:`Variable.set_auto_byteswap` for all variables contained in
+        this `File`. Calling this method only affects existing variables.
+        Variables defined after calling this method will follow the default
+        behaviour.
+
+        :param value: True or False
+        :type value: bool
+
+        :Operational mode: Any
+        """
+
+        _vars = self.variables
+        for var in _vars.values():
+            var.set_auto_byteswap(value)
+
 
     def inq_num_rec_vars(self):
         """
@@ -1231,38 +1888,35 @@ cdef class File:
 cdef _get_dims(file):
     # Private method to create `Dimension` instances for all the
     # dimensions in a `File`
-    cdef int ierr, numdims, n, _file_id
-    cdef int *dimids
+    cdef int ierr, numdims, numvars, ngatts, unlimdimid, n, _file_id
     cdef char namstring[NC_MAX_NAME+1]
-    # get number of dimensions in this file.
+    cdef Dimension dim
+    # get number of dimensions in this file and the unlimited dimension.
     _file_id = file._ncid
     with nogil:
-        ierr = ncmpi_inq_ndims(_file_id, &numdims)
+        ierr = ncmpi_inq(_file_id, &numdims, &numvars, &ngatts, &unlimdimid)
     _check_err(ierr)
     # create empty dictionary for dimensions.
     dimensions = dict()
-    if numdims > 0:
-        dimids = <int *>malloc(sizeof(int) * numdims)
-        for n from 0 <= n < numdims:
-            dimids[n] = n
-        for n from 0 <= n < numdims:
-            with nogil:
-                ierr = ncmpi_inq_dimname(_file_id, dimids[n], namstring)
-            _check_err(ierr)
-            name = namstring.decode('utf-8')
-            dimensions[name] = Dimension(file = file, name = name, id=dimids[n])
-        free(dimids)
+    for n from 0 <= n < numdims:
+        with nogil:
+            ierr = ncmpi_inq_dimname(_file_id, n, namstring)
+        _check_err(ierr)
+        name = namstring.decode('utf-8')
+        dim = Dimension(file = file, name = name, id=n)
+        # known already, save the inquiry in Dimension.isunlimited()
+        dim._isunlim = n == unlimdimid
+        dimensions[name] = dim
     return dimensions
 
 cdef _get_variables(file):
     # Private method to create `Variable` instances for all the
     # variables in a `File`
-    cdef int ierr, numvars, n, nn, numdims, varid, classp, iendian, _file_id
-    cdef int *varids
+    cdef int ierr, numvars, n, nn, numdims, maxdims, varid, _file_id
     cdef int *dimids
     cdef nc_type xtype
     cdef char namstring[NC_MAX_NAME+1]
-    cdef char namstring_cmp[NC_MAX_NAME+1]
+    cdef Dimension dim
     # get number of variables in this File.
     _file_id = file._ncid
     with nogil:
@@ -1270,49 +1924,268 @@ cdef _get_variables(file):
     _check_err(ierr, err_cls=AttributeError)
     # create empty dictionary for variables.
     variables = dict()
-    if numvars > 0:
-        # get variable ids.
-        varids = <int *>malloc(sizeof(int) * numvars)
-        for n from 0 <= n < numvars:
-            varids[n] = n
+    if numvars == 0:
+        return variables
+    # table of Dimension instances indexed by dimension id, built once for
+    # all variables.
+    dimtable = [None] * len(file.dimensions)
+    for dim in file.dimensions.values():
+        dimtable[dim._dimid] = dim
+    # buffer of dimension ids, large enough for most variables and grown when
+    # a variable uses a dimension more than once.
+    maxdims = max(len(dimtable), 1)
+    dimids = <int *>malloc(sizeof(int) * maxdims)
+    try:
         # loop over variables.
-        for n from 0 <= n < numvars:
-            varid = varids[n]
-            # get variable name.
+        for varid from 0 <= varid < numvars:
+            # get variable name, type and number of dimensions.
             with nogil:
-                ierr = ncmpi_inq_varname(_file_id, varid, namstring)
+                ierr = ncmpi_inq_var(_file_id, varid, namstring, &xtype,
+                                     &numdims, NULL, NULL)
             _check_err(ierr)
             name = namstring.decode('utf-8')
-            # get variable type.
-            with nogil:
-                ierr = ncmpi_inq_vartype(_file_id, varid, &xtype)
-            _check_err(ierr)
             # check to see if it is a supported user-defined type.
-            try:
-                datatype = _nctonptype[xtype]
-            except KeyError:
+            if xtype not in _nctonptype:
                 msg="WARNING: variable '%s' has unsupported datatype, skipping .." % name
                 warnings.warn(msg)
                 continue
-            # get number of dimensions.
-            with nogil:
-                ierr = ncmpi_inq_varndims(_file_id, varid, &numdims)
-            _check_err(ierr)
-            dimids = <int *>malloc(sizeof(int) * numdims)
+            if numdims > maxdims:
+                free(dimids)
+                maxdims = numdims
+                dimids = <int *>malloc(sizeof(int) * maxdims)
             # get dimension ids.
+            if numdims > 0:
+                with nogil:
+                    ierr = ncmpi_inq_vardimid(_file_id, varid, dimids)
+                _check_err(ierr)
+            dimensions = [dimtable[dimids[nn]] for nn in range(numdims)]
+            # create variable instance
+            variables[name] = Variable(file, name, xtype, dimensions, id=varid)
+    finally:
+        free(dimids)
+    return variables
+
+cdef _get_variable(file, int varid):
+    # Private method to create the `Variable` instance of a single variable
+    # in a `File`, and the `Dimension` instances it is defined on, for files
+    # opened with lazy=True. Returns None for unsupported data types.
+    cdef int ierr, numdims, nn, _file_id
+    cdef int *dimids
+    cdef nc_type xtype
+    cdef char namstring[NC_MAX_NAME+1]
+    _file_id = file._ncid
+    with nogil:
+        ierr = ncmpi_inq_var(_file_id, varid, namstring, &xtype, &numdims,
+                             NULL, NULL)
+    _check_err(ierr)
+    name = namstring.decode('utf-8')
+    if xtype not in _nctonptype:
+        msg="WARNING: variable '%s' has unsupported datatype, skipping .." % name
+        warnings.warn(msg)
+        return None
+    dimensions = []
+    if numdims > 0:
+        dimids = <int *>malloc(sizeof(int) * numdims)
+        try:
             with nogil:
                 ierr = ncmpi_inq_vardimid(_file_id, varid, dimids)
             _check_err(ierr)
-            dimensions = []
             for nn from 0 <= nn < numdims:
-                for key, value in file.dimensions.items():
-                    if value._dimid == dimids[nn]:
-                        dimensions.append(value)
-                        break
-            # create variable instance
-            variables[name] = Variable(file, name, xtype, dimensions, id=varid)
-        free(varids) # free pointer holding variable ids.
-    return variables
+                with nogil:
+                    ierr = ncmpi_inq_dimname(_file_id, dimids[nn], namstring)
+                _check_err(ierr)
+                dimensions.append(file.dimensions[namstring.decode('utf-8')])
+        finally:
+            free(dimids)
+    return Variable(file, name, xtype, dimensions, id=varid)
+
+cdef _created_values(mapping):
+    # Private method to return the `Dimension` or `Variable` instances that
+    # have been created so far, without creating the others of a lazy mapping.
+    if isinstance(mapping, _LazyMapping):
+        return list(mapping._cache.values())
+    return list(mapping.values())
+
+class _LazyMapping(MutableMapping):
+    # Base class of File.dimensions and File.variables of files opened with
+    # lazy=True. An instance is created the first time its name is looked up
+    # and cached afterwards. Assigning, deleting and popping items only
+    # modify the cache, as done by File when an object is defined or renamed.
+    def __init__(self, file):
+        self._file = file
+        self._cache = dict()
+
+    def __getitem__(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        obj = self._create(name)
+        if obj is None:
+            raise KeyError(name)
+        self._cache[name] = obj
+        return obj
+
+    def __setitem__(self, name, obj):
+        self._cache[name] = obj
+
+    def __delitem__(self, name):
+        del self._cache[name]
+
+    def pop(self, name, *args):
+        return self._cache.pop(name, *args)
+
+    def __contains__(self, name):
+        return name in self._cache or self._inq_id(name) >= 0
+
+    def __iter__(self):
+        return iter(self._names())
+
+    def __len__(self):
+        return len(self._names())
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def _create(self, name):
+        objid = self._inq_id(name)
+        if objid < 0:
+            return None
+        return self._create_from_id(name, objid)
+
+class _LazyDimensions(_LazyMapping):
+    def _inq_id(self, name):
+        # Private method to return the dimension ID of name, -1 if not found
+        cdef int ierr, dimid, _file_id
+        cdef char *namstring
+        if not isinstance(name, (str, bytes)):
+            return -1
+        bytestr = _strencode(name)
+        namstring = bytestr
+        _file_id = self._file._ncid
+        with nogil:
+            ierr = ncmpi_inq_dimid(_file_id, namstring, &dimid)
+        if ierr == NC_EBADDIM:
+            return -1
+        _check_err(ierr)
+        return dimid
+
+    def _create_from_id(self, name, dimid):
+        return Dimension(file = self._file, name = name, id=dimid)
+
+    def _names(self):
+        # Private method to return the names of all dimensions, in the order
+        # of their IDs
+        cdef int ierr, numdims, n, _file_id
+        cdef char namstring[NC_MAX_NAME+1]
+        _file_id = self._file._ncid
+        with nogil:
+            ierr = ncmpi_inq_ndims(_file_id, &numdims)
+        _check_err(ierr)
+        names = []
+        for n from 0 <= n < numdims:
+            with nogil:
+                ierr = ncmpi_inq_dimname(_file_id, n, namstring)
+            _check_err(ierr)
+            names.append(namstring.decode('utf-8'))
+        return names
+
+class _LazyVariables(_LazyMapping):
+    def _inq_id(self, name):
+        # Private method to return the variable ID of name, -1 if not found
+        # or of an unsupported data type, as the variables skipped by _names
+        cdef int ierr, varid, _file_id
+        cdef nc_type xtype
+        cdef char *namstring
+        if not isinstance(name, (str, bytes)):
+            return -1
+        bytestr = _strencode(name)
+        namstring = bytestr
+        _file_id = self._file._ncid
+        with nogil:
+            ierr = ncmpi_inq_varid(_file_id, namstring, &varid)
+        if ierr == NC_ENOTVAR:
+            return -1
+        _check_err(ierr)
+        with nogil:
+            ierr = ncmpi_inq_vartype(_file_id, varid, &xtype)
+        _check_err(ierr)
+        if xtype not in _nctonptype:
+            return -1
+        return varid
+
+    def _create_from_id(self, name, varid):
+        return _get_variable(self._file, varid)
+
+    def _names(self):
+        # Private method to return the names of all variables of supported
+        # data types, in the order of their IDs
+        cdef int ierr, numvars, n, _file_id
+        cdef nc_type xtype
+        cdef char namstring[NC_MAX_NAME+1]
+        _file_id = self._file._ncid
+        with nogil:
+            ierr = ncmpi_inq_nvars(_file_id, &numvars)
+        _check_err(ierr)
+        names = []
+        for n from 0 <= n < numvars:
+            with nogil:
+                ierr = ncmpi_inq_var(_file_id, n, namstring, &xtype, NULL,
+                                     NULL, NULL)
+            _check_err(ierr)
+            if xtype in _nctonptype:
+                names.append(namstring.decode('utf-8'))
+        return names
+
+cdef _write_args(value, key, str api, int maxargs):
+    # Private function to return the arguments of the write of a value of
+    # put_many or append_records. A tuple holds the arguments, the data
+    # first, and any other value is the data. As the other arguments are
+    # index lists, tuple data given as a bare value is rejected rather than
+    # written where its items point to.
+    if not isinstance(value, tuple):
+        return (value,)
+    if not 1 <= len(value) <= maxargs:
+        raise ValueError("%s takes a tuple of at most %d arguments, got %d items for %r" % (api, maxargs, len(value), key))
+    if np.asarray(value[0]).dtype == object:
+        raise TypeError("%s: the data of %r is not array-like" % (api, key))
+    for arg in value[1:]:
+        if arg is not None and np.ndim(arg) != 1:
+            raise TypeError("%s: %r is not an index list for %r, pass tuple data as an array or as (data,)" % (api, arg, key))
+    return value
+
+cdef _request_array(requests, Py_ssize_t num):
+    # Private function to return the first num requests as a C-contiguous
+    # int32 array, updated in place by ncmpi_wait, ncmpi_wait_all and
+    # ncmpi_cancel, and an int32 array of the request IDs before the call. An
+    # int32 array is used as is, with no per-request work but a copy of its
+    # IDs. Otherwise, the Request objects already completed, whose IDs may
+    # have been reused by newer requests, are replaced by NC_REQ_NULL.
+    if isinstance(requests, np.ndarray) and requests.dtype == np.int32 and \
+       requests.ndim == 1 and requests.flags.c_contiguous and len(requests) >= num:
+        return requests, requests[:num].copy()
+    ids = requests[:num]
+    if len(ids) < num:
+        raise ValueError("requests has fewer than %d entries" % num)
+    reqs = np.array([NC_REQ_NULL_C if isinstance(req, Request) and req.done() else req
+                     for req in ids], dtype=np.int32)
+    return reqs, reqs.copy()
+
+cdef _status_array(status, Py_ssize_t num):
+    # Private function to return a C-contiguous int32 array receiving num
+    # error codes, which is status itself if it is such an array.
+    if isinstance(status, np.ndarray) and status.dtype == np.int32 and \
+       status.ndim == 1 and status.flags.c_contiguous and len(status) >= num:
+        return status
+    return np.empty(num, np.int32)
+
+cdef _copy_back(target, ndarray values, Py_ssize_t num):
+    # Private function to copy the first num values of an array returned by
+    # _request_array or _status_array into the list given by the caller,
+    # unless it is that array.
+    if target is not None and target is not values:
+        target[:num] = values[:num].tolist()
 
 cdef class Dataset(File):
     pass
+
@@ -11,4 +11,9 @@ from._Dimension cimport Dimension
 cdef class Variable:
     cdef public int _varid, _file_id, _nunlimdim
     cdef public File _file
-    cdef public _name, ndim, dtype, xtype, chartostring
+    cdef public _name, ndim, dtype, xtype, chartostring, mask, scale, byteswap
+    cdef object _dims, _dimnames, _shape, _cf_atts, _atts, _memmap, _nextrec
+    cdef _getitem(self, elem)
+    cdef _setitem(self, elem, data)
+    cdef _written(self)
+    cdef _appended(self, end)
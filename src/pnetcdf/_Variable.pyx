@@ -10,6 +10,7 @@ import os
 import subprocess
 import numpy as np
 import warnings
+from time import perf_counter
 include "PnetCDF.pxi"
 
 cimport mpi4py.MPI as MPI
@@ -19,14 +20,25 @@ from mpi4py.libmpi cimport MPI_Comm, MPI_Info, MPI_Comm_dup, MPI_Info_dup, \
 from libc.stdlib cimport malloc, free
 from libc.string cimport memcpy, memset
 from ._Dimension cimport Dimension
-from ._utils cimport _strencode, _check_err, _set_att, _get_att, _get_att_names, _tostr, _safecast, stringtochar
+from ._utils cimport _strencode, _check_err, _set_att, _get_att, _get_att_names, _get_atts, _cached_att, _tostr, _safecast, stringtochar
 from ._utils import chartostring
+from ._profile import _profiled, _record, _nbytes
+from ._profile import _active as _profilers
+from ._request import Request
+from ._varn import VarnPlan
+from ._cf import _CFAtts, _pack, _unpack
 from ._utils cimport _nptonctype, _notcdf2dtypes, _nctonptype, _nptompitype, _supportedtypes, _supportedtypescdf2, \
-                     default_fillvals, _StartCountStride, _out_array_shape, _private_atts
+                     default_fillvals, _StartCountStride, _out_array_shape, _private_atts, \
+                     _noncontiguous_buffer, _conversion_buftype, _varn_array, _row_pointers
 
 cimport numpy
 numpy.import_array()
 
+# maximum number of dimensions of a variable handled by the fast indexing path
+# of Variable.__getitem__ and Variable.__setitem__, whose start and count
+# arrays are allocated on the stack.
+cdef enum:
+    _FAST_PATH_MAX_NDIMS = 32
 
 
 
@@ -155,16 +167,33 @@ cdef class Variable:
         self._nunlimdim = 0
         for dim in dimensions:
             if dim.isunlimited(): self._nunlimdim = self._nunlimdim + 1
+        # cache the Dimension instances, from which the variable's shape is
+        # computed without querying the library on every access. Dimension
+        # names and fixed sizes are filled in on first use.
+        self._dims = tuple(dimensions)
+        self._dimnames = None
+        self._shape = None
         # set ndim attribute (number of dimensions).
-        with nogil:
-            ierr = ncmpi_inq_varndims(_file_id, self._varid, &numdims)
-        _check_err(ierr)
-        self.ndim = numdims
+        self.ndim = len(self._dims)
         self._name = name
 
         # default is to automatically convert to/from character
         # to string arrays when _Encoding variable attribute is set.
         self.chartostring = True
+        # default is to return the stored values, CF packing and missing
+        # values attributes are applied only if turned on.
+        self.mask = False
+        self.scale = False
+        self._cf_atts = None
+        # default is to return the values in native byte order
+        self.byteswap = True
+        # attributes by name, read from the file on first access
+        self._atts = None
+        # memory map of the variable, for files opened with mmap=True
+        self._memmap = None
+        # index of the record written next by append, None until the first
+        # append
+        self._nextrec = None
         # propagate _ncstring_attrs__ setting from parent group.
 
         if fill_value != None:
@@ -188,15 +217,15 @@ cdef class Variable:
         dimnames = tuple(_tostr(dimname) for dimname in self.dimensions)
         ncdump.append('%s %s(%s)' %\
             (kind, self._name, ', '.join(dimnames)))
-        for name in self.ncattrs():
-            ncdump.append('    %s: %s' % (name, self.get_att(name)))
+        atts = self._attributes()
+        for name in atts:
+            ncdump.append('    %s: %s' % (name, _cached_att(atts, name)))
         if show_more_dtype:
             ncdump.append('%s data type: %s' % (kind, self.dtype))
         unlimdims = []
-        for dimname in self.dimensions:
-            dim = self._file.dimensions[dimname]
+        for dim in self._dims:
             if dim.isunlimited():
-                unlimdims.append(dimname)
+                unlimdims.append(dim._name)
 
         ncdump.append('unlimited dimensions: %s' % ', '.join(unlimdims))
         ncdump.append('current shape = %r' % (self.shape,))
@@ -221,10 +250,13 @@ cdef class Variable:
         return '\n'.join(ncdump)
 
     def _getdims(self):
-        # Private method to get variable's dimension names
+        # Private method to get variable's dimension names. The names are
+        # cached until a dimension is renamed or the file changes mode.
         cdef int ierr, numdims, n, nn
         cdef char namstring[NC_MAX_NAME+1]
         cdef int *dimids
+        if self._dimnames is not None:
+            return self._dimnames
         # get number of dimensions for this variable.
         with nogil:
             ierr = ncmpi_inq_varndims(self._file_id, self._varid, &numdims)
@@ -243,6 +275,7 @@ cdef class Variable:
             name = namstring.decode('utf-8')
             dimensions = dimensions + (name,)
         free(dimids)
+        self._dimnames = dimensions
         return dimensions
 
     def _getname(self):
@@ -258,7 +291,8 @@ cdef class Variable:
     property name:
         """string name of Variable instance"""
         def __get__(self):
-            return self._getname()
+            # kept up to date by File.rename_var
+            return self._name
         def __set__(self,value):
             raise AttributeError("name cannot be altered")
 
@@ -270,12 +304,13 @@ cdef class Variable:
     property shape:
         """Find current sizes of all variable dimensions"""
         def __get__(self):
-            shape = ()
-            for dimname in self._getdims():
-                # look in current group, and parents for dim.
-                dim = self._file.dimensions[dimname]
-                shape = shape + (len(dim),)
-            return shape
+            if self._shape is None:
+                self._shape = tuple(len(dim) for dim in self._dims)
+            if self._nunlimdim:
+                # only the record dimension (always the first one) can grow,
+                # its length comes from the file-level record count cache.
+                return (len(self._dims[0]),) + self._shape[1:]
+            return self._shape
         def __set__(self,value):
             raise AttributeError("shape cannot be altered")
 
@@ -290,6 +325,23 @@ cdef class Variable:
             return self._getdims()
         def __set__(self,value):
             raise AttributeError("dimensions cannot be altered")
+
+    property attrs:
+        """A dictionary of the netCDF attributes of this variable, a snapshot
+        that is not updated when the attributes change. All the attributes are
+        read at the first access to any of them, and kept until they are
+        modified or the file enters or leaves define mode."""
+        def __get__(self):
+            atts = self._attributes()
+            return {name: _cached_att(atts, name) for name in atts}
+
+    def _attributes(self):
+        # Private method to get the dict of the cached attributes of this
+        # variable, reading all of them if they are not cached.
+        if self._atts is None:
+            self._atts = _get_atts(self._file, self._varid)
+        return self._atts
+
     def file(self):
         """
         file(self)
@@ -307,6 +359,8 @@ cdef class Variable:
         :return: all attribute names of this variable in a list.
         :rtype: list
         """
+        if self._atts is not None:
+            return list(self._atts)
         return _get_att_names(self._file_id, self._varid)
 
     def put_att(self,name,value):
@@ -339,7 +393,10 @@ cdef class Variable:
         """
         cdef nc_type xtype
         xtype=-99
+        self._cf_atts = None
         _set_att(self._file, self._varid, name, value, xtype=xtype)
+        if self._atts is not None:
+            self._atts[name] = _get_att(self._file, self._varid, name)
 
 
     def get_att(self,name,encoding='utf-8'):
@@ -371,7 +428,9 @@ cdef class Variable:
            str_att = v.foo_attr
 
         """
-        return _get_att(self._file, self._varid, name, encoding=encoding)
+        if encoding != 'utf-8':
+            return _get_att(self._file, self._varid, name, encoding=encoding)
+        return _cached_att(self._attributes(), name)
 
     def del_att(self, name):
         """
@@ -388,9 +447,12 @@ cdef class Variable:
         cdef char *attname
         bytestr = _strencode(name)
         attname = bytestr
+        self._cf_atts = None
         with nogil:
             ierr = ncmpi_del_att(self._file_id, self._varid, attname)
         _check_err(ierr)
+        if self._atts is not None:
+            self._atts.pop(name, None)
 
     def __delattr__(self,name):
         # if it's a netCDF attribute, remove it
@@ -418,12 +480,7 @@ cdef class Variable:
         if name.startswith('__') and name.endswith('__'):
             # if __dict__ requested, return a dict with netCDF attributes.
             if name == '__dict__':
-                names = self.ncattrs()
-                values = []
-                for name in names:
-                    values.append(_get_att(self._file, self._varid, name))
-                return dict(zip(names, values))
-
+                return self.attrs
             else:
                 raise AttributeError
         elif name in _private_atts:
@@ -451,9 +508,14 @@ cdef class Variable:
         oldnamec = bytestr
         bytestr = _strencode(newname)
         newnamec = bytestr
+        self._cf_atts = None
         with nogil:
             ierr = ncmpi_rename_att(self._file_id, self._varid, oldnamec, newnamec)
         _check_err(ierr)
+        if self._atts is not None:
+            # the attribute keeps its position
+            self._atts = {(newname if key == oldname else key): value
+                          for key, value in self._atts.items()}
 
     def get_dims(self):
         """
@@ -463,7 +525,7 @@ cdef class Variable:
             variable.
         :rtype: tuple of ``Dimension``
         """
-        return tuple(self._file.dimensions[dim] for dim in self.dimensions)
+        return self._dims
 
     def def_fill(self, int no_fill, fill_value = None):
         """
@@ -500,6 +562,8 @@ cdef class Variable:
         cdef ndarray data
         cdef int ierr, _no_fill
         _no_fill = no_fill
+        self._cf_atts = None
+        self._atts = None
         if fill_value is None:
             with nogil:
                 ierr = ncmpi_def_var_fill(self._file_id, self._varid, _no_fill, NULL)
@@ -545,11 +609,107 @@ cdef class Variable:
         :type rec_no: int
         """
         cdef int recno, ierr
+        self._file._check_async()
         recno = rec_no
         with nogil:
             ierr = ncmpi_fill_var_rec(self._file_id, self._varid, recno)
+        self._written()
         _check_err(ierr)
 
+    def append(self, data, start=None, record=None):
+        """
+        append(self, data, start=None, record=None)
+
+        Write records of a record variable after the last one appended. The
+        index of the next record is kept by the variable and advanced by
+        each call, so that no call to ``ncmpi_inq_dimlen`` is made to find
+        it. The first append to a variable starts from the number of records
+        the file had at the first append to any of its variables, so that
+        variables appended one after another in a loop write the same
+        records. This record moves to the number of records of the file when
+        records were added by other means since, and after
+        :meth:`File.redef` and :meth:`File.enddef`. Writes by other means do
+        not move the index of a variable already appended: pass `record` to
+        set it.
+
+        The index is local to each process: all processes must append the
+        same number of records to a variable. To append to several
+        variables with a single update of the number of records of the file,
+        see :meth:`File.append_records`.
+
+        :param data: The records to write. An array with one dimension per
+            dimension of the variable holds as many records as the length of
+            its first dimension, and an array with one dimension less holds
+            one record.
+        :type data: numpy.ndarray
+
+        :param start: [Optional] The starting indices of the records along
+            the dimensions of the variable other than the unlimited one.
+            Default is 0 for all, i.e. the records span the first elements of
+            these dimensions, as many as the shape of `data`.
+        :type start: list of int
+
+        :param record: [Optional] The index of the first record written,
+            from which the following appends continue. Default is the next
+            record of the variable.
+        :type record: int
+
+        :Operational mode: This method is collective in collective data mode,
+            and independent in independent data mode.
+
+        :Example:
+
+         ::
+
+           # each process writes its part of a new record at every step
+           for step in range(nsteps):
+               temp.append(temp_buf[step], start = [rank * NX])
+               pres.append(pres_buf[step], start = [rank * NX])
+        """
+        self._file._check_async()
+        data, start, count = self._append_args(data, start, record)
+        if self._file.indep_mode:
+            self.put_var(data, start=start, count=count)
+        else:
+            self.put_var_all(data, start=start, count=count)
+        self._appended(start[0] + count[0])
+
+    def _append_args(self, data, start, record):
+        # Private method to return the data, start and count of the write of
+        # records of data, as given to append, at record or after the last
+        # record appended.
+        if not self._nunlimdim:
+            raise ValueError("variable %s has no unlimited dimension" % self._name)
+        data = np.asarray(data)
+        if data.ndim == self.ndim - 1:
+            data = data.reshape((1,) + data.shape)
+        elif data.ndim != self.ndim:
+            raise ValueError("data of shape %s does not hold records of variable %s of %d dimensions" % \
+                             (data.shape, self._name, self.ndim))
+        start = [0] * (self.ndim - 1) if start is None else list(start)
+        if len(start) != self.ndim - 1:
+            raise ValueError("start must have %d entries, got %d" % (self.ndim - 1, len(start)))
+        if record is None:
+            record = self._nextrec
+        if record is None:
+            # the variables appended one after another start at the same
+            # record, unless records were added since by other means
+            nrecs = self.shape[0]
+            if self._file._appendrec is None:
+                self._file._appendrec = max(nrecs, self._file._appendend or 0)
+                self._file._appendend = self._file._appendrec
+            elif nrecs > self._file._appendend:
+                self._file._appendrec = self._file._appendend = nrecs
+            record = self._file._appendrec
+        return data, [int(record)] + start, list(data.shape)
+
+    cdef _appended(self, end):
+        # Private method to record that the records of the variable before
+        # end have been written by append.
+        self._nextrec = end
+        if self._file._appendend is None or end > self._file._appendend:
+            self._file._appendend = end
+
     def set_auto_chartostring(self,chartostring):
         """
         set_auto_chartostring(self,chartostring)
@@ -574,57 +734,215 @@ cdef class Variable:
         """
         self.chartostring = bool(chartostring)
 
+    def set_auto_maskandscale(self, value):
+        """
+        set_auto_maskandscale(self, value)
+
+        Turn on or off both the automatic masking of missing values and the
+        automatic unpacking and packing of data by the indexer, see
+        :meth:`Variable.set_auto_mask` and :meth:`Variable.set_auto_scale`.
+
+        :param value: True or False
+        :type value: bool
+        """
+        self.mask = bool(value)
+        self.scale = bool(value)
+
+    def set_auto_mask(self, value):
+        """
+        set_auto_mask(self, value)
+
+        Turn on or off the automatic masking of missing values when the
+        variable is read or written with the indexer, following the CF
+        conventions.
+
+        If `value` is set to `True`, the values read that are equal to the
+        `_FillValue` attribute, or to the default fill value when the fill
+        mode of the variable is on and it has no `_FillValue`, equal to one of
+        the `missing_value` attribute, or outside of `valid_min`, `valid_max`
+        or `valid_range`, are masked: a numpy masked array is returned when
+        there is any. When a numpy masked array is written, its masked values
+        are replaced by the `_FillValue` attribute or, when not set, by the
+        first value of `missing_value` or, when neither is set, by the
+        default fill value of the type of the variable, such as
+        ``pnetcdf.NC_FILL_INT``, whatever its fill mode. The values written
+        so are then masked when read back only if the fill mode of the
+        variable is on.
+
+        The default value of `mask` is `False` (the stored values are
+        returned as is).
+
+        :param value: True or False
+        :type value: bool
+        """
+        self.mask = bool(value)
+
+    def set_auto_scale(self, value):
+        """
+        set_auto_scale(self, value)
+
+        Turn on or off the automatic unpacking and packing of data when the
+        variable is read or written with the indexer, following the CF
+        conventions.
+
+        If `value` is set to `True` and the variable has a `scale_factor` or
+        an `add_offset` attribute, the values read are converted to
+        ``data * scale_factor + add_offset``, of the type of these attributes
+        (float64 if they are integers), and the values written are converted
+        to ``(data - add_offset) / scale_factor``, rounded to the nearest
+        integer for an integer variable. The conversion is made in place or
+        into the returned array, one block at a time, without full size
+        temporary arrays.
+
+        The values of these attributes, and of those used by
+        :meth:`Variable.set_auto_mask`, are read once and kept by the
+        variable until its attributes or its fill mode are changed.
+
+        The default value of `scale` is `False` (the stored values are
+        returned as is).
+
+        :param value: True or False
+        :type value: bool
+        """
+        self.scale = bool(value)
+
+    def set_auto_byteswap(self, value):
+        """
+        set_auto_byteswap(self, value)
+
+        Turn on or off the conversion of the data read with the indexer to
+        the native byte order.
+
+        The netCDF classic formats store the values in big-endian byte order.
+        If `value` is set to `False`, the numeric values read with the indexer
+        are returned as arrays of the big-endian counterpart of the data type
+        of the variable, e.g. ``>f4`` for ``NC_FLOAT``, which suits consumers
+        of the raw bytes, such as checksums or copies to another file. For a
+        file opened with ``mmap=True``, the bytes are copied from the memory
+        map of the variable without being swapped. Otherwise, PnetCDF
+        converts them to the native byte order while reading, and they are
+        swapped back in place. A single element, read with integer indices
+        along all dimensions, is still returned as a numpy scalar in native
+        byte order, as numpy has no scalars in the other byte order.
+
+        Arrays of any byte order can be written with the indexer, whatever
+        this setting. Data in non-native byte order is converted by a copy
+        to the native byte order before being passed to PnetCDF, which swaps
+        it again into the big-endian order of the file: big-endian data is
+        swapped twice, as PnetCDF provides no write of data already in the
+        byte order of the file.
+
+        The default value of `byteswap` is `True` (native byte order).
+
+        :param value: True or False
+        :type value: bool
+        """
+        self.byteswap = bool(value)
+
+    def _cf(self):
+        # Private method to return the cached CF attributes of the variable.
+        if self._cf_atts is None:
+            self._cf_atts = _CFAtts(self)
+        return self._cf_atts
+
     def __getitem__(self, elem):
         # This special method is used to index the netCDF variable using the
         # "extended slice syntax". The extended slice syntax is a perfect match
         # for the "start", "count" and "stride" arguments to the C function
         # ncmpi_get_var(), and is much more easy to use.
-        start, count, stride, put_ind =\
-        _StartCountStride(elem,self.shape,dimensions=self.dimensions,file=self._file)
-        datashape = _out_array_shape(count)
-        data = np.empty(datashape, dtype=self.dtype)
-
-        # Determine which dimensions need to be
-        # squeezed (those for which elem is an integer scalar).
-        # The convention used is that for those cases,
-        # put_ind for this dimension is set to -1 by _StartCountStride.
-        squeeze = data.ndim * [slice(None),]
-        for i,n in enumerate(put_ind.shape[:-1]):
-            if n == 1 and put_ind.size > 0 and put_ind[...,i].ravel()[0] == -1:
-                squeeze[i] = 0
-
-        # Reshape the arrays so we can iterate over them.
-        start = start.reshape((-1, self.ndim or 1))
-        count = count.reshape((-1, self.ndim or 1))
-        stride = stride.reshape((-1, self.ndim or 1))
-        put_ind = put_ind.reshape((-1, self.ndim or 1))
+        if self._file.profiler is None and not _profilers:
+            return self._getitem(elem)
+        t = perf_counter()
+        data = self._getitem(elem)
+        _record(self._file, self._name, '__getitem__', None, _nbytes(data), perf_counter() - t)
+        return data
 
-        # Fill output array with data chunks.
-        for (a,b,c,i) in zip(start, count, stride, put_ind):
-            datout = self._get(a,b,c)
-            if not hasattr(datout,'shape') or data.shape == datout.shape:
-                data = datout
+    cdef _getitem(self, elem):
+        # Private method implementing __getitem__
+
+        if self._file._async_wait is not None:
+            self._file._check_async()
+
+        # pending writes of write-behind mode are visible to the read
+        self._file._commit_writes()
+
+        # integers and slices of step 1 select a single subarray, which is
+        # read with one call to ncmpi_get_vara without going through the
+        # general purpose _StartCountStride.
+        hyperslab = _contiguous_hyperslab(elem, self.shape, False)
+        if hyperslab is not None:
+            start, count, datashape = hyperslab
+            if self._file._mmap:
+                data = self._get_mapped(start, count, self.byteswap)
+            elif self._file.block_cache is not None and self._file.indep_mode and self.ndim:
+                data = self._file.block_cache._read(self, start, count)
             else:
-                shape = getattr(data[tuple(i)], 'shape', ())
-                if not len(self.dimensions):
-                    # special case of scalar VLEN
-                    data[0] = datout
-                else:
-                    data[tuple(i)] = datout.reshape(shape)
-
-        # Remove extra singleton dimensions.
-        if hasattr(data,'shape'):
-            data = data[tuple(squeeze)]
-        if hasattr(data,'ndim') and self.ndim == 0:
-            # Make sure a numpy scalar array is returned instead of a 1-d array of
-            # length 1.
-            if data.ndim != 0: data = np.asarray(data[0])
+                data = self._get_hyperslab(start, count)
+            data = data.reshape(datashape)
+            if not datashape:
+                # all dimensions indexed by integers, return a numpy scalar
+                data = data[()]
+            count = [count]
+        else:
+            start, count, stride, put_ind =\
+            _StartCountStride(elem,self.shape,dimensions=self.dimensions,file=self._file)
+            datashape = _out_array_shape(count)
+
+            # Determine which dimensions need to be
+            # squeezed (those for which elem is an integer scalar).
+            # The convention used is that for those cases,
+            # put_ind for this dimension is set to -1 by _StartCountStride.
+            squeeze = len(datashape) * [slice(None),]
+            for i,n in enumerate(put_ind.shape[:-1]):
+                if n == 1 and put_ind.size > 0 and put_ind[...,i].ravel()[0] == -1:
+                    squeeze[i] = 0
+
+            # Reshape the arrays so we can iterate over them.
+            sdim = start.shape[:-1]
+            start = start.reshape((-1, self.ndim or 1))
+            count = count.reshape((-1, self.ndim or 1))
+            stride = stride.reshape((-1, self.ndim or 1))
+            put_ind = put_ind.reshape((-1, self.ndim or 1))
+
+            if len(start) != 1 and self.ndim and (stride == 1).all():
+                # integer index arrays select many data chunks, read all of
+                # them with a single call to ncmpi_get_varn.
+                data = self._get_orthogonal(start, count, sdim, datashape)
+            else:
+                data = np.empty(datashape, dtype=self.dtype)
+                # Fill output array with data chunks.
+                for (a,b,c,i) in zip(start, count, stride, put_ind):
+                    datout = self._get(a,b,c)
+                    if not hasattr(datout,'shape') or data.shape == datout.shape:
+                        data = datout
+                    else:
+                        shape = getattr(data[tuple(i)], 'shape', ())
+                        if not len(self.dimensions):
+                            # special case of scalar VLEN
+                            data[0] = datout
+                        else:
+                            data[tuple(i)] = datout.reshape(shape)
+
+            # Remove extra singleton dimensions.
+            if hasattr(data,'shape'):
+                data = data[tuple(squeeze)]
+            if hasattr(data,'ndim') and self.ndim == 0:
+                # Make sure a numpy scalar array is returned instead of a 1-d array of
+                # length 1.
+                if data.ndim != 0: data = np.asarray(data[0])
+
+        if not self.byteswap:
+            # give back to the values the byte order of the file
+            data = _big_endian(data)
+
+        if self.mask or self.scale:
+            data = _unpack(data, self._cf(), self.mask, self.scale)
 
         # if _Encoding is specified for a character variable, return
         # a numpy array of strings with one less dimension.
         if self.chartostring and getattr(self.dtype,'kind',None) == 'S' and\
            getattr(self.dtype,'itemsize',None) == 1:
-            encoding = getattr(self,'_Encoding',None)
+            encoding = self._attributes().get('_Encoding')
             # should there be some other way to disable this?
             if encoding is not None:
                 # only try to return a string array if rightmost dimension of
@@ -637,7 +955,7 @@ cdef class Variable:
                             matchdim = False
                             break
                     if matchdim:
-                        data = chartostring(data, encoding=encoding)
+                        data = chartostring(data, encoding=encoding, copy=False)
         return data
 
     def __setitem__(self, elem, data):
@@ -645,6 +963,23 @@ cdef class Variable:
         # "extended slice syntax". The extended slice syntax is a perfect match
         # for the "start", "count" and "stride" arguments to the C function
         # ncmpi_put_var(), and is much more easy to use.
+        if self._file.profiler is None and not _profilers:
+            self._setitem(elem, data)
+        else:
+            t = perf_counter()
+            self._setitem(elem, data)
+            _record(self._file, self._name, '__setitem__', None, _nbytes(data), perf_counter() - t)
+        if self._file._write_behind is not None:
+            self._file._check_write_behind()
+
+    cdef _setitem(self, elem, data):
+        # Private method implementing __setitem__
+
+        if self._file._async_wait is not None:
+            self._file._check_async()
+
+        if self.mask or self.scale:
+            data = _pack(data, self._cf(), self.dtype, self.mask, self.scale)
 
         # if _Encoding is specified for a character variable, convert
         # numpy array of strings to a numpy array of characters with one more
@@ -652,7 +987,7 @@ cdef class Variable:
         if self.chartostring and getattr(self.dtype,'kind',None) == 'S' and\
            getattr(self.dtype,'itemsize',None) == 1:
             # NC_CHAR variable
-            encoding = getattr(self,'_Encoding',None)
+            encoding = self._attributes().get('_Encoding')
             if encoding is not None:
                 # _Encoding attribute is set
                 # if data is a string or a bytes object, convert to a numpy string array
@@ -662,7 +997,16 @@ cdef class Variable:
                 if data.dtype.kind in ['S','U'] and data.dtype.itemsize > 1:
                     # if data is a numpy string array, convert it to an array
                     # of characters with one more dimension.
-                    data = stringtochar(data, encoding=encoding)
+                    data = stringtochar(data, encoding=encoding, copy=False)
+
+        # integers and slices of step 1 select a single subarray, which is
+        # written with one call to ncmpi_put_vara. Slices may extend past the
+        # end of the unlimited dimension.
+        hyperslab = _contiguous_hyperslab(elem, self.shape, self._nunlimdim > 0)
+        if hyperslab is not None:
+            start, count, datashape = hyperslab
+            self._put_hyperslab(data, start, count, datashape)
+            return
 
         start, count, stride, put_ind =\
         _StartCountStride(elem,self.shape,self.dimensions,self._file,datashape=data.shape,put=True)
@@ -683,11 +1027,18 @@ cdef class Variable:
                 data = np.broadcast_to(data, datashape)
 
         # Reshape these arrays so we can iterate over them.
+        sdim = start.shape[:-1]
         start = start.reshape((-1, self.ndim or 1))
         count = count.reshape((-1, self.ndim or 1))
         stride = stride.reshape((-1, self.ndim or 1))
         put_ind = put_ind.reshape((-1, self.ndim or 1))
 
+        if len(start) != 1 and self.ndim and (stride == 1).all():
+            # integer index arrays select many data chunks, write all of
+            # them with a single call to ncmpi_put_varn.
+            self._put_orthogonal(data, start, count, sdim)
+            return
+
         # Fill output array with data chunks.
         for (a,b,c,i) in zip(start, count, stride, put_ind):
             dataput = data[tuple(i)]
@@ -698,6 +1049,162 @@ cdef class Variable:
             self._put(dataput,a,b,c)
 
 
+    def _get_orthogonal(self, start, count, sdim, datashape):
+        # Private method to read the data chunks of an orthogonal selection,
+        # one per row of start and count, with a single call to
+        # ncmpi_get_varn. sdim is the number of chunks along each dimension.
+        # Returns the chunks assembled into an array of shape datashape.
+        nrows = len(start)
+        starts, counts = _merge_chunks(start, count, sdim)
+        if nrows == 0:
+            buff = np.empty(datashape, self.dtype)
+        else:
+            buff = np.empty(nrows * int(np.prod(count[0])), self.dtype)
+        self._get_varn(buff, len(starts), starts, counts, None, None,
+                       collective = not self._file.indep_mode)
+        if nrows == 0:
+            return buff
+        # chunks are stored one after another in buff, interleave the chunk
+        # index and the chunk's own index along each dimension.
+        ndims = len(sdim)
+        buff = buff.reshape(tuple(sdim) + tuple(count[0]))
+        axes = [ax for i in range(ndims) for ax in (i, ndims + i)]
+        return buff.transpose(axes).reshape(datashape)
+
+    def _put_orthogonal(self, data, start, count, sdim):
+        # Private method to write the data chunks of an orthogonal selection,
+        # one per row of start and count, with a single call to
+        # ncmpi_put_varn. It is the inverse of _get_orthogonal.
+        nrows = len(start)
+        ndims = len(sdim)
+        starts, counts = _merge_chunks(start, count, sdim)
+        if nrows == 0:
+            buff = np.empty(0, self.dtype)
+        else:
+            crow = count[0]
+            if data.size != nrows * int(np.prod(crow)):
+                raise IndexError('size of data array does not conform to slice')
+            shape = [n for i in range(ndims) for n in (sdim[i], crow[i])]
+            axes = list(range(0, 2 * ndims, 2)) + list(range(1, 2 * ndims, 2))
+            buff = np.ascontiguousarray(data.reshape(shape).transpose(axes),
+                                        dtype=self.dtype)
+        if self._file._write_behind is not None:
+            # the posted request must not see later changes to data
+            if np.may_share_memory(buff, data):
+                buff = buff.copy()
+            self._file._defer_write(self._iput_varn(buff, len(starts), starts, counts, None, None))
+            return
+        self._put_varn(buff, len(starts), starts, counts,
+                       collective = not self._file.indep_mode)
+
+    def _put_deferred(self, data, start, count, stride):
+        # Private method to post the write of data, in write-behind mode, as
+        # a nonblocking request committed later by the file. The request is
+        # posted from a copy of data, of the variable's type, so that the
+        # caller may modify or release data right after the assignment.
+        buff = np.array(data, dtype=self.dtype, order='C')
+        self._file._defer_write(self._iput_vars(start, count, stride, buff, None, None))
+
+    cdef _written(self):
+        # Private method called after data is written to the variable, which
+        # may change the number of records and the blocks of the block cache.
+        self._file._numrecs = None
+        if self._file.block_cache is not None:
+            self._file.block_cache._invalidate(self._varid)
+
+    def _get_hyperslab(self, start, count):
+        # Private method to read the subarray described by start and count,
+        # used by the fast path of __getitem__.
+        cdef int ierr, n, ndims
+        cdef size_t startp[_FAST_PATH_MAX_NDIMS]
+        cdef size_t countp[_FAST_PATH_MAX_NDIMS]
+        cdef MPI_Offset bufcount = 1
+        cdef MPI_Datatype buftype = MPI_DATATYPE_NULL
+        cdef ndarray data
+        ndims = len(start)
+        for n from 0 <= n < ndims:
+            startp[n] = start[n]
+            countp[n] = count[n]
+        data = np.empty(count, self.dtype)
+        if self._file.indep_mode:
+            with nogil:
+                ierr = ncmpi_get_vara(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                        <const MPI_Offset *>countp, PyArray_DATA(data), bufcount, buftype)
+        else:
+            with nogil:
+                ierr = ncmpi_get_vara_all(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                        <const MPI_Offset *>countp, PyArray_DATA(data), bufcount, buftype)
+        if ierr == NC_EINVALCOORDS:
+            raise IndexError('index exceeds dimension bounds')
+        _check_err(ierr)
+        return data
+
+    def _get_mapped(self, start, count, native):
+        # Private method to read the subarray described by start and count
+        # from the memory map of the variable, used by the fast path of
+        # __getitem__ for files opened with mmap=True. The data is returned
+        # in native byte order if native, and as stored in the file otherwise.
+        shape = self.shape
+        for s, c, n in zip(start, count, shape):
+            if s + c > n:
+                raise IndexError('index exceeds dimension bounds')
+        if self._memmap is None or self._memmap.shape != shape:
+            self._memmap = self.as_memmap()
+        data = np.empty(count, self.dtype if native else self._memmap.dtype)
+        data[...] = self._memmap[tuple(slice(s, s + c) for s, c in zip(start, count))]
+        return data
+
+    def _put_hyperslab(self, data, start, count, datashape):
+        # Private method to write the subarray described by start and count,
+        # used by the fast path of __setitem__. data is broadcast to datashape
+        # and, unless it is contiguous and of the variable's type, written by
+        # _put.
+        cdef int ierr, n, ndims
+        cdef size_t startp[_FAST_PATH_MAX_NDIMS]
+        cdef size_t countp[_FAST_PATH_MAX_NDIMS]
+        cdef MPI_Offset bufcount = 1
+        cdef MPI_Datatype buftype = MPI_DATATYPE_NULL
+        cdef ndarray buff
+        # integer indices past the end of a fixed-size dimension, checked
+        # here for the writes deferred or made by _put as well
+        shape = self.shape
+        for n from (self._nunlimdim > 0) <= n < len(start):
+            if start[n] + count[n] > shape[n]:
+                raise IndexError('index exceeds dimension bounds')
+        data = np.asarray(data)
+        if data.shape != datashape:
+            if data.size == np.prod(count):
+                data = data.reshape(datashape)
+            else:
+                try:
+                    data = np.broadcast_to(data, datashape)
+                except ValueError:
+                    raise IndexError('size of data array does not conform to slice')
+        if self._file._write_behind is not None:
+            self._put_deferred(data, start, count, [1] * len(start))
+            return
+        if data.dtype != self.dtype or not PyArray_ISCONTIGUOUS(data):
+            # let _put avoid or minimize the copies
+            self._put(data, start, count, [1] * len(start))
+            return
+        buff = data
+        ndims = len(start)
+        for n from 0 <= n < ndims:
+            startp[n] = start[n]
+            countp[n] = count[n]
+        if self._file.indep_mode:
+            with nogil:
+                ierr = ncmpi_put_vara(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                        <const MPI_Offset *>countp, PyArray_DATA(buff), bufcount, buftype)
+        else:
+            with nogil:
+                ierr = ncmpi_put_vara_all(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                        <const MPI_Offset *>countp, PyArray_DATA(buff), bufcount, buftype)
+        self._written()
+        if ierr == NC_EINVALCOORDS:
+            raise IndexError('index exceeds dimension bounds')
+        _check_err(ierr)
+
     def _put_var1(self, value, tuple index, bufcount, MPI.Datatype buftype, collective = True):
         cdef int ierr, ndims
         cdef size_t *indexp
@@ -707,9 +1214,10 @@ cdef class Variable:
         # rank of variable.
         data = np.array(value)
         ndim_index = len(index)
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         indexp = <size_t *>malloc(sizeof(size_t) * ndim_index)
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -731,6 +1239,7 @@ cdef class Variable:
             with nogil:
                 ierr = ncmpi_put_var1(self._file_id, self._varid, \
                                     <const MPI_Offset *>indexp, PyArray_DATA(data), buffcount, bufftype)
+        self._written()
         _check_err(ierr)
         free(indexp)
 
@@ -738,9 +1247,10 @@ cdef class Variable:
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -762,6 +1272,7 @@ cdef class Variable:
             with nogil:
                 ierr = ncmpi_put_var(self._file_id, self._varid, \
                                      PyArray_DATA(data), buffcount, bufftype)
+        self._written()
         _check_err(ierr)
 
     def _put_vara(self, start, count, ndarray data, bufcount, MPI.Datatype buftype, collective = True):
@@ -776,9 +1287,10 @@ cdef class Variable:
         for n from 0 <= n < ndims:
             countp[n] = count[n]
             startp[n] = start[n]
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -799,34 +1311,26 @@ cdef class Variable:
             with nogil:
                 ierr = ncmpi_put_vara(self._file_id, self._varid, <const MPI_Offset *>startp, <const MPI_Offset *>countp,\
                                      PyArray_DATA(data), buffcount, bufftype)
+        self._written()
         _check_err(ierr)
 
     def _put_varn(self, ndarray data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, collective = True):
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
-        cdef size_t **startsp
-        cdef size_t **countsp
+        cdef MPI_Offset **startsp = NULL
+        cdef MPI_Offset **countsp = NULL
         cdef int num_req
         num_req = num
         ndims = len(self.dimensions)
-        max_num_req = len(starts)
+        starts = _varn_array(starts, num, ndims, 'starts')
+        if counts is not None:
+            counts = _varn_array(counts, num, ndims, 'counts')
 
-        startsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            startsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                startsp[i][j] = starts[i, j]
-
-        countsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            countsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                countsp[i][j] = counts[i, j]
-
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -839,9 +1343,23 @@ cdef class Variable:
             bufftype = MPI_DATATYPE_NULL
         else:
             bufftype = buftype.ob_mpi
-        if collective:
-            with nogil:
-                ierr = ncmpi_put_varn_all(self._file_id,
+        try:
+            startsp = _row_pointers(starts)
+            if counts is not None:
+                countsp = _row_pointers(counts)
+            if collective:
+                with nogil:
+                    ierr = ncmpi_put_varn_all(self._file_id,
+                                              self._varid,
+                                              num_req,
+                                              <const MPI_Offset **>startsp,
+                                              <const MPI_Offset **>countsp,
+                                              PyArray_DATA(data),
+                                              buffcount,
+                                              bufftype)
+            else:
+                with nogil:
+                    ierr = ncmpi_put_varn(self._file_id,
                                           self._varid,
                                           num_req,
                                           <const MPI_Offset **>startsp,
@@ -849,21 +1367,16 @@ cdef class Variable:
                                           PyArray_DATA(data),
                                           buffcount,
                                           bufftype)
-        else:
-            with nogil:
-                ierr = ncmpi_put_varn(self._file_id,
-                                      self._varid,
-                                      num_req,
-                                      <const MPI_Offset **>startsp,
-                                      <const MPI_Offset **>countsp,
-                                      PyArray_DATA(data),
-                                      buffcount,
-                                      bufftype)
+        finally:
+            free(startsp)
+            free(countsp)
+        self._written()
         _check_err(ierr)
 
-    def put_varn_all(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None):
+    @_profiled('collective')
+    def put_varn_all(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, normalize=False):
         """
-        put_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        put_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         Method write multiple subarrays of a netCDF variable to the file.  This
         an collective I/O call and can only be called when the file is in the
@@ -920,7 +1433,9 @@ cdef class Variable:
             The elements of `starts[i][*]` must correspond to the variable’s
             dimensions in order.  Hence, if the variable is a record variable,
             the first index, `starts[i][0]` would correspond to the starting
-            record number for writing the data values.
+            record number for writing the data values. The rows of `starts`
+            and `counts` are passed to PnetCDF without a copy when they are
+            C-contiguous arrays of type ``numpy.int64``.
         :type starts: numpy.ndarray
 
         :param counts: [Optional]
@@ -945,9 +1460,26 @@ cdef class Variable:
 
         :param buftype: [Optional]
             An MPI derived data type that describes the memory layout of the
-            write buffer.
+            write buffer. If not given and `data` is a non-contiguous array,
+            such as a strided view, a derived data type built from the strides
+            of `data` is used, so that `data` is written without being copied.
         :type buftype: mpi4py.MPI.Datatype
 
+        :param normalize: [Optional]
+            If ``True``, the subarrays are sorted by their position in the
+            file, and the adjacent or overlapping ones along the last
+            dimension are merged, before being passed to PnetCDF, see
+            :class:`pnetcdf.VarnPlan`. The values of `data` are permuted
+            accordingly into a new buffer. A :class:`pnetcdf.VarnPlan` built
+            from the same `num`, `starts` and `counts` can be given instead,
+            to reuse its permutation over several calls. `buftype` must then
+            be `None`. Default is ``False``.
+        :type normalize: bool or :class:`pnetcdf.VarnPlan`
+
+        :return: The :class:`pnetcdf.VarnPlan` used when `normalize` is set,
+            which gives the number of merged subarrays, or `None`.
+        :rtype: :class:`pnetcdf.VarnPlan`
+
         :Example: A example is available in ``examples/put_varn_int.py``
 
          ::
@@ -963,24 +1495,34 @@ cdef class Variable:
            v.put_varn_all(w_buf, num = num_reqs, starts = starts, counts = counts)
 
         """
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is not None:
+            data, num, starts, counts = plan.gather(data), plan.num, plan.starts, plan.counts
         self._put_varn(data, num, starts, counts, bufcount = bufcount,
                        buftype = buftype, collective = True)
+        return plan
 
-    def put_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None):
+    @_profiled('independent')
+    def put_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, normalize=False):
         """
-        put_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        put_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         This method call is the same as method :meth:`Variable.put_varn_all`,
         except it is an independent call and can only be called in the
         independent I/O mode. Please refer to :meth:`Variable.put_varn_all` for
         its argument usage.
         """
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is not None:
+            data, num, starts, counts = plan.gather(data), plan.num, plan.starts, plan.counts
         self._put_varn(data, num, starts, counts, bufcount = bufcount,
                        buftype = buftype, collective = False)
+        return plan
 
-    def iput_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None):
+    @_profiled('nonblocking')
+    def iput_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, normalize=False):
         """
-        iput_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        iput_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         This method call is the nonblocking counterpart of
         :meth:`Variable.put_varn`. The syntax is the same as
@@ -999,17 +1541,25 @@ cdef class Variable:
             returned. Any change to the buffer contents in between will result
             in unexpected error.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
         """
-        return self._iput_varn(data, num, starts, counts, bufcount, buftype,
-                               buffered=False)
-
-    def bput_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None):
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is not None:
+            data, num, starts, counts = plan.gather(data), plan.num, plan.starts, plan.counts
+        req = self._iput_varn(data, num, starts, counts, bufcount, buftype,
+                              buffered=False)
+        req._plan = plan
+        return req
+
+    @_profiled('nonblocking')
+    def bput_varn(self, data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, normalize=False):
         """
-        bput_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        bput_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         This method call is the nonblocking, buffered counterpart of
         :meth:`Variable.put_varn`. For the argument usage, please refer to
@@ -1025,14 +1575,28 @@ cdef class Variable:
             Once the call to this method returns, the caller is free to change
             the contents of write buffer. Prior to calling this method, make
             sure :meth:`File.attach_buff` is called to allocate an internal
-            buffer for accommodating the write requests.
+            buffer for accommodating the write requests. When the buffer is
+            managed by a :class:`pnetcdf.BufferManager`, a write that does not
+            fit in it is handled by the manager instead of failing.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
         """
-        return self._iput_varn(data, num, starts, counts, bufcount, buftype, buffered=True)
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is not None:
+            data, num, starts, counts = plan.gather(data), plan.num, plan.starts, plan.counts
+        manager = self._file.buff_manager
+        if manager is None:
+            req = self._iput_varn(data, num, starts, counts, bufcount, buftype, buffered=True)
+        else:
+            req = manager._bput(self, data, bufcount, buftype, lambda buff, buffered:
+                self._iput_varn(buff, num, starts, counts, bufcount, buftype, buffered=buffered))
+        req._plan = plan
+        return req
 
     def _put_vars(self, start, count, stride, ndarray data, bufcount, MPI.Datatype buftype, collective = True):
         cdef int ierr, ndims
@@ -1049,9 +1613,10 @@ cdef class Variable:
             countp[n] = count[n]
             startp[n] = start[n]
             stridep[n] = stride[n]
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1074,6 +1639,7 @@ cdef class Variable:
                 ierr = ncmpi_put_vars(self._file_id, self._varid, \
                                         <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
                                         <const MPI_Offset *>stridep, PyArray_DATA(data), buffcount, bufftype)
+        self._written()
         _check_err(ierr)
 
 
@@ -1102,8 +1668,9 @@ cdef class Variable:
         shapeout = ()
         for lendim in count:
             shapeout = shapeout + (lendim,)
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1125,11 +1692,13 @@ cdef class Variable:
                 ierr = ncmpi_put_varm(self._file_id, self._varid, <const MPI_Offset *>startp, \
                                         <const MPI_Offset *>countp, <const MPI_Offset *>stridep, \
                                         <const MPI_Offset *>imapp, PyArray_DATA(data), buffcount, bufftype)
+        self._written()
         _check_err(ierr)
 
 
 
 
+    @_profiled('collective')
     def put_var_all(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, MPI.Datatype buftype=None):
         """
         put_var_all(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -1274,7 +1843,12 @@ cdef class Variable:
 
         :param buftype: [Optional]
             An MPI derived data type that describes the memory layout of the
-            write buffer.
+            write buffer. If not given and `data` is a non-contiguous array,
+            such as a strided view, a derived data type built from the strides
+            of `data` is used, so that `data` is written without being copied.
+            If not given and `data` is a numeric array of another data type
+            than the variable's, its predefined MPI datatype is used, so that
+            PnetCDF converts the values without a temporary array.
         :type buftype: mpi4py.MPI.Datatype
 
         :Operational mode: This method must be called while the file is in
@@ -1305,6 +1879,7 @@ cdef class Variable:
             raise ValueError("Invalid input arguments for put_var_all")
 
 
+    @_profiled('independent')
     def put_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         put_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -1333,94 +1908,98 @@ cdef class Variable:
     def _put(self, ndarray data, start, count, stride):
         """Private method to put data into a netCDF variable"""
         cdef int ierr, ndims
-        cdef npy_intp totelem
         cdef size_t *startp
         cdef size_t *countp
         cdef ptrdiff_t *stridep
-        cdef char **strdata
-        cdef void* elptr
-        cdef char* databuff
-        cdef ndarray dataarr
+        cdef size_t *imapp
         cdef MPI_Offset bufcount
         cdef MPI_Datatype buftype
         # rank of variable.
         ndims = len(self.dimensions)
-        # make sure data is contiguous.
-        # if not, make a local copy.
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
-        # fill up startp,countp,stridep.
+        count = [abs(n) for n in count] # make -1 into +1
+        # check to see that size of data array is what is expected
+        # for slice given.
         totelem = 1
-        negstride = 0
-        sl = []
+        for n in count:
+            totelem = totelem * n
+        if totelem != PyArray_SIZE(data):
+            raise IndexError('size of data array does not conform to slice')
+        # give data one axis per dimension of the variable, which makes a
+        # copy only if data is non-contiguous and of a different shape.
+        data, start, stride = _positive_strides(data.reshape(count), start, count, stride)
+        if self._file._write_behind is not None:
+            self._put_deferred(data, start, count, stride)
+            return
+        # data is written as is, described by an imap when it is not
+        # contiguous, and converted by PnetCDF when it is of another numeric
+        # type than the variable's. Otherwise, a single copy casts it, makes
+        # it contiguous and applies the reversal above.
+        imap = None
+        nelems, mpitype = _conversion_buftype(data, self.dtype, None, None)
+        if data.dtype != self.dtype and mpitype is None:
+            data = np.ascontiguousarray(data, dtype=self.dtype)
+        elif not PyArray_ISCONTIGUOUS(data):
+            imap = _strides_to_imap(data)
+            if imap is None:
+                data = np.ascontiguousarray(data)
+        if mpitype is None:
+            bufcount = 1
+            buftype = MPI_DATATYPE_NULL
+        else:
+            bufcount = nelems
+            buftype = (<MPI.Datatype>mpitype).ob_mpi
         startp = <size_t *>malloc(sizeof(size_t) * ndims)
         countp = <size_t *>malloc(sizeof(size_t) * ndims)
         stridep = <ptrdiff_t *>malloc(sizeof(ptrdiff_t) * ndims)
+        imapp = <size_t *>malloc(sizeof(size_t) * ndims)
         for n from 0 <= n < ndims:
-            count[n] = abs(count[n]) # make -1 into +1
+            startp[n] = start[n]
             countp[n] = count[n]
-            # for neg strides, reverse order (then flip that axis after data read in)
-            if stride[n] < 0:
-                negstride = 1
-                stridep[n] = -stride[n]
-                startp[n] = start[n]+stride[n]*(count[n]-1)
-                stride[n] = -stride[n]
-                sl.append(slice(None, None, -1)) # this slice will reverse the data
-            else:
-                startp[n] = start[n]
-                stridep[n] = stride[n]
-                sl.append(slice(None, None, 1))
-            totelem = totelem*countp[n]
-        # check to see that size of data array is what is expected
-        # for slice given.
-        dataelem = PyArray_SIZE(data)
-        if totelem != dataelem:
-            raise IndexError('size of data array does not conform to slice')
-        if negstride:
-            # reverse data along axes with negative strides.
-            data = data[tuple(sl)].copy() # make sure a copy is made.
-        if self.dtype != data.dtype:
-            data = data.astype(self.dtype) # cast data, if necessary.
-        # strides all 1 or scalar variable, use put_vara (faster)
-        #bufcount = data.size
-        bufcount = 1
-        if self._file.file_format != "64BIT_DATA":
-            #check if dtype meets CDF-5 variable standards
-            if data.dtype.str[1:] not in _supportedtypescdf2:
-                raise TypeError, 'illegal data type, must be one of %s, got %s' % \
-                (_supportedtypescdf2, data.dtype.str[1:])
-        #check if dtype meets CDF-5 variable standards
-        elif data.dtype.str[1:] not in _supportedtypes:
-            raise TypeError, 'illegal data type, must be one of %s, got %s' % \
-            (_supportedtypes, data.dtype.str[1:])
-        buftype = MPI_DATATYPE_NULL
-        if self._file.indep_mode:
-            if sum(stride) == ndims or ndims == 0:
-                with nogil:
-                    ierr = ncmpi_put_vara(self._file_id, self._varid, \
-                                        <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
-                                        PyArray_DATA(data), bufcount, buftype)
-            else:
-                with nogil:
-                    ierr = ncmpi_put_vars(self._file_id, self._varid, \
-                                        <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
-                                        <const MPI_Offset *>stridep, PyArray_DATA(data), bufcount, buftype)
-        else:
-            if sum(stride) == ndims or ndims == 0:
-                with nogil:
-                    ierr = ncmpi_put_vara_all(self._file_id, self._varid, \
-                                        <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
-                                        PyArray_DATA(data), bufcount, buftype)
+            stridep[n] = stride[n]
+            if imap is not None:
+                imapp[n] = imap[n]
+        try:
+            if imap is not None:
+                if self._file.indep_mode:
+                    with nogil:
+                        ierr = ncmpi_put_varm(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                                            <const MPI_Offset *>countp, <const MPI_Offset *>stridep, \
+                                            <const MPI_Offset *>imapp, PyArray_DATA(data), bufcount, buftype)
+                else:
+                    with nogil:
+                        ierr = ncmpi_put_varm_all(self._file_id, self._varid, <const MPI_Offset *>startp, \
+                                            <const MPI_Offset *>countp, <const MPI_Offset *>stridep, \
+                                            <const MPI_Offset *>imapp, PyArray_DATA(data), bufcount, buftype)
+            # strides all 1 or scalar variable, use put_vara (faster)
+            elif self._file.indep_mode:
+                if sum(stride) == ndims or ndims == 0:
+                    with nogil:
+                        ierr = ncmpi_put_vara(self._file_id, self._varid, \
+                                            <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
+                                            PyArray_DATA(data), bufcount, buftype)
+                else:
+                    with nogil:
+                        ierr = ncmpi_put_vars(self._file_id, self._varid, \
+                                            <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
+                                            <const MPI_Offset *>stridep, PyArray_DATA(data), bufcount, buftype)
             else:
-                with nogil:
-                    ierr = ncmpi_put_vars_all(self._file_id, self._varid, \
-                                        <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
-                                        <const MPI_Offset *>stridep, PyArray_DATA(data), bufcount, buftype)
-
+                if sum(stride) == ndims or ndims == 0:
+                    with nogil:
+                        ierr = ncmpi_put_vara_all(self._file_id, self._varid, \
+                                            <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
+                                            PyArray_DATA(data), bufcount, buftype)
+                else:
+                    with nogil:
+                        ierr = ncmpi_put_vars_all(self._file_id, self._varid, \
+                                            <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
+                                            <const MPI_Offset *>stridep, PyArray_DATA(data), bufcount, buftype)
+        finally:
+            free(startp)
+            free(countp)
+            free(stridep)
+            free(imapp)
+        self._written()
         _check_err(ierr)
-        free(startp)
-        free(countp)
-        free(stridep)
 
     def _get_var1(self, ndarray buff, index, bufcount, MPI.Datatype buftype, collective = True):
         cdef int ierr, ndims
@@ -1430,6 +2009,9 @@ cdef class Variable:
 
         ndim_index = len(index)
         indexp = <size_t *>malloc(sizeof(size_t) * ndim_index)
+        if not PyArray_ISCONTIGUOUS(buff):
+            buff, bufcount, buftype = _noncontiguous_buffer(buff, bufcount, buftype, False)
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1457,6 +2039,9 @@ cdef class Variable:
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
         cdef ndarray data
+        if not PyArray_ISCONTIGUOUS(buff):
+            buff, bufcount, buftype = _noncontiguous_buffer(buff, bufcount, buftype, False)
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1491,6 +2076,9 @@ cdef class Variable:
             countp[n] = count[n]
             startp[n] = start[n]
 
+        if not PyArray_ISCONTIGUOUS(buff):
+            buff, bufcount, buftype = _noncontiguous_buffer(buff, bufcount, buftype, False)
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1516,25 +2104,19 @@ cdef class Variable:
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
-        cdef size_t **startsp
-        cdef size_t **countsp
+        cdef MPI_Offset **startsp = NULL
+        cdef MPI_Offset **countsp = NULL
         cdef int num_req
 
+        if not PyArray_ISCONTIGUOUS(data):
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, False)
         num_req = num
         ndims = len(self.dimensions)
-        max_num_req = len(starts)
-        startsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            startsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                startsp[i][j] = starts[i][j]
-
-        countsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            countsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                countsp[i][j] = counts[i][j]
+        starts = _varn_array(starts, num, ndims, 'starts')
+        if counts is not None:
+            counts = _varn_array(counts, num, ndims, 'counts')
 
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1545,9 +2127,23 @@ cdef class Variable:
         else:
             bufftype = buftype.ob_mpi
 
-        if collective:
-            with nogil:
-                ierr = ncmpi_get_varn_all(self._file_id,
+        try:
+            startsp = _row_pointers(starts)
+            if counts is not None:
+                countsp = _row_pointers(counts)
+            if collective:
+                with nogil:
+                    ierr = ncmpi_get_varn_all(self._file_id,
+                                              self._varid,
+                                              num_req,
+                                              <const MPI_Offset **>startsp,
+                                              <const MPI_Offset **>countsp,
+                                              PyArray_DATA(data),
+                                              buffcount,
+                                              bufftype)
+            else:
+                with nogil:
+                    ierr = ncmpi_get_varn(self._file_id,
                                           self._varid,
                                           num_req,
                                           <const MPI_Offset **>startsp,
@@ -1555,16 +2151,9 @@ cdef class Variable:
                                           PyArray_DATA(data),
                                           buffcount,
                                           bufftype)
-        else:
-            with nogil:
-                ierr = ncmpi_get_varn(self._file_id,
-                                      self._varid,
-                                      num_req,
-                                      <const MPI_Offset **>startsp,
-                                      <const MPI_Offset **>countsp,
-                                      PyArray_DATA(data),
-                                      buffcount,
-                                      bufftype)
+        finally:
+            free(startsp)
+            free(countsp)
 
         _check_err(ierr)
 
@@ -1584,6 +2173,9 @@ cdef class Variable:
             countp[n] = count[n]
             startp[n] = start[n]
             stridep[n] = stride[n]
+        if not PyArray_ISCONTIGUOUS(buff):
+            buff, bufcount, buftype = _noncontiguous_buffer(buff, bufcount, buftype, False)
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1602,7 +2194,9 @@ cdef class Variable:
                 ierr = ncmpi_get_vars(self._file_id, self._varid, \
                                         <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
                                         <const MPI_Offset *>stridep, PyArray_DATA(buff), buffcount, bufftype)
-
+        free(startp)
+        free(countp)
+        free(stridep)
         _check_err(ierr)
 
     def _get_varm(self, ndarray buff, start, count, stride, imap, bufcount, MPI.Datatype buftype, collective = True):
@@ -1626,6 +2220,7 @@ cdef class Variable:
             else:
                 stridep[n] = 1
             imapp[n] = imap[n]
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -1644,8 +2239,13 @@ cdef class Variable:
                 ierr = ncmpi_get_varm(self._file_id, self._varid, <const MPI_Offset *>startp, \
                                         <const MPI_Offset *>countp, <const MPI_Offset *>stridep, \
                                         <const MPI_Offset *>imapp, PyArray_DATA(buff), buffcount, bufftype)
+        free(startp)
+        free(countp)
+        free(stridep)
+        free(imapp)
         _check_err(ierr)
 
+    @_profiled('collective')
     def get_var_all(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         get_var_all(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -1785,7 +2385,12 @@ cdef class Variable:
 
         :param buftype: [Optional]
             An MPI derived data type that describes the memory layout of the
-            read buffer.
+            read buffer. If not given and `data` is a non-contiguous array,
+            such as a strided view, a derived data type built from the strides
+            of `data` is used, so that values are read directly into `data`.
+            If not given and `data` is a numeric array of another data type
+            than the variable's, its predefined MPI datatype is used, so that
+            PnetCDF converts the values while reading them into `data`.
         :type buftype: mpi4py.MPI.Datatype
 
         :Operational mode: This method must be called while the file is in
@@ -1826,6 +2431,7 @@ cdef class Variable:
         else:
             raise ValueError("Invalid input arguments for get_var_all")
 
+    @_profiled('independent')
     def get_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         get_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -1851,9 +2457,10 @@ cdef class Variable:
         else:
             raise ValueError("Invalid input arguments for get_var")
 
-    def get_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None):
+    @_profiled('collective')
+    def get_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False):
         """
-        get_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        get_varn_all(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         Method to read multiple subarrays of a netCDF variables from the file.
         This a collective  I/O call and can only be called when the file is in
@@ -1910,7 +2517,9 @@ cdef class Variable:
             The elements of `starts[i][*]` must correspond to the variable’s
             dimensions in order.  Hence, if the variable is a record variable,
             the first index, `starts[i][0]` would correspond to the starting
-            record number for reading the data values.
+            record number for reading the data values. The rows of `starts`
+            and `counts` are passed to PnetCDF without a copy when they are
+            C-contiguous arrays of type ``numpy.int64``.
         :type starts: numpy.ndarray
 
         :param counts: [Optional]
@@ -1935,9 +2544,26 @@ cdef class Variable:
 
         :param buftype: [Optional]
             An MPI derived data type that describes the memory layout of the
-            write buffer.
+            read buffer. If not given and `data` is a non-contiguous array,
+            such as a strided view, a derived data type built from the strides
+            of `data` is used, so that values are read directly into `data`.
         :type buftype: mpi4py.MPI.Datatype
 
+        :param normalize: [Optional]
+            If ``True``, the subarrays are sorted by their position in the
+            file, and the adjacent or overlapping ones along the last
+            dimension are merged, before being passed to PnetCDF, see
+            :class:`pnetcdf.VarnPlan`. The values are read into a new
+            buffer and permuted accordingly into `data`. A :class:`pnetcdf.VarnPlan` built
+            from the same `num`, `starts` and `counts` can be given instead,
+            to reuse its permutation over several calls. `buftype` must then
+            be `None`. Default is ``False``.
+        :type normalize: bool or :class:`pnetcdf.VarnPlan`
+
+        :return: The :class:`pnetcdf.VarnPlan` used when `normalize` is set,
+            which gives the number of merged subarrays, or `None`.
+        :rtype: :class:`pnetcdf.VarnPlan`
+
         :Example: an example code fragment is given below.
 
          ::
@@ -1953,20 +2579,176 @@ cdef class Variable:
            v.get_varn_all(r_buf, num = num_reqs, starts = starts, counts = counts)
 
         """
-        return self._get_varn(data, num, starts, counts, bufcount = bufcount,
-                              buftype = buftype, collective = True)
-
-    def get_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None):
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is None:
+            return self._get_varn(data, num, starts, counts, bufcount = bufcount,
+                                  buftype = buftype, collective = True)
+        buff = np.empty(plan.size, np.asarray(data).dtype)
+        self._get_varn(buff, plan.num, plan.starts, plan.counts, None, None, collective = True)
+        plan.scatter(buff, data)
+        return plan
+
+    @_profiled('independent')
+    def get_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False):
         """
-        get_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        get_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         This method call is the same as method :meth:`Variable.get_varn_all`,
         except it is an independent call and can only be called while the file
         in the independent I/O mode. Please refer to
         :meth:`Variable.get_varn_all` for its argument usage.
         """
-        return self._get_varn(data, num, starts, counts, bufcount = bufcount,
-                              buftype = buftype, collective = False)
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is None:
+            return self._get_varn(data, num, starts, counts, bufcount = bufcount,
+                                  buftype = buftype, collective = False)
+        buff = np.empty(plan.size, np.asarray(data).dtype)
+        self._get_varn(buff, plan.num, plan.starts, plan.counts, None, None, collective = False)
+        plan.scatter(buff, data)
+        return plan
+
+    @_profiled(returns_data=True)
+    def get(self, index=Ellipsis, out=None, dtype=None):
+        """
+        get(self, index=Ellipsis, out=None, dtype=None)
+
+        Read the values selected by an indexer expression, optionally into a
+        caller-provided array. Unlike ``var[index]``, the data is read by a
+        single call to ``ncmpi_get_vara``, ``ncmpi_get_vars`` or
+        ``ncmpi_get_varm`` directly into `out`, without allocating any
+        intermediate array. The method is collective or independent following
+        the current data mode of the file. For a file opened with
+        ``mmap=True``, the values are copied from the memory map of the
+        variable returned by :meth:`Variable.as_memmap` instead.
+
+        :param index: [Optional] The indexer expression, made of integers,
+            slices with a positive step and Ellipsis, e.g. ``(0, slice(2,
+            10, 2), Ellipsis)`` or ``numpy.s_[0, 2:10:2, ...]``. Dimensions
+            indexed by an integer are removed from the shape of the result.
+            Default is to read the entire variable.
+        :type index: int, slice, Ellipsis or tuple
+
+        :param out: [Optional] The array to read into. Its shape must be the
+            shape of the selection. Its data type may differ from the data
+            type of the variable, in which case the values are converted by
+            PnetCDF while being read, see `dtype`. It may be non-contiguous, e.g. a view of a larger
+            array, as long as its strides are non-negative multiples of its
+            item size, in which case the values are read with
+            ``ncmpi_get_varm``. If `None`, a new array is allocated.
+        :type out: numpy.ndarray
+
+        :param dtype: [Optional] The data type of the array to read into,
+            allocated when `out` is `None`, or the data type of `out`
+            otherwise. When it differs from the data type of the variable,
+            the predefined MPI datatype of `dtype` is passed to PnetCDF as
+            `buftype`, so that the values are converted while being copied
+            into the array, without a temporary array of the variable's type.
+            It must be a numeric type if the variable is numeric, and the
+            type of the variable for a character variable. It may be in
+            big-endian byte order, e.g. ``>f4``, the byte order of the file,
+            in which case the values are not swapped when the file is opened
+            with ``mmap=True``, and are swapped back in place after being
+            read otherwise. Default is the data type of the variable.
+        :type dtype: numpy.dtype
+
+        :return: `out`, or the newly allocated array. Character variables
+            with the ``_Encoding`` attribute are not converted to strings.
+        :rtype: numpy.ndarray
+
+        :Operational mode: This method must be called while the file is in
+            data mode, collective or independent.
+
+        :Example:
+
+         ::
+
+           # read one record into a row of a preallocated buffer
+           buf = numpy.empty((nrecs, NY, NX), dtype=v.dtype)
+           for rec in range(nrecs):
+               v.get(numpy.s_[rec, :, :], out=buf[rec])
+
+           # read an NC_SHORT variable as float32
+           data = v.get(numpy.s_[0, :, :], dtype=numpy.float32)
+
+           # read the bytes of an NC_FLOAT variable as stored in the file
+           raw = v.get(dtype='>f4')
+        """
+        cdef int n
+        # pending writes of write-behind mode are visible to the read
+        self._file._commit_writes()
+        if self.ndim == 0:
+            if index is not Ellipsis and index != ():
+                raise IndexError('scalar variable only accepts an Ellipsis or an empty tuple')
+            start, count, stride, outshape = [], [], [], ()
+        else:
+            start, count, stride, put_ind =\
+            _StartCountStride(index,self.shape,dimensions=self.dimensions,file=self._file)
+            if start.size != self.ndim:
+                raise IndexError('get() only accepts integers, slices and Ellipsis in index')
+            start = start.reshape(-1).tolist()
+            count = count.reshape(-1).tolist()
+            stride = stride.reshape(-1).tolist()
+            put_ind = put_ind.reshape(-1)
+            shape = self.shape
+            outshape = []
+            for n in range(self.ndim):
+                if stride[n] < 0:
+                    raise IndexError('get() does not accept slices with a negative step')
+                if isinstance(put_ind[n], slice):
+                    outshape.append(count[n])
+                elif start[n] >= shape[n]:
+                    raise IndexError('index exceeds dimension bounds')
+            outshape = tuple(outshape)
+
+        if out is None:
+            out = np.empty(outshape, self.dtype if dtype is None else dtype)
+        else:
+            if not isinstance(out, np.ndarray):
+                raise TypeError('out must be a numpy array')
+            if dtype is not None and out.dtype != np.dtype(dtype):
+                raise TypeError('data type of out (%s) does not match dtype (%s)' % (out.dtype, np.dtype(dtype)))
+            if out.shape != outshape:
+                raise ValueError('shape of out %s does not match the selection %s' % (out.shape, outshape))
+            if not out.flags.writeable:
+                raise ValueError('out is not writeable')
+        # an array in non-native byte order is read into as native
+        buff = out if out.dtype.isnative else out.view(out.dtype.newbyteorder('='))
+        if buff.dtype != self.dtype and _conversion_buftype(buff, self.dtype, None, None)[1] is None:
+            raise TypeError('data type %s cannot be converted from the variable (%s)' % (out.dtype, self.dtype))
+
+        if self._file._mmap and self.ndim:
+            # copied from the memory map, without MPI-IO
+            if self._memmap is None or self._memmap.shape != self.shape:
+                self._memmap = self.as_memmap()
+            sel = tuple(slice(start[n], start[n] + (count[n] - 1) * stride[n] + 1, stride[n])
+                        if isinstance(put_ind[n], slice) else start[n] for n in range(self.ndim))
+            out[...] = self._memmap[sel]
+            return out
+
+        collective = not self._file.indep_mode
+        if buff.flags.c_contiguous:
+            self._get_vars(buff, start, count, stride, None, None, collective = collective)
+            if buff is not out:
+                buff.byteswap(inplace=True)
+            return out
+
+        # map the dimensions of the variable to the strides of out, in
+        # number of elements
+        itemsize = out.dtype.itemsize
+        imap = []
+        n = 0
+        for i in range(self.ndim):
+            if isinstance(put_ind[i], slice):
+                if out.strides[n] < 0 or out.strides[n] % itemsize:
+                    raise ValueError('strides of out must be non-negative multiples of its item size')
+                imap.append(out.strides[n] // itemsize)
+                n = n + 1
+            else:
+                imap.append(0)
+        self._get_varm(buff, start, count, stride, imap, None, None, collective = collective)
+        if buff is not out:
+            buff.byteswap(inplace=True)
+        return out
 
     def _get(self,start,count,stride):
         """Private method to retrieve data from a netCDF variable"""
@@ -2062,9 +2844,10 @@ cdef class Variable:
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
         cdef int request
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2087,7 +2870,7 @@ cdef class Variable:
                 ierr = ncmpi_bput_var(self._file_id, self._varid, \
                                         PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, False, buffered)
 
     def _iput_var1(self, value, index, bufcount, MPI.Datatype buftype, buffered=False):
         cdef int ierr, ndims
@@ -2099,9 +2882,10 @@ cdef class Variable:
         # rank of variable.
         data = np.array(value)
         ndim_index = len(index)
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         indexp = <size_t *>malloc(sizeof(size_t) * ndim_index)
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2124,7 +2908,7 @@ cdef class Variable:
                 ierr = ncmpi_bput_var1(self._file_id, self._varid, <const MPI_Offset *>indexp,\
                                         PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, False, buffered)
 
     def _iput_vara(self, start, count, ndarray data, bufcount, MPI.Datatype buftype, buffered=False):
         cdef int ierr, ndims
@@ -2139,9 +2923,10 @@ cdef class Variable:
         for n from 0 <= n < ndims:
             countp[n] = count[n]
             startp[n] = start[n]
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2163,7 +2948,7 @@ cdef class Variable:
                 ierr = ncmpi_bput_vara(self._file_id, self._varid, <const MPI_Offset *>startp, <const MPI_Offset *>countp,\
                                         PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, False, buffered)
 
     def _iput_vars(self, start, count, stride, ndarray data, bufcount, MPI.Datatype buftype, buffered=False):
         cdef int ierr, ndims
@@ -2181,8 +2966,9 @@ cdef class Variable:
             countp[n] = count[n]
             startp[n] = start[n]
             stridep[n] = stride[n]
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2203,34 +2989,26 @@ cdef class Variable:
                 ierr = ncmpi_bput_vars(self._file_id, self._varid, <const MPI_Offset *>startp, <const MPI_Offset *>countp,\
                                         <const MPI_Offset *>stridep, PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, False, buffered)
 
     def _iput_varn(self, ndarray data, num, starts, counts, bufcount, MPI.Datatype buftype, buffered=False):
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
-        cdef size_t **startsp
-        cdef size_t **countsp
+        cdef MPI_Offset **startsp = NULL
+        cdef MPI_Offset **countsp = NULL
         cdef int num_req
         cdef int request
         num_req = num
         ndims = len(self.dimensions)
-        max_num_req = len(starts)
-        startsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            startsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                startsp[i][j] = starts[i, j]
-
-        countsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            countsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                countsp[i][j] = counts[i, j]
+        starts = _varn_array(starts, num, ndims, 'starts')
+        if counts is not None:
+            counts = _varn_array(counts, num, ndims, 'counts')
 
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
         #data = data.flatten()
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2243,31 +3021,38 @@ cdef class Variable:
             bufftype = MPI_DATATYPE_NULL
         else:
             bufftype = buftype.ob_mpi
-        if not buffered:
-            with nogil:
-                ierr = ncmpi_iput_varn(self._file_id,
-                                       self._varid,
-                                       num_req,
-                                       <const MPI_Offset **>startsp,
-                                       <const MPI_Offset **>countsp,
-                                       PyArray_DATA(data),
-                                       buffcount,
-                                       bufftype,
-                                       &request)
-        else:
-            with nogil:
-                ierr = ncmpi_bput_varn(self._file_id,
-                                       self._varid,
-                                       num_req,
-                                       <const MPI_Offset **>startsp,
-                                       <const MPI_Offset **>countsp,
-                                       PyArray_DATA(data),
-                                       buffcount,
-                                       bufftype,
-                                       &request)
+        try:
+            startsp = _row_pointers(starts)
+            if counts is not None:
+                countsp = _row_pointers(counts)
+            if not buffered:
+                with nogil:
+                    ierr = ncmpi_iput_varn(self._file_id,
+                                           self._varid,
+                                           num_req,
+                                           <const MPI_Offset **>startsp,
+                                           <const MPI_Offset **>countsp,
+                                           PyArray_DATA(data),
+                                           buffcount,
+                                           bufftype,
+                                           &request)
+            else:
+                with nogil:
+                    ierr = ncmpi_bput_varn(self._file_id,
+                                           self._varid,
+                                           num_req,
+                                           <const MPI_Offset **>startsp,
+                                           <const MPI_Offset **>countsp,
+                                           PyArray_DATA(data),
+                                           buffcount,
+                                           bufftype,
+                                           &request)
+        finally:
+            free(startsp)
+            free(countsp)
 
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, False, buffered)
 
     def _iput_varm(self, ndarray data, start, count, stride, imap, bufcount, MPI.Datatype buftype, buffered=False):
         cdef int ierr, ndims
@@ -2294,8 +3079,9 @@ cdef class Variable:
         shapeout = ()
         for lendim in count:
             shapeout = shapeout + (lendim,)
-        if not PyArray_ISCONTIGUOUS(data):
-            data = data.copy()
+        if not PyArray_ISCONTIGUOUS(data) or not data.dtype.isnative:
+            data, bufcount, buftype = _noncontiguous_buffer(data, bufcount, buftype, True)
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2316,8 +3102,33 @@ cdef class Variable:
                 ierr = ncmpi_bput_varm(self._file_id, self._varid, <const MPI_Offset *>startp, <const MPI_Offset *>countp,\
                                         <const MPI_Offset *>stridep, <const MPI_Offset *>imapp, PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
-
+        return self._new_request(request, data, False, buffered)
+
+    def _new_request(self, int request, ndarray buff, read, buffered=False):
+        # Private method to return the Request of a posted nonblocking
+        # request, registered in the file until it is completed. It keeps
+        # buff alive, except for buffered writes, whose data is copied into
+        # the attached buffer when they are posted.
+        req = Request(request, self._file, None if buffered else buff, buff.nbytes, read)
+        if not read and self._file.block_cache is not None:
+            self._file.block_cache._invalidate(self._varid, req)
+        self._file._requests[request] = req
+        return req
+
+    def _varn_plan(self, normalize, num, starts, counts, buftype):
+        # Private method to return the VarnPlan to use for the subarrays of a
+        # varn method, or None when they are passed to PnetCDF as given.
+        if normalize is None or normalize is False:
+            return None
+        if buftype is not None:
+            raise ValueError("normalize cannot be used with buftype")
+        if isinstance(normalize, VarnPlan):
+            if normalize.nsegs != num:
+                raise ValueError("the VarnPlan is for %d subarrays, num is %d" % (normalize.nsegs, num))
+            return normalize
+        return VarnPlan(num, starts, counts)
+
+    @_profiled('nonblocking')
     def bput_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         bput_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -2339,30 +3150,27 @@ cdef class Variable:
             Once the call to this method returns, the caller is free to change
             the contents of write buffer.  Prior to calling this method, make
             sure :meth:`File.attach_buff` is called to allocate an internal
-            buffer for accommodating the write requests.
+            buffer for accommodating the write requests. When the buffer is
+            managed by a :class:`pnetcdf.BufferManager`, a write that does not
+            fit in it is handled by the manager instead of failing.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
 
         :Operational mode: This method can be called while the file is in either
             collective or independent data mode.
         """
+        manager = self._file.buff_manager
+        if manager is None or data is None:
+            return self._post_put_var(data, start, count, stride, imap, bufcount, buftype, True, "bput_var")
+        return manager._bput(self, data, bufcount, buftype, lambda buff, buffered:
+            self._post_put_var(buff, start, count, stride, imap, bufcount, buftype, buffered, "bput_var"))
 
-        if data is not None and all(arg is None for arg in [start, count, stride, imap]):
-            return self._iput_var(data, buffered=True, bufcount = bufcount, buftype = buftype)
-        elif all(arg is not None for arg in [data, start]) and all(arg is None for arg in [count, stride, imap]):
-            return self._iput_var1(data, start, buffered=True, bufcount = bufcount, buftype = buftype)
-        elif all(arg is not None for arg in [data, start, count]) and all(arg is None for arg in [stride, imap]):
-            return self._iput_vara(start, count, data, buffered=True, bufcount = bufcount, buftype = buftype)
-        elif all(arg is not None for arg in [data, start, count, stride]) and all(arg is None for arg in [imap]):
-            return self._iput_vars(start, count, stride, data, buffered=True, bufcount = bufcount, buftype = buftype)
-        elif all(arg is not None for arg in [data, start, count, imap]):
-            return self._iput_varm(data, start, count, stride, imap, buffered=True, bufcount = bufcount, buftype = buftype)
-        else:
-            raise ValueError("Invalid input arguments for bput_var")
-
+    @_profiled('nonblocking')
     def iput_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         iput_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -2383,32 +3191,40 @@ cdef class Variable:
             returned. Any change to the buffer contents in between will result
             in unexpected error.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
 
         :Operational mode: This method can be called while the file is in either
             collective or independent data mode.
         """
+        return self._post_put_var(data, start, count, stride, imap, bufcount, buftype, False, "iput_var")
+
+    def _post_put_var(self, data, start, count, stride, imap, bufcount, buftype, buffered, api):
+        # Private method to post the nonblocking write of iput_var, or of
+        # bput_var if buffered, selected by the given arguments.
         if data is not None and all(arg is None for arg in [start, count, stride, imap]):
-            return self._iput_var(data, bufcount = bufcount, buftype = buftype)
+            return self._iput_var(data, buffered=buffered, bufcount = bufcount, buftype = buftype)
         elif all(arg is not None for arg in [data, start]) and all(arg is None for arg in [count, stride, imap]):
-            return self._iput_var1(data, start, bufcount = bufcount, buftype = buftype)
+            return self._iput_var1(data, start, buffered=buffered, bufcount = bufcount, buftype = buftype)
         elif all(arg is not None for arg in [data, start, count]) and all(arg is None for arg in [stride, imap]):
-            return self._iput_vara(start, count, data, bufcount = bufcount, buftype = buftype)
+            return self._iput_vara(start, count, data, buffered=buffered, bufcount = bufcount, buftype = buftype)
         elif all(arg is not None for arg in [data, start, count, stride]) and all(arg is None for arg in [imap]):
-            return self._iput_vars(start, count, stride, data, bufcount = bufcount, buftype = buftype)
+            return self._iput_vars(start, count, stride, data, buffered=buffered, bufcount = bufcount, buftype = buftype)
         elif all(arg is not None for arg in [data, start, count, imap]):
-            return self._iput_varm(data, start, count, stride, imap, bufcount = bufcount, buftype = buftype)
+            return self._iput_varm(data, start, count, stride, imap, buffered=buffered, bufcount = bufcount, buftype = buftype)
         else:
-            raise ValueError("Invalid input arguments for iput_var")
+            raise ValueError("Invalid input arguments for %s" % api)
 
     def _iget_var(self, ndarray data, bufcount, MPI.Datatype buftype):
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
         cdef int request
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2421,7 +3237,7 @@ cdef class Variable:
             ierr = ncmpi_iget_var(self._file_id, self._varid, PyArray_DATA(data), \
             buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, True)
 
 
     def _iget_var1(self, ndarray buff, index, bufcount, MPI.Datatype buftype):
@@ -2432,6 +3248,7 @@ cdef class Variable:
         cdef int request
         ndim_index = len(index)
         indexp = <size_t *>malloc(sizeof(size_t) * ndim_index)
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2448,7 +3265,7 @@ cdef class Variable:
                                 bufftype, &request)
         _check_err(ierr)
         free(indexp)
-        return request
+        return self._new_request(request, buff, True)
 
 
     def _iget_vara(self, ndarray data, start, count, bufcount, MPI.Datatype buftype):
@@ -2464,6 +3281,7 @@ cdef class Variable:
         for n from 0 <= n < ndims:
             countp[n] = count[n]
             startp[n] = start[n]
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2478,7 +3296,7 @@ cdef class Variable:
                                     <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
                                     PyArray_DATA(data), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, True)
 
     def _iget_vars(self, ndarray buff, start, count, stride, bufcount, MPI.Datatype buftype):
         cdef int ierr, ndims
@@ -2496,6 +3314,7 @@ cdef class Variable:
             countp[n] = count[n]
             startp[n] = start[n]
             stridep[n] = stride[n]
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2510,11 +3329,12 @@ cdef class Variable:
                                     <const MPI_Offset *>startp, <const MPI_Offset *>countp, \
                                     <const MPI_Offset *>stridep, PyArray_DATA(buff), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, buff, True)
 
-    def iget_varn(self, ndarray data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None):
+    @_profiled('nonblocking')
+    def iget_varn(self, ndarray data, num, starts, counts=None, bufcount=None, MPI.Datatype buftype=None, normalize=False):
         """
-        iget_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None)
+        iget_varn(self, data, num, starts, counts=None, bufcount=None, buftype=None, normalize=False)
 
         This method call is the nonblocking counterpart of
         :meth:`Variable.get_varn`. The syntax is the same as
@@ -2533,34 +3353,39 @@ cdef class Variable:
             returned. Any change to the buffer contents in between will result
             in unexpected error.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
         """
+        plan = self._varn_plan(normalize, num, starts, counts, buftype)
+        if plan is None:
+            return self._iget_varn(data, num, starts, counts, bufcount, buftype)
+        req = self._iget_varn(np.empty(plan.size, data.dtype), plan.num, plan.starts, plan.counts, None, None)
+        def finish(buff):
+            plan.scatter(buff, data)
+            return data
+        req._finish = finish
+        req._plan = plan
+        return req
 
+    def _iget_varn(self, ndarray data, num, starts, counts, bufcount, MPI.Datatype buftype):
         cdef int ierr, ndims
         cdef MPI_Offset buffcount
         cdef MPI_Datatype bufftype
-        cdef size_t **startsp
-        cdef size_t **countsp
+        cdef MPI_Offset **startsp = NULL
+        cdef MPI_Offset **countsp = NULL
         cdef int num_req
         cdef int request
         num_req = num
         ndims = len(self.dimensions)
-        max_num_req = len(starts)
-        startsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            startsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                startsp[i][j] = starts[i][j]
-
-        countsp = <size_t**> malloc(max_num_req * sizeof(size_t*));
-        for i in range(max_num_req):
-            countsp[i] = <size_t*> malloc(ndims * sizeof(size_t));
-            for j in range(ndims):
-                countsp[i][j] = counts[i][j]
+        starts = _varn_array(starts, num, ndims, 'starts')
+        if counts is not None:
+            counts = _varn_array(counts, num, ndims, 'counts')
 
+        bufcount, buftype = _conversion_buftype(data, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2570,19 +3395,26 @@ cdef class Variable:
             bufftype = MPI_DATATYPE_NULL
         else:
             bufftype = buftype.ob_mpi
-        with nogil:
-            ierr = ncmpi_iget_varn(self._file_id,
-                                   self._varid,
-                                   num_req,
-                                   <const MPI_Offset **>startsp,
-                                   <const MPI_Offset **>countsp,
-                                   PyArray_DATA(data),
-                                   buffcount,
-                                   bufftype,
-                                   &request)
+        try:
+            startsp = _row_pointers(starts)
+            if counts is not None:
+                countsp = _row_pointers(counts)
+            with nogil:
+                ierr = ncmpi_iget_varn(self._file_id,
+                                       self._varid,
+                                       num_req,
+                                       <const MPI_Offset **>startsp,
+                                       <const MPI_Offset **>countsp,
+                                       PyArray_DATA(data),
+                                       buffcount,
+                                       bufftype,
+                                       &request)
+        finally:
+            free(startsp)
+            free(countsp)
 
         _check_err(ierr)
-        return request
+        return self._new_request(request, data, True)
 
     def _iget_varm(self, ndarray buff, start, count, stride, imap, bufcount, MPI.Datatype buftype):
         cdef int ierr, ndims
@@ -2606,6 +3438,7 @@ cdef class Variable:
             else:
                 stridep[n] = 1
             imapp[n] = imap[n]
+        bufcount, buftype = _conversion_buftype(buff, self.dtype, bufcount, buftype)
         if bufcount is None:
             buffcount = 1
         else:
@@ -2619,8 +3452,9 @@ cdef class Variable:
                                     <const MPI_Offset *>startp, <const MPI_Offset *>countp, <const MPI_Offset *>stridep, \
                                     <const MPI_Offset *>imapp, PyArray_DATA(buff), buffcount, bufftype, &request)
         _check_err(ierr)
-        return request
+        return self._new_request(request, buff, True)
 
+    @_profiled('nonblocking')
     def iget_var(self, data=None, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None):
         """
         iget_var(self, data, start=None, count=None, stride=None, imap=None, bufcount=None, buftype=None)
@@ -2639,10 +3473,12 @@ cdef class Variable:
             variable) until the read buffer is committed and the transaction is
             completed.
 
-        :return: The request ID, which can be used in a successive call to
+        :return: The request, an ``int`` subclass whose value is the request
+            ID, which can be used in a successive call to
             :meth:`File.wait_all` or :meth:`File.wait` for the completion
-            of the nonblocking operation.
-        :rtype: int
+            of the nonblocking operation. It keeps the buffer alive until
+            the request is completed.
+        :rtype: :class:`pnetcdf.Request`
 
         :Operational mode: This method can be called in either define,
             collective, or independent data mode.
@@ -2669,9 +3505,189 @@ cdef class Variable:
         :rtype: int64
         """
         cdef int ierr
-        cdef int offset
+        cdef MPI_Offset offset
         with nogil:
-            ierr = ncmpi_inq_varoffset(self._file_id, self._varid,
-                                       <MPI_Offset *> &offset)
+            ierr = ncmpi_inq_varoffset(self._file_id, self._varid, &offset)
         _check_err(ierr)
         return offset
+
+    def as_memmap(self):
+        """
+        as_memmap(self)
+
+        Map the data of this variable in the file into memory, without going
+        through MPI-IO. The values are in the big-endian byte order of the
+        netCDF classic formats, and are read from the file only as they are
+        accessed. The data of a fixed-size variable is stored contiguously
+        from :meth:`Variable.inq_offset`. The records of a record variable
+        are :meth:`File.inq_recsize` bytes apart, which the strides of the
+        returned array follow.
+
+        The map is that of the file on the local file system, meant for
+        read-only files accessed by the processes of one node. Data written
+        to the file through PnetCDF is seen only once it is flushed to the
+        file, by :meth:`File.sync` for instance, and the array keeps the
+        number of records of the variable at the time of the call.
+
+        :return: A read-only array of the shape of the variable and the
+            big-endian counterpart of its data type.
+        :rtype: ``numpy.memmap``
+
+        :Operational mode: This method is independent and must be called
+            while the file is in data mode.
+
+        :Example:
+
+         ::
+
+           f = pnetcdf.File("foo.nc", 'r')
+           v = f.variables['var']
+           m = v.as_memmap()
+           # only the pages of the file holding row i are read
+           row = m[i].astype(v.dtype)
+        """
+        shape = self.shape
+        dtype = self.dtype.newbyteorder('>')
+        offset = self.inq_offset()
+        path = self._file.filepath()
+        if self._nunlimdim == 0:
+            if self.size == 0:
+                return np.ndarray.__new__(np.memmap, shape, dtype, buffer=b'')
+            return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=shape)
+        # the records of the variable, recsize bytes apart
+        recsize = self._file.inq_recsize()
+        inner = np.empty(shape[1:], dtype)
+        if shape[0] == 0 or inner.size == 0:
+            return np.ndarray.__new__(np.memmap, shape, dtype, buffer=b'')
+        mm = np.memmap(path, dtype=np.uint8, mode='r', offset=offset,
+                       shape=((shape[0] - 1) * recsize + inner.nbytes,))
+        data = np.ndarray.__new__(np.memmap, shape, dtype, buffer=mm,
+                                  strides=(recsize,) + inner.strides)
+        data._mmap = mm._mmap
+        data.filename = mm.filename
+        data.offset = offset
+        data.mode = 'r'
+        return data
+
+cdef _big_endian(data):
+    # Private function to return the values of array data in big-endian byte
+    # order. Arrays in native byte order have their bytes swapped in place.
+    # Scalars are returned as is, numpy scalars being always native.
+    if not isinstance(data, np.ndarray):
+        return data
+    dtype = data.dtype.newbyteorder('>')
+    if dtype == data.dtype:
+        return data
+    return data.byteswap(inplace=True).view(dtype)
+
+cdef _positive_strides(ndarray data, start, count, stride):
+    # Private function to turn the negative strides of a write into positive
+    # ones: the elements are written in increasing order from the other end,
+    # and data is reversed along that axis (a view). Returns data, start and
+    # stride, the latter two as new lists.
+    start = list(start)
+    stride = list(stride)
+    if any(st < 0 for st in stride):
+        sl = []
+        for n in range(len(stride)):
+            if stride[n] < 0:
+                start[n] = start[n] + stride[n] * (count[n] - 1)
+                stride[n] = -stride[n]
+                sl.append(slice(None, None, -1))
+            else:
+                sl.append(slice(None))
+        data = data[tuple(sl)]
+    return data, start, stride
+
+cdef _strides_to_imap(ndarray data):
+    # Private function to express the strides of data in number of elements,
+    # as the imap argument of ncmpi_put_varm. Returns None if a stride is
+    # negative, zero or not a multiple of the item size, ignoring the strides
+    # of axes of length 1.
+    itemsize = data.dtype.itemsize
+    imap = []
+    for n, st in zip(data.shape, data.strides):
+        if n == 1:
+            imap.append(0)
+        elif st <= 0 or st % itemsize:
+            return None
+        else:
+            imap.append(st // itemsize)
+    return imap
+
+cdef _contiguous_hyperslab(elem, shape, bint put_unlim):
+    # Private function to convert an indexing expression made of integers,
+    # slices of step 1 and at most one Ellipsis into the start and count of a
+    # single subarray, and the shape of the data with the dimensions indexed
+    # by integers removed. Returns None for any other expression, which is
+    # then handled by _StartCountStride. If put_unlim is True, slices may
+    # extend past the end of the first (unlimited) dimension.
+    cdef Py_ssize_t i, ndims, nelem, length, beg, end, idx
+    ndims = len(shape)
+    if ndims == 0 or ndims > _FAST_PATH_MAX_NDIMS:
+        return None
+    if type(elem) is not tuple:
+        elem = (elem,)
+    nelem = len(elem)
+    for i in range(nelem):
+        if elem[i] is Ellipsis:
+            # the ellipsis stands for the missing dimensions.
+            elem = elem[:i] + (slice(None),) * (ndims - nelem + 1) + elem[i+1:]
+            break
+    if len(elem) > ndims:
+        return None
+    start = []
+    count = []
+    datashape = []
+    for i in range(ndims):
+        e = elem[i] if i < len(elem) else slice(None)
+        if type(e) is slice:
+            if e.step is not None and e.step != 1:
+                return None
+            length = shape[i]
+            if put_unlim and i == 0:
+                if e.stop is None:
+                    # length comes from the shape of the data to write
+                    return None
+                if e.stop > length:
+                    length = e.stop
+            try:
+                beg, end, _ = e.indices(length)
+            except TypeError:
+                return None
+            start.append(beg)
+            count.append(end - beg if end > beg else 0)
+            datashape.append(count[i])
+        elif isinstance(e, (int, np.integer)) and not isinstance(e, (bool, np.bool_)):
+            idx = e
+            if idx < 0:
+                idx += shape[i]
+                if idx < 0:
+                    return None
+            start.append(idx)
+            count.append(1)
+        else:
+            return None
+    return start, count, tuple(datashape)
+
+cdef _merge_chunks(start, count, sdim):
+    # Private function to merge the data chunks of an orthogonal selection,
+    # given by the rows of start and count, into runs of adjacent chunks along
+    # the last dimension indexed by an integer array. Chunks are only merged
+    # when the merged subarray stores the data in the same order as the
+    # chunks do, i.e. when all dimensions before that one have a count of 1.
+    # Returns the start and count arrays of the merged subarrays.
+    axes = [i for i, n in enumerate(sdim) if n > 1]
+    if len(start) < 2 or not axes:
+        return start, count
+    axis = axes[-1]
+    if np.prod(count[0, :axis]) != 1:
+        return start, count
+    step = np.zeros(start.shape[1], start.dtype)
+    step[axis] = 1
+    joined = (start[1:] - start[:-1] == step).all(axis=1)
+    heads = np.flatnonzero(np.concatenate(([True], ~joined)))
+    starts = start[heads]
+    counts = count[heads]
+    counts[:, axis] = np.diff(np.append(heads, len(start)))
+    return starts, counts
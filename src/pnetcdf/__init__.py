@@ -12,6 +12,12 @@ from ._File import *
 from ._Dimension import *
 from ._Variable import *
 from ._utils import *
+from ._loader import *
+from ._profile import *
+from ._request import *
+from ._buffer import *
+from ._varn import *
+from ._cache import *
 
 def libver():
     """
@@ -0,0 +1,196 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# Automatic management of the buffer attached to a file for the buffered
+# nonblocking writes of Variable.bput_var and Variable.bput_varn.
+
+import numpy as np
+
+__all__ = ['BufferManager']
+
+_POLICIES = ('fixed', 'high_water')
+
+# slack added to the size of each buffered write, for the alignment of the
+# data in the attached buffer
+_ALIGN = 8
+
+
+class BufferManager:
+    """
+    A manager of the buffer attached to a file for buffered nonblocking
+    writes, created by :meth:`File.attach_buff` when a `policy` is given, and
+    available as :attr:`File.buff_manager` until :meth:`File.detach_buff` is
+    called.
+
+    Each call to :meth:`Variable.bput_var` or :meth:`Variable.bput_varn`
+    first checks that the write fits in the attached buffer. If it does not,
+    or if the usage of the buffer would exceed the fraction `threshold` of
+    its size, then
+
+    - in independent data mode, the pending buffered writes are flushed by
+      :meth:`File.wait` and, with the ``'high_water'`` policy, the buffer is
+      grown if the write is still too large;
+    - in collective data mode, where a flush would have to be made by all
+      processes at once, the write is posted by :meth:`Variable.iput_var` or
+      :meth:`Variable.iput_varn` from a copy of the data instead, an
+      *overflow*, which is completed by the next call to
+      :meth:`File.wait_all` like the buffered writes.
+
+    With the ``'high_water'`` policy, the buffer is grown to the high-water
+    mark, the largest number of bytes of buffered writes (overflows included)
+    pending at once, whenever no buffered write is pending, i.e. after the
+    calls to :meth:`File.wait_all` or :meth:`File.wait` that complete them.
+    The ``'fixed'`` policy keeps the size of the buffer.
+
+    When no `bufsize` is given, the first `nsample` buffered writes are all
+    posted as overflows, and the buffer is then attached with the size of
+    the high-water mark, or earlier if the writes are completed before.
+
+    :Example:
+
+     ::
+
+       # let the buffer size adapt to the writes of each time step
+       mgr = f.attach_buff(policy = 'high_water')
+       for step in range(nsteps):
+           for v in vars:
+               v.bput_var(buf[v.name], start = start, count = count)
+           f.wait_all()
+       print(mgr.stats())
+       f.detach_buff()
+    """
+    def __init__(self, file, bufsize=None, policy='high_water', nsample=8, threshold=1.0, max_bufsize=None):
+        if policy not in _POLICIES:
+            raise ValueError("policy must be one of %s, got %r" % (_POLICIES, policy))
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1], got %r" % (threshold,))
+        self._file = file
+        self._policy = policy
+        self._nsample = nsample
+        self._threshold = threshold
+        self._max_bufsize = max_bufsize
+        self._bufsize = 0
+        # pending writes posted by the manager, with their sizes
+        self._pending = []
+        self._high_water = 0
+        self._usage_high_water = 0
+        self._ncalls = 0
+        self._nflushes = 0
+        self._noverflows = 0
+        self._overflow_bytes = 0
+        self._ngrows = 0
+        if bufsize is not None:
+            self._attach(bufsize)
+
+    def stats(self):
+        """
+        stats(self)
+
+        :return: The statistics of this process, a dictionary with keys
+
+            - ``bufsize``: the size of the attached buffer in bytes, 0 while
+              it is not attached;
+            - ``high_water``: the largest number of bytes of buffered writes,
+              overflows included, pending at once;
+            - ``usage_high_water``: the largest usage of the attached buffer
+              in bytes;
+            - ``calls``: the number of buffered writes;
+            - ``flushes``: the number of flushes made to fit a write;
+            - ``overflows`` and ``overflow_bytes``: the number and the bytes
+              of the writes posted from a copy of the data;
+            - ``grows``: the number of times the buffer was grown.
+        :rtype: dict
+        """
+        return {'bufsize': self._bufsize,
+                'high_water': self._high_water,
+                'usage_high_water': self._usage_high_water,
+                'calls': self._ncalls,
+                'flushes': self._nflushes,
+                'overflows': self._noverflows,
+                'overflow_bytes': self._overflow_bytes,
+                'grows': self._ngrows}
+
+    def _attach(self, bufsize):
+        # Private method to attach a buffer of bufsize bytes, detaching the
+        # current one first.
+        bufsize = int(bufsize)
+        if self._max_bufsize is not None:
+            bufsize = min(bufsize, self._max_bufsize)
+        if bufsize <= self._bufsize:
+            return
+        if self._bufsize:
+            self._file._detach_buff()
+            self._ngrows += 1
+        self._bufsize = 0
+        self._file._attach_buff(bufsize)
+        self._bufsize = bufsize
+
+    def _demand(self):
+        # Private method to return the bytes of the pending writes posted by
+        # the manager.
+        self._pending = [(req, n) for req, n in self._pending if not req.done()]
+        return sum(n for req, n in self._pending)
+
+    def _bput(self, variable, data, bufcount, buftype, post):
+        # Private method to post a buffered write of data to variable, with
+        # post(data, buffered), flushing, growing or overflowing as needed.
+        data = np.asarray(data)
+        nbytes = _bput_nbytes(variable, data, bufcount, buftype)
+        self._ncalls += 1
+        if self._bufsize == 0 and self._ncalls > self._nsample:
+            self._attach(max(self._high_water, self._demand() + nbytes))
+        if self._bufsize and not self._fits(nbytes):
+            if self._file.indep_mode:
+                self._flush()
+                if self._policy == 'high_water' and nbytes > self._bufsize:
+                    self._attach(nbytes)
+        if self._bufsize and self._fits(nbytes):
+            req = post(data, True)
+            self._usage_high_water = max(self._usage_high_water, self._file.inq_buff_usage())
+        else:
+            # the caller may modify data once this method returns
+            req = post(np.array(data), False)
+            self._noverflows += 1
+            self._overflow_bytes += nbytes
+        self._pending.append((req, nbytes))
+        self._high_water = max(self._high_water, self._demand())
+        return req
+
+    def _fits(self, nbytes):
+        # Private method to tell if a write of nbytes fits in the attached
+        # buffer, below the threshold.
+        return self._file.inq_buff_usage() + nbytes <= self._threshold * self._bufsize
+
+    def _flush(self):
+        # Private method to complete the pending writes posted by the manager,
+        # in independent data mode.
+        self._demand()
+        reqs = [req for req, n in self._pending]
+        if reqs:
+            self._file.wait(len(reqs), reqs)
+            self._nflushes += 1
+        self._pending = []
+
+    def _completed(self):
+        # Private method called after requests of the file are completed, to
+        # attach or grow the buffer once no buffered write is pending.
+        self._demand()
+        if self._bufsize == 0:
+            if self._ncalls and self._high_water:
+                self._attach(self._high_water)
+        elif self._policy == 'high_water' and self._high_water > self._bufsize:
+            if self._file.inq_buff_usage() == 0:
+                self._attach(self._high_water)
+
+
+def _bput_nbytes(variable, data, bufcount, buftype):
+    # Private function to return the bytes taken in the attached buffer by a
+    # write of data, in the external type of variable.
+    if buftype is None:
+        nelems = data.size
+    else:
+        nelems = (bufcount or 1) * buftype.Get_size() // data.itemsize
+    nbytes = nelems * variable.dtype.itemsize
+    return nbytes + (-nbytes) % _ALIGN
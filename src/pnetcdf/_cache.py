@@ -0,0 +1,233 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# Per-process cache of blocks of variables for the reads made with the
+# indexer in independent data mode.
+
+from collections import OrderedDict
+import numpy as np
+
+__all__ = ['BlockCache']
+
+# default size of the cache in bytes, when File is given block_cache=True
+_DEFAULT_NBYTES = 64 * 1024 * 1024
+
+
+class BlockCache:
+    """
+    BlockCache(file, nbytes, block_size=None, readahead=2)
+
+    A cache of the values of the variables of a file read by this process,
+    created by :class:`pnetcdf.File` when its `block_cache` argument is set,
+    and available as :attr:`File.block_cache`.
+
+    The cache holds blocks of consecutive entries along the first dimension
+    of a variable (the records of a record variable), each of about
+    `block_size` bytes and spanning all the other dimensions, up to a total
+    of `nbytes` bytes, the least recently used blocks being evicted first.
+    The reads of a variable with the indexer (``var[...]``) in independent
+    data mode, for an integer or a slice of step 1 along each dimension, are
+    served from the blocks they overlap, and the missing blocks are read
+    whole. When successive reads of a variable move forward through its
+    blocks, the `readahead` blocks that follow are read along with the
+    missing ones. The reads of all missing blocks are posted by
+    :meth:`Variable.iget_var` and completed by a single call to
+    :meth:`File.wait`. Other reads, and reads in collective data mode, do
+    not use the cache.
+
+    Writes of a variable by this process drop its blocks, and
+    :meth:`File.sync`, :meth:`File.flush`, :meth:`File.begin_indep`,
+    :meth:`File.redef` and :meth:`File.enddef` clear the cache, so that
+    the writes of other processes made visible by these calls are read. The
+    cache is meant for files that are not modified while they are read.
+
+    :Example:
+
+     ::
+
+       # random reads of small slices of a large read-only file
+       f = pnetcdf.File("images.nc", 'r', block_cache = 256 * 1024 * 1024)
+       f.begin_indep()
+       v = f.variables['images']
+       for i in indices:
+           sample = v[i]
+       print(f.block_cache.stats())
+    """
+    def __init__(self, file, nbytes, block_size=None, readahead=2):
+        nbytes = int(nbytes)
+        if nbytes <= 0:
+            raise ValueError("nbytes must be positive, got %r" % (nbytes,))
+        self._file = file
+        self._nbytes = nbytes
+        self._block_size = int(block_size) if block_size else max(1, min(1024 * 1024, nbytes // 16))
+        self._readahead = readahead
+        # blocks by (varid, block index), least recently used first
+        self._blocks = OrderedDict()
+        self._used = 0
+        # last block read and number of forward reads in a row, by varid
+        self._last = {}
+        self._streak = {}
+        # pending nonblocking write requests by varid, whose variables are
+        # not cached
+        self._writing = {}
+        self._hits = 0
+        self._misses = 0
+        self._prefetched = 0
+        self._evictions = 0
+        self._bypassed = 0
+
+    def stats(self):
+        """
+        stats(self)
+
+        :return: The statistics of this process, a dictionary with keys
+
+            - ``hits`` and ``misses``: the number of blocks found in the cache
+              or read for the reads served by the cache;
+            - ``readahead``: the number of blocks read ahead;
+            - ``evictions``: the number of blocks evicted;
+            - ``bypassed``: the number of reads not served by the cache, too
+              large or of a variable with pending writes;
+            - ``blocks`` and ``nbytes``: the number of blocks in the cache and
+              their size in bytes.
+        :rtype: dict
+        """
+        return {'hits': self._hits,
+                'misses': self._misses,
+                'readahead': self._prefetched,
+                'evictions': self._evictions,
+                'bypassed': self._bypassed,
+                'blocks': len(self._blocks),
+                'nbytes': self._used}
+
+    def clear(self):
+        """
+        clear(self)
+
+        Drop all blocks from the cache.
+        """
+        self._blocks.clear()
+        self._used = 0
+        self._last.clear()
+        self._streak.clear()
+
+    def _invalidate(self, varid, request=None):
+        # Private method to drop the blocks of variable varid, written by this
+        # process. If request is given, the write is a pending nonblocking
+        # request, and the variable is not cached until it is completed.
+        for key in [key for key in self._blocks if key[0] == varid]:
+            self._used -= self._blocks.pop(key).nbytes
+        self._last.pop(varid, None)
+        if request is not None:
+            self._writing.setdefault(varid, []).append(request)
+
+    def _completed(self):
+        # Private method called after requests of the file are completed, to
+        # drop the blocks of the variables whose pending nonblocking writes
+        # are all completed. Waits on other requests, including the reads of
+        # the cache, leave the variables with pending writes uncached.
+        for varid, requests in list(self._writing.items()):
+            requests = [req for req in requests if not req.done()]
+            if requests:
+                self._writing[varid] = requests
+            else:
+                del self._writing[varid]
+                self._invalidate(varid)
+
+    def _read(self, variable, start, count):
+        # Private method to read the subarray of variable described by start
+        # and count, through the cache when possible.
+        varid = variable._varid
+        shape = variable.shape
+        nrows = shape[0]
+        row_bytes = int(np.prod(shape[1:], dtype=np.int64)) * variable.dtype.itemsize
+        lo = start[0]
+        hi = lo + count[0]
+        if varid in self._writing or row_bytes == 0 or count[0] == 0 or hi > nrows or \
+           (hi - lo) * row_bytes > self._nbytes // 4:
+            self._bypassed += 1
+            return variable._get_hyperslab(start, count)
+        rows = max(1, self._block_size // row_bytes)
+        b0 = lo // rows
+        b1 = (hi - 1) // rows
+
+        # forward reads in a row trigger the read-ahead
+        last = self._last.get(varid)
+        streak = self._streak.get(varid, 0) + 1 if last is not None and last <= b0 <= last + 1 else 0
+        self._last[varid] = b1
+        self._streak[varid] = streak
+        # read ahead once the block that follows is not in the cache
+        nblocks = (nrows + rows - 1) // rows
+        b2 = b1
+        if streak and b1 + 1 < nblocks and (varid, b1 + 1) not in self._blocks:
+            b2 = min(b1 + self._readahead, nblocks - 1)
+
+        blocks = {}
+        missing = []
+        for b in range(b0, b2 + 1):
+            blk = self._blocks.get((varid, b))
+            # the last block of a record variable may have grown
+            if blk is not None and len(blk) == min(rows, nrows - b * rows):
+                self._blocks.move_to_end((varid, b))
+                if b <= b1:
+                    self._hits += 1
+                blocks[b] = blk
+            else:
+                if b <= b1:
+                    self._misses += 1
+                else:
+                    self._prefetched += 1
+                missing.append(b)
+        if missing:
+            blocks.update(self._fetch(variable, missing, rows, nrows))
+
+        out = np.empty(count, variable.dtype)
+        inner = tuple(slice(s, s + c) for s, c in zip(start[1:], count[1:]))
+        for b in range(b0, b1 + 1):
+            r0 = max(lo, b * rows)
+            r1 = min(hi, (b + 1) * rows)
+            out[r0 - lo:r1 - lo] = blocks[b][(slice(r0 - b * rows, r1 - b * rows),) + inner]
+        return out
+
+    def _fetch(self, variable, missing, rows, nrows):
+        # Private method to read the blocks missing of variable, one request
+        # per run of consecutive blocks, add them to the cache and return
+        # them by block index. The blocks of a run are copied out of its
+        # buffer, so that evicting one of them frees its memory.
+        runs = []
+        for b in missing:
+            if runs and runs[-1][1] == b - 1:
+                runs[-1][1] = b
+            else:
+                runs.append([b, b])
+        ndims = len(variable.shape)
+        reqs = []
+        buffs = []
+        for b0, b1 in runs:
+            r0 = b0 * rows
+            r1 = min((b1 + 1) * rows, nrows)
+            count = [r1 - r0] + list(variable.shape[1:])
+            buff = np.empty(count, variable.dtype)
+            reqs.append(variable._iget_vara(buff, [r0] + [0] * (ndims - 1), count, None, None))
+            buffs.append(buff)
+        self._file.wait(len(reqs), reqs)
+
+        blocks = {}
+        for (b0, b1), buff in zip(runs, buffs):
+            for b in range(b0, b1 + 1):
+                blk = buff[(b - b0) * rows:(b - b0 + 1) * rows]
+                if b1 > b0:
+                    blk = blk.copy()
+                blocks[b] = blk
+                old = self._blocks.pop((variable._varid, b), None)
+                if old is not None:
+                    self._used -= old.nbytes
+                self._blocks[(variable._varid, b)] = blk
+                self._used += blk.nbytes
+        while self._used > self._nbytes and len(self._blocks) > 1:
+            key, blk = self._blocks.popitem(last=False)
+            self._used -= blk.nbytes
+            self._evictions += 1
+        return blocks
@@ -0,0 +1,167 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# CF conventions for packed and missing data, applied by the indexer of
+# Variable when automatic scaling or masking is turned on: the attributes
+# scale_factor and add_offset, and _FillValue, missing_value, valid_min,
+# valid_max and valid_range.
+
+import numpy as np
+from ._utils import default_fillvals
+
+__all__ = []
+
+# number of elements converted at a time, which bounds the size of the
+# temporary arrays
+_CHUNK = 65536
+
+
+class _CFAtts:
+    # The CF attributes of a variable, read once and cached on the variable
+    # until its attributes or fill mode change.
+    def __init__(self, variable):
+        names = set(variable.ncattrs())
+        def att(name):
+            if name not in names:
+                return None
+            return np.asarray(variable.get_att(name)).reshape(-1)
+        dtype = variable.dtype
+
+        # packing
+        self.scale_factor = att('scale_factor')
+        self.add_offset = att('add_offset')
+        packing = [a for a in (self.scale_factor, self.add_offset) if a is not None]
+        if packing:
+            self.scale_factor = None if self.scale_factor is None else self.scale_factor[0]
+            self.add_offset = None if self.add_offset is None else self.add_offset[0]
+            self.dtype = np.result_type(*packing)
+            if self.dtype.kind != 'f':
+                self.dtype = np.dtype('f8')
+        else:
+            self.dtype = None
+
+        # values of the stored data that are missing
+        fill = att('_FillValue')
+        if fill is None and dtype.kind in 'iuf' and dtype.itemsize > 1:
+            no_fill, value = variable.inq_fill()
+            if not no_fill:
+                fill = np.asarray([value])
+        self.fill_value = None if fill is None else fill[0]
+        missing = att('missing_value')
+        values = [v for v in (fill, missing) if v is not None]
+        self.missing = np.concatenate(values).astype(dtype) if values else None
+        if self.fill_value is None and missing is not None:
+            self.fill_value = missing[0]
+        valid_range = att('valid_range')
+        if valid_range is not None and len(valid_range) == 2:
+            self.valid_min, self.valid_max = valid_range
+        else:
+            self.valid_min = att('valid_min')
+            self.valid_max = att('valid_max')
+            self.valid_min = None if self.valid_min is None else self.valid_min[0]
+            self.valid_max = None if self.valid_max is None else self.valid_max[0]
+        self.masked = self.missing is not None or self.valid_min is not None \
+                      or self.valid_max is not None
+
+    def mask(self, raw, out):
+        # Set out to whether each value of raw, stored data is missing.
+        out[...] = False
+        if self.missing is not None:
+            for value in self.missing:
+                if value != value:
+                    out |= np.isnan(raw)
+                else:
+                    out |= raw == value
+        if self.valid_min is not None:
+            out |= raw < self.valid_min
+        if self.valid_max is not None:
+            out |= raw > self.valid_max
+
+
+def _unpack(data, atts, mask, scale):
+    # Private function to convert data read from a variable with the CF
+    # attributes atts, masking its missing values if mask and unpacking it
+    # if scale. The conversion is made one chunk at a time, in place when data
+    # is already of the unpacked type.
+    dtype = atts.dtype if scale else None
+    mask = mask and atts.masked
+    if dtype is None and not mask:
+        return data
+    scalar = np.ndim(data) == 0
+    data = np.asarray(data)
+    shape = data.shape
+    flat = data.reshape(-1)
+    if dtype is None or dtype == flat.dtype:
+        out = flat if flat.flags.writeable else flat.copy()
+    else:
+        out = np.empty(flat.size, dtype)
+    missing = np.empty(flat.size, bool) if mask else None
+    for lo in range(0, flat.size, _CHUNK):
+        raw = flat[lo:lo + _CHUNK]
+        if mask:
+            atts.mask(raw, missing[lo:lo + _CHUNK])
+        if dtype is not None:
+            chunk = out[lo:lo + _CHUNK]
+            if atts.scale_factor is not None:
+                np.multiply(raw, atts.scale_factor, out=chunk, casting='unsafe')
+            elif out is not flat:
+                chunk[...] = raw
+            if atts.add_offset is not None:
+                np.add(chunk, atts.add_offset, out=chunk, casting='unsafe')
+    out = out.reshape(shape)
+    if mask and missing.any():
+        out = np.ma.MaskedArray(out, mask=missing.reshape(shape))
+        if atts.fill_value is not None and dtype is None:
+            out.set_fill_value(atts.fill_value)
+        return np.ma.masked if scalar else out
+    return out[()] if scalar else out
+
+
+def _pack(data, atts, vartype, mask, scale):
+    # Private function to convert data to be written to a variable of type
+    # vartype with the CF attributes atts, packing it if scale, rounded to
+    # the nearest integer for an integer type, and replacing its masked
+    # values by the fill value if mask, or the default fill value of vartype
+    # when the variable has none. The conversion is made one chunk at a time
+    # into a new array of type vartype.
+    data = np.asanyarray(data)
+    if data.dtype.kind not in 'biuf':
+        return data
+    packing = scale and atts.dtype is not None
+    missing = None
+    fill_value = atts.fill_value
+    if mask and np.ma.isMaskedArray(data):
+        if fill_value is None:
+            fill_value = default_fillvals.get(vartype.str[1:])
+        if fill_value is None:
+            raise ValueError("cannot write masked values to variable of type %s without _FillValue or missing_value attribute" % vartype)
+        missing = np.ma.getmaskarray(data)
+        if not missing.any():
+            missing = None
+        data = np.ma.getdata(data)
+    if not packing and missing is None:
+        return data
+    shape = data.shape
+    flat = np.ascontiguousarray(data).reshape(-1)
+    out = np.empty(flat.size, vartype)
+    if packing:
+        tmp = np.empty(min(flat.size, _CHUNK), atts.dtype)
+        for lo in range(0, flat.size, _CHUNK):
+            chunk = flat[lo:lo + _CHUNK]
+            t = tmp[:len(chunk)]
+            if atts.add_offset is not None:
+                np.subtract(chunk, atts.add_offset, out=t, casting='unsafe')
+            else:
+                t[...] = chunk
+            if atts.scale_factor is not None:
+                np.divide(t, atts.scale_factor, out=t, casting='unsafe')
+            if vartype.kind in 'iu':
+                np.rint(t, out=t)
+            np.copyto(out[lo:lo + _CHUNK], t, casting='unsafe')
+    else:
+        np.copyto(out, flat, casting='unsafe')
+    if missing is not None:
+        out[missing.reshape(-1)] = fill_value
+    return out.reshape(shape)
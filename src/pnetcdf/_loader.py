@@ -0,0 +1,350 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# Data loading helpers for machine learning frameworks, such as PyTorch. The
+# classes only rely on the dataset and sampler protocols and do not import
+# any framework.
+
+import numpy as np
+from mpi4py import MPI
+
+from ._File import File
+from ._utils import strerror
+
+__all__ = ['VariableDataset', 'DistributedBatchSampler']
+
+
+def _coalesce(indices, nrecs):
+    # Private function to convert a list of sample indices into runs of
+    # adjacent samples. Returns the first index and the length of each run,
+    # the number of distinct samples, and the positions of the requested
+    # samples in the (sorted, duplicate-free) data read from the runs, or
+    # None when the samples are requested in increasing order.
+    idx = np.asarray(indices, dtype=np.int64).reshape(-1)
+    idx = np.where(idx < 0, idx + nrecs, idx)
+    if idx.size > 0 and (idx.min() < 0 or idx.max() >= nrecs):
+        raise IndexError("sample index out of range")
+    uniq, inverse = np.unique(idx, return_inverse=True)
+    if uniq.size == idx.size and (inverse == np.arange(idx.size)).all():
+        inverse = None
+    heads = np.flatnonzero(np.diff(uniq) != 1) + 1
+    heads = np.concatenate(([0], heads)) if uniq.size > 0 else heads
+    lengths = np.diff(np.append(heads, uniq.size))
+    return uniq[heads], lengths, uniq.size, inverse
+
+
+class VariableDataset:
+    """
+    VariableDataset(file, variables, comm=None, info=None, transform=None, target_transform=None)
+
+    A map-style dataset whose samples are the subarrays along the first
+    dimension of one or more netCDF variables, for instance a variable of
+    images and a variable of their labels. It follows the dataset protocol
+    of PyTorch (``__len__``, ``__getitem__`` and ``__getitems__``) and can be
+    passed to ``torch.utils.data.DataLoader`` directly.
+
+    Reading a batch of samples does not read them one at a time. The sample
+    indices are sorted and coalesced into runs of adjacent samples and each
+    variable is read by a single call to :meth:`Variable.iget_varn`, all of
+    which are completed by a single call to :meth:`File.wait`. A batch can
+    also be posted ahead of time by :meth:`VariableDataset.prefetch`, so that
+    it is serviced by the same wait call as the batch before it.
+
+    :param file: Name of the netCDF file to open for reading, or an opened
+        `File` instance. A file opened by the dataset is closed by
+        :meth:`VariableDataset.close`.
+    :type file: str or :class:`pnetcdf.File`
+
+    :param variables: Names of the variables to read. All variables must have
+        the same length of their first dimension.
+    :type variables: str or list of str
+
+    :param comm: [Optional] MPI communicator used to open the file. Ignored
+        when `file` is a `File` instance.
+    :type comm: mpi4py.MPI.Comm or None
+
+    :param info: [Optional] MPI info object used to open the file. Ignored
+        when `file` is a `File` instance.
+    :type info: mpi4py.MPI.Info or None
+
+    :param transform: [Optional] Function applied to each sample of the first
+        variable.
+    :type transform: callable
+
+    :param target_transform: [Optional] Function applied to each sample of the
+        second variable.
+    :type target_transform: callable
+
+    :Operational mode: The file is switched to independent data mode, as
+        processes read different samples at different times. This method is
+        collective when `file` is a file name.
+
+    :Example: An example is available in ``examples/MNIST/pnetcdf_io.py``
+
+     ::
+
+        dataset = pnetcdf.VariableDataset('mnist_images.nc',
+                                          ['train_samples', 'train_labels'],
+                                          comm=MPI.COMM_WORLD)
+        images, labels = dataset.get_batch([0, 1, 2, 7])
+    """
+
+    def __init__(self, file, variables, comm=None, info=None, transform=None, target_transform=None):
+        if isinstance(file, File):
+            self.file = file
+            self._own_file = False
+        else:
+            self.file = File(file, mode='r', comm=comm, info=info)
+            self._own_file = True
+        if not self.file.indep_mode:
+            self.file.begin_indep()
+
+        if isinstance(variables, str):
+            variables = [variables]
+        self.variables = [self.file.variables[name] for name in variables]
+        if len(self.variables) == 0:
+            raise ValueError("at least one variable must be given")
+        for var in self.variables:
+            if var.ndim == 0:
+                raise ValueError("variable %s is a scalar" % var.name)
+        self._nsamples = self.variables[0].shape[0]
+        for var in self.variables[1:]:
+            if var.shape[0] != self._nsamples:
+                raise ValueError("variables %s and %s have different numbers of samples"
+                                 % (self.variables[0].name, var.name))
+        self.transform = transform
+        self.target_transform = target_transform
+        # batches posted by prefetch(), keyed by their tuple of indices, a
+        # list of batches for each key in the order they were posted
+        self._pending = {}
+
+    def __len__(self):
+        return self._nsamples
+
+    def _apply_transforms(self, sample):
+        # Private method to apply the user transforms to one sample, given as
+        # a list of subarrays, one per variable.
+        if self.transform is not None:
+            sample[0] = self.transform(sample[0])
+        if self.target_transform is not None and len(sample) > 1:
+            sample[1] = self.target_transform(sample[1])
+        return tuple(sample) if len(sample) > 1 else sample[0]
+
+    def __getitem__(self, idx):
+        sample = [var[idx, ...] for var in self.variables]
+        return self._apply_transforms(sample)
+
+    def __getitems__(self, indices):
+        batch = self.get_batch(indices)
+        return [self._apply_transforms([data[i] for data in batch])
+                for i in range(len(indices))]
+
+    def prefetch(self, indices):
+        """
+        prefetch(self, indices)
+
+        Post nonblocking read requests for a batch of samples. The requests
+        are completed, together with all other posted batches, by the next
+        call to :meth:`VariableDataset.get_batch` that needs data, and the
+        batch itself is then returned by a later call to
+        :meth:`VariableDataset.get_batch` with the same `indices`. Each call
+        posts a new batch: batches prefetched several times with the same
+        `indices` are returned by as many calls to
+        :meth:`VariableDataset.get_batch`, in the order they were posted.
+
+        :param indices: Indices of the samples in the batch.
+        :type indices: list of int
+
+        :Operational mode: This method is independent.
+        """
+        key = tuple(int(i) for i in indices)
+        firsts, lengths, nuniq, inverse = _coalesce(key, self._nsamples)
+        reqs = []
+        buffers = []
+        for var in self.variables:
+            buff = np.empty((nuniq,) + var.shape[1:], dtype=var.dtype)
+            if nuniq > 0:
+                starts = np.zeros((len(firsts), var.ndim), dtype=np.int64)
+                counts = np.empty((len(firsts), var.ndim), dtype=np.int64)
+                starts[:, 0] = firsts
+                counts[:, 0] = lengths
+                counts[:, 1:] = var.shape[1:]
+                reqs.append(var.iget_varn(buff, len(firsts), starts, counts))
+            buffers.append(buff)
+        self._pending.setdefault(key, []).append([reqs, buffers, inverse])
+
+    # Private method to complete the nonblocking requests of all batches
+    # posted by prefetch() in a single wait call.
+    def _wait_pending(self):
+        reqs = []
+        for entries in self._pending.values():
+            for entry in entries:
+                reqs.extend(entry[0])
+                entry[0] = []
+        if len(reqs) == 0:
+            return
+        status = [None] * len(reqs)
+        self.file.wait(len(reqs), reqs, status)
+        for err in status:
+            if err != 0:
+                raise RuntimeError(strerror(err))
+
+    def get_batch(self, indices):
+        """
+        get_batch(self, indices)
+
+        Read a batch of samples, one array per variable. The samples are
+        returned in the order of `indices`, which may contain duplicates.
+
+        :param indices: Indices of the samples in the batch.
+        :type indices: list of int
+
+        :return: The batch of each variable, of shape
+            ``(len(indices),) + var.shape[1:]``. The user transforms are not
+            applied.
+        :rtype: tuple of numpy.ndarray
+
+        :Operational mode: This method is independent.
+        """
+        key = tuple(int(i) for i in indices)
+        if key not in self._pending:
+            self.prefetch(key)
+        entries = self._pending[key]
+        if len(entries[0][0]) > 0:
+            self._wait_pending()
+        reqs, buffers, inverse = entries.pop(0)
+        if len(entries) == 0:
+            del self._pending[key]
+        if inverse is not None:
+            buffers = [buff[inverse] for buff in buffers]
+        return tuple(buffers)
+
+    def close(self):
+        """
+        close(self)
+
+        Cancel the pending prefetch requests and, if the file was opened by
+        the dataset, close the file.
+
+        :Operational mode: This method is collective when the file was opened
+            by the dataset.
+        """
+        reqs = []
+        for entries in self._pending.values():
+            for entry in entries:
+                reqs.extend(entry[0])
+        if len(reqs) > 0:
+            self.file.cancel(len(reqs), reqs, [None] * len(reqs))
+        self._pending.clear()
+        if self._own_file:
+            self.file.close()
+
+
+class DistributedBatchSampler:
+    """
+    DistributedBatchSampler(dataset, batch_size, comm=None, shuffle=False, seed=0, drop_last=False, prefetch=True)
+
+    A batch sampler partitioning the samples of a dataset among the
+    processes of an MPI communicator, in the same way as PyTorch's
+    ``DistributedSampler``, and grouping the samples of the calling process
+    into batches. It can be passed to ``torch.utils.data.DataLoader`` as its
+    ``batch_sampler``.
+
+    When `dataset` is a :class:`VariableDataset` and `prefetch` is True,
+    yielding a batch also posts the read requests of the next batch with
+    :meth:`VariableDataset.prefetch`, so that every wait call services two
+    batches at a time. Prefetching requires the data loader to read samples
+    in the calling process, i.e. ``num_workers=0``.
+
+    :param dataset: The dataset to sample from.
+
+    :param batch_size: Number of samples per batch on each process.
+    :type batch_size: int
+
+    :param comm: [Optional] MPI communicator whose processes share the
+        dataset. Default is ``MPI.COMM_WORLD``.
+    :type comm: mpi4py.MPI.Comm or None
+
+    :param shuffle: [Optional] Whether to shuffle the samples at every epoch.
+        All processes must use the same `seed`.
+    :type shuffle: bool
+
+    :param seed: [Optional] Random seed used to shuffle the samples.
+    :type seed: int
+
+    :param drop_last: [Optional] Whether to drop the tail of the samples to
+        make the number of samples evenly divisible among processes. If
+        False, samples are repeated instead.
+    :type drop_last: bool
+
+    :param prefetch: [Optional] Whether to prefetch the next batch.
+    :type prefetch: bool
+    """
+
+    def __init__(self, dataset, batch_size, comm=None, shuffle=False, seed=0, drop_last=False, prefetch=True):
+        if batch_size <= 0:
+            raise ValueError("batch_size must be a positive integer")
+        if comm is None:
+            comm = MPI.COMM_WORLD
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_replicas = comm.Get_size()
+        self.rank = comm.Get_rank()
+        self.shuffle = shuffle
+        self.seed = seed
+        self.drop_last = drop_last
+        self.prefetch = prefetch and isinstance(dataset, VariableDataset)
+        self.epoch = 0
+        nsamples = len(dataset)
+        if drop_last:
+            self.num_samples = nsamples // self.num_replicas
+        else:
+            self.num_samples = -(-nsamples // self.num_replicas)
+        self.total_size = self.num_samples * self.num_replicas
+
+    def set_epoch(self, epoch):
+        """
+        set_epoch(self, epoch)
+
+        Set the epoch number used to seed the shuffling, so that the order of
+        the samples differs among epochs. All processes must call it with the
+        same `epoch`.
+
+        :param epoch: Epoch number.
+        :type epoch: int
+        """
+        self.epoch = epoch
+
+    def indices(self):
+        """
+        indices(self)
+
+        :return: The indices of the samples assigned to the calling process
+            in the current epoch.
+        :rtype: numpy.ndarray
+        """
+        nsamples = len(self.dataset)
+        if self.shuffle:
+            rng = np.random.default_rng(self.seed + self.epoch)
+            order = rng.permutation(nsamples)
+        else:
+            order = np.arange(nsamples)
+        if self.total_size > nsamples:
+            order = np.resize(order, self.total_size)
+        else:
+            order = order[:self.total_size]
+        return order[self.rank:self.total_size:self.num_replicas]
+
+    def __len__(self):
+        return -(-self.num_samples // self.batch_size)
+
+    def __iter__(self):
+        order = self.indices().tolist()
+        batches = [order[i:i + self.batch_size]
+                   for i in range(0, len(order), self.batch_size)]
+        for k, batch in enumerate(batches):
+            if self.prefetch and k + 1 < len(batches):
+                self.dataset.prefetch(batches[k + 1])
+            yield batch
@@ -0,0 +1,260 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# Opt-in instrumentation of the I/O methods of File and Variable. When no
+# profiler is active, an instrumented method only checks three attributes
+# before calling the method itself, the first one guarding the file against
+# the calls made during an asynchronous wait.
+
+import csv, functools, io, json
+from contextlib import contextmanager
+from time import perf_counter
+
+import numpy as np
+
+__all__ = ['Profiler', 'profile']
+
+# profilers enabled by profile(), innermost last
+_active = []
+
+_FIELDS = ('variable', 'api', 'mode', 'calls', 'bytes', 'time')
+_STATS = ('min', 'max', 'mean')
+
+
+class Profiler:
+    """
+    Profiler()
+
+    A record of the I/O method calls made by this process, with the number
+    of calls, the number of bytes of the user buffers and the wall time spent,
+    for each variable, method and data mode. The data mode is one of
+    ``'collective'``, ``'independent'`` or ``'nonblocking'``. Calls to
+    :meth:`File.wait_all` and :meth:`File.wait`, which service nonblocking
+    requests, are recorded with an empty variable name and no bytes.
+
+    A profiler is enabled for all files by :func:`pnetcdf.profile`, or for a
+    single file by opening it with ``profile=True``, in which case it is
+    available as :attr:`File.profiler`.
+
+    :Example:
+
+     ::
+
+       with pnetcdf.profile() as prof:
+           v.put_var_all(buf, start = start, count = count)
+           f.wait_all()
+
+       # statistics among all processes, written by rank 0
+       prof.to_csv("profile.csv", comm = comm)
+    """
+    def __init__(self):
+        self._records = {}
+
+    def _record(self, variable, api, mode, nbytes, seconds):
+        # Private method to add a call to the record of (variable, api, mode)
+        rec = self._records.get((variable, api, mode))
+        if rec is None:
+            self._records[(variable, api, mode)] = [1, nbytes, seconds]
+        else:
+            rec[0] += 1
+            rec[1] += nbytes
+            rec[2] += seconds
+
+    def reset(self):
+        """
+        reset(self)
+
+        Discard all records.
+        """
+        self._records.clear()
+
+    def stats(self):
+        """
+        stats(self)
+
+        Return the records of this process.
+
+        :return: One dictionary per variable, method and data mode, with keys
+            ``variable``, ``api``, ``mode``, ``calls``, ``bytes`` and ``time``
+            (in seconds), sorted by variable, method and mode.
+        :rtype: list of dict
+        """
+        return [dict(zip(_FIELDS, key + tuple(rec))) for key, rec in sorted(self._records.items())]
+
+    def reduce(self, comm):
+        """
+        reduce(self, comm)
+
+        Return the statistics of the records among all processes of `comm`.
+        A process that made no call to a method counts as a process with
+        zero calls, bytes and time.
+
+        :param comm: MPI communicator of the processes.
+        :type comm: mpi4py.MPI.Comm
+
+        :return: One dictionary per variable, method and data mode, with keys
+            ``variable``, ``api`` and ``mode``, the keys ``calls_min``,
+            ``calls_max``, ``calls_mean``, and similarly for ``bytes`` and
+            ``time``, and ``imbalance``, the ratio of the maximum time to the
+            mean time (1.0 when the time is evenly spent).
+        :rtype: list of dict
+
+        :Operational mode: This method is collective over `comm`.
+        """
+        allrecords = comm.allgather(self._records)
+        keys = sorted(set().union(*allrecords))
+        result = []
+        for key in keys:
+            values = np.array([records.get(key, (0, 0, 0.0)) for records in allrecords], dtype=np.float64)
+            entry = dict(zip(_FIELDS[:3], key))
+            for i, field in enumerate(_FIELDS[3:]):
+                column = values[:, i]
+                entry[field + '_min'] = column.min()
+                entry[field + '_max'] = column.max()
+                entry[field + '_mean'] = column.mean()
+            mean_time = entry['time_mean']
+            entry['imbalance'] = entry['time_max'] / mean_time if mean_time > 0 else 1.0
+            result.append(entry)
+        return result
+
+    def _export(self, comm):
+        # Private method to return the records of this process, or their
+        # statistics among the processes of comm.
+        return self.stats() if comm is None else self.reduce(comm)
+
+    def to_json(self, path=None, comm=None):
+        """
+        to_json(self, path=None, comm=None)
+
+        Export the records as JSON.
+
+        :param str path: [Optional] Name of the file to write. When `comm` is
+            given, only the process of rank 0 writes it.
+
+        :param comm: [Optional] If given, the statistics among the processes
+            of `comm` are exported, see :meth:`Profiler.reduce`.
+        :type comm: mpi4py.MPI.Comm
+
+        :return: The JSON document.
+        :rtype: str
+
+        :Operational mode: This method is collective over `comm` when it is
+            given.
+        """
+        text = json.dumps(self._export(comm), indent=1)
+        if path is not None and (comm is None or comm.Get_rank() == 0):
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path=None, comm=None):
+        """
+        to_csv(self, path=None, comm=None)
+
+        Export the records as CSV, with a header line. Arguments are the same
+        as for :meth:`Profiler.to_json`.
+
+        :return: The CSV document.
+        :rtype: str
+
+        :Operational mode: This method is collective over `comm` when it is
+            given.
+        """
+        rows = self._export(comm)
+        if comm is None:
+            fields = _FIELDS
+        else:
+            fields = _FIELDS[:3] + tuple(f + '_' + s for f in _FIELDS[3:] for s in _STATS) + ('imbalance',)
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=fields, lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+        text = out.getvalue()
+        if path is not None and (comm is None or comm.Get_rank() == 0):
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+@contextmanager
+def profile(profiler=None):
+    """
+    profile(profiler=None)
+
+    Context manager that records the I/O method calls made on all files
+    while it is active.
+
+    :param profiler: [Optional] The profiler to record into. A new one is
+        created if not given.
+    :type profiler: :class:`pnetcdf.Profiler`
+
+    :return: The profiler, as the target of the ``with`` statement.
+    :rtype: :class:`pnetcdf.Profiler`
+
+    :Example:
+
+     ::
+
+       with pnetcdf.profile() as prof:
+           v[:] = buf
+       print(prof.to_json())
+    """
+    if profiler is None:
+        profiler = Profiler()
+    _active.append(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.remove(profiler)
+
+
+def _record(file, variable, api, mode, nbytes, seconds):
+    # Private function to record a call in the profiler of file and in the
+    # profilers enabled by profile(). mode None stands for the data mode the
+    # file is in.
+    if mode is None:
+        mode = 'independent' if file.indep_mode else 'collective'
+    if file.profiler is not None:
+        file.profiler._record(variable, api, mode, nbytes, seconds)
+    for profiler in _active:
+        if profiler is not file.profiler:
+            profiler._record(variable, api, mode, nbytes, seconds)
+
+
+def _nbytes(data):
+    # Private function to return the size of a user buffer in bytes
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if data is None:
+        return 0
+    return np.asarray(data).nbytes
+
+
+def _profiled(mode=None, file_method=False, returns_data=False):
+    # Private decorator recording the calls of an I/O method of Variable, or
+    # of File if file_method. The bytes are those of the data argument, or of
+    # the returned array if returns_data.
+    def decorator(func):
+        api = func.__name__
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            file = self if file_method else self._file
+            if file._async_wait is not None:
+                file._check_async()
+            if file.profiler is None and not _active:
+                return func(self, *args, **kwargs)
+            start = perf_counter()
+            result = func(self, *args, **kwargs)
+            seconds = perf_counter() - start
+            if file_method:
+                _record(file, '', api, mode, 0, seconds)
+            elif returns_data:
+                _record(file, self._name, api, mode, _nbytes(result), seconds)
+            else:
+                data = args[0] if args else kwargs.get('data')
+                _record(file, self._name, api, mode, _nbytes(data), seconds)
+            return result
+        return wrapper
+    return decorator
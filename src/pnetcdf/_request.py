@@ -0,0 +1,169 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+from ._utils import strerror
+
+__all__ = ['Request']
+
+
+class Request(int):
+    """
+    A nonblocking request posted by :meth:`Variable.iput_var`,
+    :meth:`Variable.iget_var`, :meth:`Variable.bput_var`,
+    :meth:`Variable.iput_varn`, :meth:`Variable.iget_varn` or
+    :meth:`Variable.bput_varn`.
+
+    A ``Request`` is an ``int`` whose value is the request ID, so it can be
+    passed to :meth:`File.wait_all`, :meth:`File.wait` and
+    :meth:`File.cancel` like an ID. Until the request is completed, it keeps
+    a reference to the user buffer, so the caller does not need to keep the
+    buffer alive. The buffer of a write request is released on completion,
+    and the buffer of a read request stays available through
+    :meth:`Request.result`. The buffer of a :meth:`Variable.bput_var` request
+    is not kept, because the data is copied into the attached buffer when
+    the request is posted.
+
+    A request is completed by any call to :meth:`File.wait_all`,
+    :meth:`File.wait` or :meth:`File.cancel` that includes it, by ID or with
+    ``pnetcdf.NC_REQ_ALL``, ``pnetcdf.NC_PUT_REQ_ALL`` or
+    ``pnetcdf.NC_GET_REQ_ALL``, by :meth:`Request.result`, or by awaiting
+    it in a coroutine, which returns the same as :meth:`Request.result` and
+    runs the wait in the thread of :meth:`File.wait_all_async`.
+
+    As for request IDs, the entries of the list of requests passed to these
+    methods are set to the resulting request IDs, ``pnetcdf.NC_REQ_NULL`` for
+    the completed requests. A reference to a ``Request`` object must be kept
+    elsewhere to use it after its completion.
+
+    :Example:
+
+     ::
+
+       reqs = [v.iget_var(np.empty(count, v.dtype), start = start, count = count) for v in vars]
+       f.wait_all()
+       bufs = [req.result() for req in reqs]
+    """
+    def __new__(cls, request_id, file, buffer, nbytes, read):
+        self = int.__new__(cls, request_id)
+        self._file = file
+        self._buffer = buffer
+        self._nbytes = nbytes
+        self._read = read
+        self._status = None
+        self._cancelled = False
+        # called with the read buffer once the request is completed, returns
+        # the buffer to give to the user
+        self._finish = None
+        self._plan = None
+        return self
+
+    def __repr__(self):
+        if self._status is None:
+            state = 'pending'
+        elif self._cancelled:
+            state = 'cancelled'
+        else:
+            state = strerror(self._status)
+        return "<%s %d: %s, %d bytes, %s>" % (type(self).__name__, self,
+               'read' if self._read else 'write', self._nbytes, state)
+
+    @property
+    def file(self):
+        """The :class:`pnetcdf.File` the request is posted to."""
+        return self._file
+
+    @property
+    def nbytes(self):
+        """The size of the user buffer of the request in bytes."""
+        return self._nbytes
+
+    @property
+    def plan(self):
+        """The :class:`pnetcdf.VarnPlan` of the subarrays of a request posted
+        by a varn method with `normalize` set, which gives the number of
+        merged subarrays, or `None`."""
+        return self._plan
+
+    @property
+    def status(self):
+        """The error code of the completed request, ``pnetcdf.NC_NOERR`` on
+        success, or `None` if the request is pending."""
+        return self._status
+
+    def is_read(self):
+        """
+        is_read(self)
+
+        :return: ``True`` for a read request, ``False`` for a write request.
+        :rtype: bool
+        """
+        return self._read
+
+    def done(self):
+        """
+        done(self)
+
+        :return: ``True`` if the request has been completed or cancelled.
+        :rtype: bool
+        """
+        return self._status is not None
+
+    def cancelled(self):
+        """
+        cancelled(self)
+
+        :return: ``True`` if the request has been cancelled.
+        :rtype: bool
+        """
+        return self._cancelled
+
+    def result(self):
+        """
+        result(self)
+
+        Complete the request if it is pending and return the read buffer.
+
+        :return: The buffer filled by a read request, or `None` for a write
+            request.
+        :rtype: numpy.ndarray
+
+        :Operational mode: If the request is pending, this method calls
+            :meth:`File.wait_all` in collective data mode, and must then be
+            called by all processes, or :meth:`File.wait` in independent data
+            mode.
+        """
+        if self._status is None:
+            if self._file.indep_mode:
+                self._file.wait(1, [self])
+            else:
+                self._file.wait_all(1, [self])
+        if self._cancelled:
+            raise RuntimeError("request %d was cancelled" % self)
+        if self._status != 0:
+            raise RuntimeError(strerror(self._status))
+        return self._buffer
+
+    def __await__(self):
+        # awaiting a request completes it like result(), with
+        # File.wait_all_async or File.wait_async when it is pending.
+        if self._status is None:
+            if self._file.indep_mode:
+                yield from self._file.wait_async(1, [self]).__await__()
+            else:
+                yield from self._file.wait_all_async(1, [self]).__await__()
+        return self.result()
+
+    def _complete(self, status, cancelled):
+        # Private method to record the completion or cancellation of the
+        # request with error code status, and release the buffer of a write
+        # request.
+        self._status = status
+        self._cancelled = cancelled
+        if not self._read or cancelled:
+            self._buffer = None
+        elif self._finish is not None:
+            if status == 0:
+                self._buffer = self._finish(self._buffer)
+            self._finish = None
@@ -11,14 +11,21 @@ cdef _strencode(pystr, encoding=*)
 cdef _set_att(file, int varid, name, value, nc_type xtype=*)
 cdef _get_att(file, int varid, name, encoding=*)
 cdef _get_att_names(int file_id, int varid)
+cdef dict _get_atts(file, int varid)
+cdef _cached_att(dict atts, name)
 cdef _nptonctype, _notcdf2dtypes, _nctonptype, _nptompitype, _supportedtypes, _supportedtypescdf2, default_fillvals, _private_atts
 cdef _tostr(s)
 cdef _safecast(a,b)
 cdef _StartCountStride(elem, shape, dimensions=*, file=*, datashape=*, put=*)
 cdef _out_array_shape(count)
+cdef _strided_buftype(data)
+cdef _noncontiguous_buffer(data, bufcount, buftype, bint put)
+cdef _conversion_buftype(data, vartype, bufcount, buftype)
+cdef _varn_array(rows, Py_ssize_t num, int ndims, name)
+cdef MPI_Offset **_row_pointers(ndarray rows) except NULL
 cdef _get_format(int ncid)
-cpdef chartostring(b,encoding=*)
-cpdef stringtochar(a,encoding=*)
+cpdef chartostring(src, encoding=*, copy=*)
+cpdef stringtochar(src, encoding=*, copy=*)
 cpdef strerror(err_code)
 cpdef strerrno(err_code)
 cpdef set_default_format(int new_format)
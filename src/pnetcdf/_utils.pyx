@@ -11,6 +11,8 @@ import numpy as np
 from numpy.lib.stride_tricks import as_strided
 from libc.stdlib cimport malloc, free
 from mpi4py import MPI
+from collections import OrderedDict
+import codecs
 
 
 """cdef MPI.Datatype MPI_CHAR, MPI_BYTE, MPI_UNSIGNED_CHAR, MPI_SHORT, MPI_UNSIGNED_SHORT, MPI_INT, \
@@ -167,7 +169,8 @@ NC_BP = NC_BP_C
 #Attributes that only exist at the python level (not in the netCDF file)
 _private_atts = \
 ['_ncid','_varid','dimensions','variables', 'file_format',
- '_nunlimdim','path', 'name', '__orthogonal_indexing__', '_buffer']
+ '_nunlimdim','path', 'name', '__orthogonal_indexing__', '_buffer', 'profiler',
+ 'buff_manager', 'block_cache']
 # internal methods that call PnetCDF-C functions.
 cdef _strencode(pystr,encoding=""):
     # encode a string into bytes.  If already bytes, do nothing.
@@ -315,6 +318,31 @@ cdef _get_att_names(int file_id, int varid):
         attslist.append(namstring.decode('utf-8'))
     return attslist
 
+cdef dict _get_atts(file, int varid):
+    # Private method to get all the attributes of a variable, or the global
+    # attributes, in a dict in the order of the file. The error raised for an
+    # attribute of unsupported datatype is kept in place of its value.
+    atts = {}
+    for name in _get_att_names(file._ncid, varid):
+        try:
+            atts[name] = _get_att(file, varid, name)
+        except KeyError as err:
+            atts[name] = err
+    return atts
+
+cdef _cached_att(dict atts, name):
+    # Private method to get an attribute value from a dict filled by
+    # _get_atts. Arrays are copied, so that the cached values are not
+    # modified by the caller.
+    value = atts.get(name)
+    if value is None:
+        _check_err(NC_ENOTATT, err_cls=AttributeError)
+    if isinstance(value, KeyError):
+        raise value
+    if isinstance(value, ndarray):
+        return value.copy()
+    return value
+
 cdef _tostr(s):
     try:
         ss = str(s)
@@ -335,9 +363,9 @@ cdef _safecast(a,b):
             is_safe = False
     return is_safe
 
-cpdef chartostring(src, encoding='utf-8'):
+cpdef chartostring(src, encoding='utf-8', copy=True):
     """
-    chartostring(src, encoding='utf-8')
+    chartostring(src, encoding='utf-8', copy=True)
 
     Convert a character array to a string array with one less dimension.
 
@@ -351,6 +379,13 @@ cpdef chartostring(src, encoding='utf-8'):
         `encoding` is 'none' or 'bytes', a `np.string_` btye array is returned.
     :type encoding: str
 
+    :param copy: [Optional]
+        If ``False`` and no decoding is needed, i.e. `encoding` is 'none' or
+        'bytes' or `src` is a `'U1'` array, the returned array is a view of
+        `src` when `src` is C-contiguous, without any copy. Default is
+        ``True``.
+    :type copy: bool
+
     :return: A numpy string array with datatype `'UN'` (or `'SN'`) and shape
         `src.shape[:-1]` where where `N=src.shape[-1]`.
 
@@ -360,21 +395,31 @@ cpdef chartostring(src, encoding='utf-8'):
     dtype = src.dtype.kind
     if dtype not in ["S","U"]:
         raise ValueError("type must be string or unicode ('S' or 'U')")
-    if encoding in ['none','None','bytes']:
-        src_str = src.tobytes()
-    else:
-        src_str = src.tobytes().decode(encoding)
     slen = int(src.shape[-1])
-    if encoding in ['none','None','bytes']:
-        out_str = np.array([src_str[n1:n1+slen] for n1 in range(0,len(src_str),slen)],'S'+repr(slen))
-    else:
-        out_str = np.array([src_str[n1:n1+slen] for n1 in range(0,len(src_str),slen)],'U'+repr(slen))
-    out_str.shape = src.shape[:-1]
-    return out_str
-
-cpdef stringtochar(src, encoding='utf-8'):
+    shape = src.shape[:-1]
+    if slen == 0:
+        return np.zeros(shape, 'S1' if dtype == 'S' and encoding in _raw_encodings else 'U1')
+    contig = np.ascontiguousarray(src)
+    # the bytes, or characters, of each string are adjacent in memory
+    if dtype == 'U' or encoding in _raw_encodings:
+        out = contig.view(dtype + repr(slen)).reshape(shape)
+        if copy and np.may_share_memory(out, src):
+            out = out.copy()
+        return out
+    chars = contig.view(np.uint8).reshape(-1, slen)
+    if _ascii_compatible(encoding, chars):
+        # each byte is a character, widened into the output array
+        # widened through a 1-d array, as a 0-d one cannot change itemsize
+        out = np.empty(chars.shape[0], 'U' + repr(slen))
+        out.view(np.uint32).reshape(-1, slen)[...] = chars
+        return out.reshape(shape)
+    # decode each string on its own, as multibyte characters
+    out = np.char.decode(contig.view('S' + repr(slen)).reshape(shape), encoding)
+    return out.astype('U' + repr(slen), copy=False)
+
+cpdef stringtochar(src, encoding='utf-8', copy=True):
     """
-    stringtochar(src, encoding='utf-8')
+    stringtochar(src, encoding='utf-8', copy=True)
 
     Convert a string array to a character array with one extra dimension.
 
@@ -390,20 +435,57 @@ cpdef stringtochar(src, encoding='utf-8'):
         treated a raw byte strings (`numpy.string_`).
     :type encoding: str
 
+    :param copy: [Optional]
+        If ``False`` and no encoding is needed, i.e. `src` is a `'SN'` array
+        or `encoding` is 'none' or 'bytes', the returned array is a view of
+        `src` when `src` is C-contiguous, without any copy. Default is
+        ``True``.
+    :type copy: bool
+
     :return: A numpy character array with datatype `'S1'` or `'U1'` and shape
-        `src.shape + (N,)`, where N is the length of each string in src.
+        `src.shape + (N,)`, where N is the length of each string in src. A
+        `'UN'` array is encoded into a `'S1'` array, whose last dimension is
+        the largest number of bytes of the encoded strings when they have
+        multibyte characters.
 
     :rtype: ``numpy.ndarray``
     """
     dtype = src.dtype.kind
     if dtype not in ["S","U"]:
         raise ValueError("type must string or unicode ('S' or 'U')")
-    if encoding in ['none','None','bytes']:
-        out_array = np.array(tuple(src.tobytes()),'S1')
-    else:
-        out_array = np.array(tuple(src.tobytes().decode(encoding)),dtype+'1')
-    out_array.shape = src.shape + (src.itemsize,)
-    return out_array
+    src = np.asarray(src)
+    contig = np.ascontiguousarray(src)
+    if dtype == 'S' or encoding in _raw_encodings:
+        out = contig.view('S1').reshape(src.shape + (src.itemsize,))
+        if copy and np.may_share_memory(out, src):
+            out = out.copy()
+        return out
+    slen = src.itemsize // 4
+    chars = contig.view(np.uint32).reshape(-1, slen)
+    if slen and _ascii_compatible(encoding, chars):
+        # each character is a byte, narrowed into the output array
+        out = np.empty(src.shape + (slen,), 'S1')
+        out.view(np.uint8).reshape(-1, slen)[...] = chars
+        return out
+    # encode each string on its own, into multibyte characters
+    out = np.char.encode(contig, encoding)
+    return out.view('S1').reshape(src.shape + (out.itemsize,))
+
+# encodings for which the characters are the raw bytes
+_raw_encodings = ('none', 'None', 'bytes')
+
+cdef _ascii_compatible(encoding, chars):
+    # Private function to tell if the character codes chars, an integer
+    # array, are converted one to one into bytes by encoding.
+    try:
+        name = codecs.lookup(encoding).name
+    except LookupError:
+        return False
+    if name == 'iso8859-1':
+        return chars.size == 0 or int(chars.max()) < 256
+    if name in ('ascii', 'utf-8'):
+        return chars.size == 0 or int(chars.max()) < 128
+    return False
 
 cdef _StartCountStride(elem, shape, dimensions=None, file=None, datashape=None, put=False):
     """Return start, count, stride and indices needed to store/extract data
@@ -760,6 +842,109 @@ cdef _out_array_shape(count):
             out.append(n)
     return out
 
+# MPI derived datatypes describing the memory layout of non-contiguous
+# arrays, keyed by shape, strides and dtype, with least recently used ones
+# freed first.
+_buftype_cache = OrderedDict()
+_BUFTYPE_CACHE_SIZE = 64
+
+cdef _elem_mpitype(key):
+    # Private function to return the predefined MPI datatype of the elements
+    # of numpy type key, e.g. 'i4', with which PnetCDF converts them to the
+    # type of the variable. MPI.BYTE would be taken as raw bytes, not as
+    # signed integers.
+    return MPI.SIGNED_CHAR if key == 'i1' else _nptompitype[key]
+
+cdef _strided_buftype(data):
+    # Private function to return a committed MPI derived datatype that
+    # describes the elements of a non-contiguous array in C order, relative to
+    # its data pointer, or None if data has no such description.
+    key = (data.shape, data.strides, data.dtype.str)
+    buftype = _buftype_cache.get(key)
+    if buftype is not None:
+        _buftype_cache.move_to_end(key)
+        return buftype
+    if not data.dtype.isnative or data.dtype.str[1:] not in _nptompitype:
+        return None
+    basetype = _elem_mpitype(data.dtype.str[1:])
+    buftype = basetype
+    # nest one hvector per axis, from the fastest varying one; the strides of
+    # axes of length 1 play no role.
+    for n, st in zip(reversed(data.shape), reversed(data.strides)):
+        if n == 1:
+            continue
+        vectype = buftype.Create_hvector(n, 1, st)
+        if buftype is not basetype:
+            buftype.Free()
+        buftype = vectype
+    if buftype is basetype:
+        return None
+    buftype.Commit()
+    _buftype_cache[key] = buftype
+    if len(_buftype_cache) > _BUFTYPE_CACHE_SIZE:
+        _, oldtype = _buftype_cache.popitem(last=False)
+        oldtype.Free()
+    return buftype
+
+cdef _noncontiguous_buffer(data, bufcount, buftype, bint put):
+    # Private function to pass a non-contiguous array, or an array to write
+    # in non-native byte order, to a flexible API method. Unless buftype is
+    # given, data is used in place, described by a derived datatype built
+    # from its strides, or converted to native byte order by a single copy
+    # for a write. Otherwise, data is copied for a write, and read into as
+    # is. Returns data, bufcount and buftype.
+    if buftype is None:
+        if put and not data.dtype.isnative:
+            return np.ascontiguousarray(data, dtype=data.dtype.newbyteorder('=')), bufcount, buftype
+        # a read buffer must not have overlapping elements
+        if put or all(st != 0 or n == 1 for n, st in zip(data.shape, data.strides)):
+            strided = _strided_buftype(data)
+            if strided is not None:
+                return data, 1, strided
+        if not put:
+            raise ValueError("read buffer of shape %s and strides %s cannot be described by an MPI datatype" % \
+                             (data.shape, data.strides))
+    if put and not data.flags.c_contiguous:
+        data = data.copy()
+    return data, bufcount, buftype
+
+cdef _conversion_buftype(data, vartype, bufcount, buftype):
+    # Private function to let PnetCDF convert the elements of data between
+    # their type and vartype, the type of the variable, without a temporary
+    # array. Unless buftype is given or no conversion is needed, returns the
+    # number of elements of data and their predefined MPI datatype. Returns
+    # bufcount and buftype otherwise, as for NC_CHAR, which is not converted.
+    dtype = data.dtype
+    if buftype is not None or dtype == vartype or not dtype.isnative:
+        return bufcount, buftype
+    key = dtype.str[1:]
+    if key not in _nptompitype or key == 'S1' or vartype.str[1:] == 'S1':
+        return bufcount, buftype
+    return data.size, _elem_mpitype(key)
+
+cdef _varn_array(rows, Py_ssize_t num, int ndims, name):
+    # Private function to return the starts or counts argument of a varn
+    # method as a C-contiguous int64 (MPI_Offset) array with one row per
+    # subarray, which is the argument itself when it is such an array already.
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    if rows.ndim != 2 or rows.shape[0] < num or rows.shape[1] != ndims:
+        raise ValueError("%s must have at least %d rows of %d values, got shape %s" % \
+                         (name, num, ndims, rows.shape))
+    return rows
+
+cdef MPI_Offset **_row_pointers(ndarray rows) except NULL:
+    # Private function to return the array of pointers to the rows of an
+    # array returned by _varn_array, as expected by the varn functions of
+    # PnetCDF. The caller frees it and keeps rows alive meanwhile.
+    cdef Py_ssize_t i, nrows = rows.shape[0], ncols = rows.shape[1]
+    cdef MPI_Offset *base = <MPI_Offset *>PyArray_DATA(rows)
+    cdef MPI_Offset **ptrs = <MPI_Offset **>malloc(sizeof(MPI_Offset *) * max(nrows, 1))
+    if ptrs == NULL:
+        raise MemoryError()
+    for i in range(nrows):
+        ptrs[i] = base + i * ncols
+    return ptrs
+
 cdef broadcasted_shape(shp1, shp2):
     # determine shape of array of shp1 and shp2 broadcast against one another.
     x = np.array([1])
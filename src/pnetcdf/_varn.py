@@ -0,0 +1,219 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+# Normalization of the subarrays of the varn methods of Variable: sorting in
+# file order and merging of runs along the fastest varying dimension.
+
+import numpy as np
+
+__all__ = ['VarnPlan']
+
+
+class VarnPlan:
+    """
+    VarnPlan(num, starts, counts=None)
+
+    The normalized form of the `num` subarrays given by `starts` and `counts`
+    to the varn methods of :class:`pnetcdf.Variable`, such as
+    :meth:`Variable.put_varn_all`. The subarrays are sorted by their
+    position in the file, and the subarrays that cover the same indices
+    along all dimensions but the last one, and are adjacent or overlap along
+    the last one, are merged into a single subarray. Subarrays with no
+    element are dropped.
+
+    The plan also holds the permutation of the elements between the user
+    buffer, in which the subarrays are stored one after another as given,
+    and the buffer of the merged subarrays. It is computed at the first
+    write or read and kept, so a plan built once can be passed as the
+    `normalize` argument of the varn methods for all the calls made with the
+    same subarrays. As for the varn methods of PnetCDF, the values written to
+    the elements covered by several subarrays are undefined.
+
+    :param int num: Number of subarrays.
+
+    :param starts: Starting indices of the subarrays, an array of shape
+        (`num`, number of dimensions of the variable).
+    :type starts: numpy.ndarray
+
+    :param counts: [Optional] Lengths of the subarrays along each dimension,
+        of the same shape as `starts`. Default is 1 for all.
+    :type counts: numpy.ndarray
+
+    :Example:
+
+     ::
+
+       plan = pnetcdf.VarnPlan(num, starts, counts)
+       print("merged %d of %d subarrays" % (plan.nmerged, plan.nsegs))
+       for step in range(nsteps):
+           v.put_varn_all(buf[step], num, starts, counts, normalize = plan)
+    """
+    def __init__(self, num, starts, counts=None):
+        starts = np.asarray(starts, dtype=np.int64)
+        if starts.ndim != 2 or len(starts) < num:
+            raise ValueError("starts must have at least %d rows, got shape %s" % (num, starts.shape))
+        starts = starts[:num]
+        if counts is None:
+            counts = np.ones_like(starts)
+        else:
+            counts = np.asarray(counts, dtype=np.int64)
+            if counts.ndim != 2 or len(counts) < num or counts.shape[1] != starts.shape[1]:
+                raise ValueError("counts must be of shape %s, got %s" % (starts.shape, counts.shape))
+            counts = counts[:num]
+        ndims = starts.shape[1]
+        sizes = counts.prod(axis=1)
+        self.nsegs = num
+        self.nelems = int(sizes.sum())
+        # offsets of the subarrays in the user buffer
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+
+        keep = np.flatnonzero(sizes > 0)
+        if ndims == 0 or len(keep) == 0:
+            order = keep
+            run_break = np.ones(len(keep), dtype=bool)
+            overlap = False
+        else:
+            # sort by the starts and counts of the leading dimensions, then
+            # by the start along the last one
+            keys = [starts[keep, -1]]
+            keys += [counts[keep, d] for d in reversed(range(ndims - 1))]
+            keys += [starts[keep, d] for d in reversed(range(ndims - 1))]
+            order = keep[np.lexsort(keys)]
+            run_break, overlap = _runs(starts[order], counts[order])
+        s = starts[order]
+        c = counts[order]
+        heads = np.flatnonzero(run_break)
+        ends = s[:, -1] + c[:, -1] if ndims else np.zeros(len(s), np.int64)
+
+        self.num = len(heads)
+        self.nmerged = num - self.num
+        self.starts = np.ascontiguousarray(s[heads])
+        self.counts = np.ascontiguousarray(c[heads])
+        if ndims and self.num:
+            self.counts[:, -1] = np.maximum.reduceat(ends, heads) - self.starts[:, -1]
+        run_sizes = self.counts.prod(axis=1)
+        self.size = int(run_sizes.sum())
+
+        # what is needed to compute the permutation of the elements
+        self._layout = (order, s, c, run_break, run_sizes, offsets, overlap)
+        self._put_index = None
+        self._get_index = None
+
+    def __repr__(self):
+        return "<%s: %d subarrays merged into %d, %d elements>" % \
+               (type(self).__name__, self.nsegs, self.num, self.nelems)
+
+    def gather(self, data):
+        """
+        gather(self, data)
+
+        Return the buffer of the merged subarrays for a write.
+
+        :param data: The user buffer, with the elements of the `num`
+            subarrays one after another, in the order given.
+        :type data: numpy.ndarray
+
+        :return: A new, contiguous array of `size` elements.
+        :rtype: numpy.ndarray
+        """
+        data = np.asarray(data).reshape(-1)
+        if data.size != self.nelems:
+            raise ValueError("data has %d elements, the subarrays %d" % (data.size, self.nelems))
+        if self._put_index is None:
+            self._put_index = self._index(True)
+        return data[self._put_index]
+
+    def scatter(self, buff, out):
+        """
+        scatter(self, buff, out)
+
+        Copy the buffer of the merged subarrays of a read into the user
+        buffer.
+
+        :param buff: The buffer of the merged subarrays, of `size` elements.
+        :type buff: numpy.ndarray
+
+        :param out: The user buffer, with room for the elements of the `num`
+            subarrays one after another, in the order given.
+        :type out: numpy.ndarray
+        """
+        if out.size != self.nelems:
+            raise ValueError("out has %d elements, the subarrays %d" % (out.size, self.nelems))
+        if self._get_index is None:
+            self._get_index = self._index(False)
+        if out.flags.c_contiguous:
+            out.reshape(-1)[...] = buff[self._get_index]
+        else:
+            out[...] = buff[self._get_index].reshape(out.shape)
+
+    def _index(self, put):
+        # Private method to compute the position of each element of the
+        # merged subarrays in the user buffer if put, or of each element of
+        # the user buffer in the merged subarrays otherwise.
+        order, s, c, run_break, run_sizes, offsets, overlap = self._layout
+        nsegs = len(s)
+        run = np.cumsum(run_break) - 1
+        run_base = np.concatenate(([0], np.cumsum(run_sizes)[:-1])).astype(np.int64)
+        if s.shape[1]:
+            inner = c[:, -1]
+            outer = c[:, :-1].prod(axis=1)
+            length = self.counts[run, -1]
+            shift = s[:, -1] - self.starts[run, -1]
+        else:
+            inner = np.ones(nsegs, np.int64)
+            outer = np.ones(nsegs, np.int64)
+            length = inner
+            shift = np.zeros(nsegs, np.int64)
+        # one chunk per row of a subarray along its last dimension
+        seg = np.repeat(np.arange(nsegs), outer)
+        row = np.arange(len(seg)) - np.repeat(np.cumsum(outer) - outer, outer)
+        dst = run_base[run][seg] + row * length[seg] + shift[seg]
+        src = offsets[order][seg] + row * inner[seg]
+        # one element per position in a chunk
+        clen = inner[seg]
+        pos = np.arange(int(clen.sum())) - np.repeat(np.cumsum(clen) - clen, clen)
+        dst = np.repeat(dst, clen) + pos
+        src = np.repeat(src, clen) + pos
+        if not put:
+            index = np.empty(self.nelems, np.int64)
+            index[src] = dst
+            return index
+        index = np.empty(self.size, np.int64)
+        if overlap:
+            # one of the values of an element covered by several subarrays
+            # of a run, that of the subarray given last
+            rank = np.repeat(order[seg], clen)
+            last = np.lexsort((rank, dst))
+            dst, src = dst[last], src[last]
+            sel = np.append(dst[1:] != dst[:-1], True)
+            dst, src = dst[sel], src[sel]
+        index[dst] = src
+        return index
+
+
+def _runs(s, c):
+    # Private function to find the runs of sorted subarrays, given by the rows
+    # of s and c, that merge into one. Returns a boolean array marking the
+    # first subarray of each run, and whether subarrays overlap.
+    n = len(s)
+    group = np.ones(n, dtype=bool)
+    group[1:] = (s[1:, :-1] != s[:-1, :-1]).any(axis=1) | (c[1:, :-1] != c[:-1, :-1]).any(axis=1)
+    ends = s[:, -1] + c[:, -1]
+    # largest end so far in the group, using that groups are in increasing
+    # order when shifted by a multiple of a bound of the ends
+    gid = np.cumsum(group) - 1
+    bound = int(ends.max()) + 1
+    if bound * (int(gid[-1]) + 1) < 2 ** 62:
+        shift = gid * bound
+        reach = np.maximum.accumulate(ends + shift) - shift
+    else:
+        reach = ends.copy()
+        for i in range(1, n):
+            if not group[i]:
+                reach[i] = max(reach[i], reach[i - 1])
+    run_break = group.copy()
+    run_break[1:] |= s[1:, -1] > reach[:-1]
+    overlap = bool((~run_break[1:] & (s[1:, -1] < reach[:-1])).any())
+    return run_break, overlap
@@ -0,0 +1,153 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the attributes cached by File and Variable instances:
+   the attrs snapshot dictionaries, and the cached values kept up to date by
+   put_att, del_att, rename_att, def_fill, redef and enddef.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_atts_cache.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_atts_cache.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+SEQATT = np.arange(10, dtype=np.int32)
+STRLEN = 8
+words = ['alpha', 'beta', 'gamma', 'delta']
+
+
+class AttsCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.title = 'attribute cache'
+        f.version = np.int32(3)
+        f.def_dim('x', size * len(words))
+        f.def_dim('n', STRLEN)
+        v = f.def_var('var', pnetcdf.NC_DOUBLE, ('x',))
+        v.units = 'm'
+        v.seqatt = SEQATT
+        v.factor = 0.5
+        s = f.def_var('str', pnetcdf.NC_CHAR, ('x', 'n'))
+        s._Encoding = 'ascii'
+        f.enddef()
+        v[:] = np.arange(size * len(words), dtype=np.float64)
+        s[:] = np.array(words * size, dtype='S%d' % STRLEN)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing attributes cached by File and Variable instances"""
+        f = pnetcdf.File(self.file_path, 'a')
+        v = f.variables['var']
+        s = f.variables['str']
+
+        # snapshots, in the order of the file
+        atts = f.attrs
+        self.assertEqual(list(atts), ['title', 'version'])
+        self.assertEqual(atts['title'], 'attribute cache')
+        self.assertEqual(atts['version'], 3)
+        self.assertEqual(f.__dict__, atts)
+        atts = v.attrs
+        self.assertEqual(list(atts), ['units', 'seqatt', 'factor'])
+        self.assertEqual(v.ncattrs(), ['units', 'seqatt', 'factor'])
+        assert_array_equal(atts['seqatt'], SEQATT)
+
+        # values returned are copies of the cached ones
+        atts['seqatt'][0] = -1
+        seqatt = v.seqatt
+        seqatt[1] = -1
+        assert_array_equal(v.seqatt, SEQATT)
+        assert_array_equal(v.get_att('seqatt'), SEQATT)
+        with self.assertRaises(AttributeError):
+            v.missing_att
+        with self.assertRaises(AttributeError):
+            f.get_att('missing_att')
+
+        # the indexer uses the cached _Encoding
+        self.assertEqual(s[rank * len(words):(rank + 1) * len(words)].tolist(), words)
+        self.assertEqual(s.get_att('_Encoding', encoding='ascii'), 'ascii')
+
+        # changes of the attributes
+        atts = v.attrs
+        f.redef()
+        v.put_att('long_name', 'a variable')
+        v.units = 'km'
+        self.assertEqual(v.ncattrs(), ['units', 'seqatt', 'factor', 'long_name'])
+        self.assertEqual(v.units, 'km')
+        self.assertEqual(v.long_name, 'a variable')
+        self.assertEqual(atts['units'], 'm')
+        self.assertNotIn('long_name', atts)
+        v.rename_att('long_name', 'desc')
+        self.assertEqual(v.ncattrs(), ['units', 'seqatt', 'factor', 'desc'])
+        self.assertEqual(v.desc, 'a variable')
+        with self.assertRaises(AttributeError):
+            v.long_name
+        del v.desc
+        self.assertEqual(v.ncattrs(), ['units', 'seqatt', 'factor'])
+        with self.assertRaises(AttributeError):
+            v.desc
+        v.def_fill(0, fill_value = np.float64(-1))
+        self.assertEqual(v._FillValue, -1)
+        f.rename_att('version', 'revision')
+        f.history = 'cached'
+        self.assertEqual(f.ncattrs(), ['title', 'revision', 'history'])
+        self.assertEqual(f.revision, 3)
+        f.enddef()
+        self.assertEqual(v.units, 'km')
+        self.assertEqual(f.history, 'cached')
+        f.close()
+
+        # the changes are in the file
+        f = pnetcdf.File(self.file_path, 'r')
+        v = f.variables['var']
+        self.assertEqual(v.ncattrs(), ['units', 'seqatt', 'factor', '_FillValue'])
+        self.assertEqual(v.attrs['units'], 'km')
+        self.assertEqual(f.attrs, {'title': 'attribute cache', 'revision': 3, 'history': 'cached'})
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(AttsCacheTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
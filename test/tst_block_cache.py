@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the block cache of a file, which serves the reads made
+   with the indexer in independent data mode from blocks of records read
+   whole, reads ahead the blocks of sequential reads and drops the blocks of
+   a variable written by the process.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_block_cache.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_block_cache.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+nrecs = 64; ydim = 8; xdim = 8
+data = np.arange(nrecs * ydim * xdim, dtype=np.int32).reshape(nrecs, ydim, xdim)
+# blocks of 16 records of 256 bytes
+cache_size = 64 * 1024
+
+
+class BlockCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('t', -1)
+        f.def_dim('y', ydim)
+        f.def_dim('x', xdim)
+        v = f.def_var('images', pnetcdf.NC_INT, ('t', 'y', 'x'))
+        w = f.def_var('labels', pnetcdf.NC_INT, ('t',))
+        f.enddef()
+        v.put_var_all(data, start = [0, 0, 0], count = [nrecs, ydim, xdim])
+        w.put_var_all(np.arange(nrecs, dtype=np.int32), start = [0], count = [nrecs])
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing the block cache of independent reads"""
+        f = pnetcdf.File(self.file_path, 'r', block_cache = cache_size)
+        cache = f.block_cache
+        self.assertIsInstance(cache, pnetcdf.BlockCache)
+        v = f.variables['images']
+        # collective reads do not use the cache
+        assert_array_equal(v[3], data[3])
+        self.assertEqual(cache.stats()['misses'], 0)
+
+        f.begin_indep()
+        # sequential reads, the blocks that follow are read ahead
+        for rec in range(nrecs):
+            assert_array_equal(v[rec, 2:5, 1], data[rec, 2:5, 1])
+        stats = cache.stats()
+        self.assertEqual(stats['hits'] + stats['misses'], nrecs)
+        self.assertTrue(stats['readahead'] > 0)
+        self.assertTrue(stats['misses'] < nrecs // 16)
+        # random reads are served from the cache
+        for rec in np.random.default_rng(rank).integers(0, nrecs - 3, 50):
+            assert_array_equal(v[rec], data[rec])
+            assert_array_equal(v[rec:rec + 3, :, 4], data[rec:rec + 3, :, 4])
+        self.assertEqual(cache.stats()['misses'], stats['misses'])
+        self.assertTrue(cache.stats()['nbytes'] <= cache_size)
+        f.end_indep()
+        f.close()
+
+        # writes of the process drop the blocks of the variable
+        f = pnetcdf.File(self.file_path, 'a', block_cache = True)
+        v = f.variables['images']
+        f.begin_indep()
+        rec = rank % nrecs
+        assert_array_equal(v[rec], data[rec])
+        v[rec] = -data[rec]
+        assert_array_equal(v[rec], -data[rec])
+        req = v.iput_var(data[rec], start = [rec, 0, 0], count = [1, ydim, xdim])
+        f.wait(1, [req])
+        assert_array_equal(v[rec], data[rec])
+        # the variable is not cached until its pending write is completed,
+        # even by waits on other requests
+        req = v.iput_var(-data[rec], start = [rec, 0, 0], count = [1, ydim, xdim])
+        self.assertEqual(f.variables['labels'][rec], rec)
+        v[rec]
+        f.wait_all()
+        assert_array_equal(v[rec], -data[rec])
+        f.end_indep()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(BlockCacheTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
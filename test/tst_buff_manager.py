@@ -0,0 +1,127 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests buffered nonblocking writes with a buffer managed by
+   pnetcdf.BufferManager: the buffer is sized from the first writes, writes
+   that do not fit are flushed in independent data mode or posted from a copy
+   in collective data mode, and the buffer grows to the high-water mark.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_buff_manager.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_buff_manager.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 4; ydim = 10
+num_vars = 6
+nsteps = 3
+
+
+class BuffManagerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('t', -1)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        for i in range(num_vars):
+            f.def_var('var_%d' % i, pnetcdf.NC_INT, ('t', 'x', 'y'))
+        f.enddef()
+
+        # the buffer is sized by the first two writes, the others overflow
+        mgr = f.attach_buff(nsample = 2)
+        self.assertIs(f.buff_manager, mgr)
+        count = [1, xdim, ydim]
+        buf = np.empty((xdim, ydim), dtype=np.int32)
+        for step in range(nsteps):
+            for i in range(num_vars):
+                buf[:] = step * 10 + i
+                f.variables['var_%d' % i].bput_var(buf, start = [step, rank * xdim, 0], count = count)
+                # the data is copied, even for overflows
+                buf[:] = -1
+            f.wait_all()
+        stats = mgr.stats()
+        nbytes = xdim * ydim * 4
+        self.assertEqual(stats['calls'], nsteps * num_vars)
+        self.assertEqual(stats['high_water'], num_vars * nbytes)
+        self.assertEqual(stats['bufsize'], num_vars * nbytes)
+        self.assertTrue(stats['overflows'] > 0)
+        self.assertEqual(stats['grows'], 1)
+        f.detach_buff()
+        self.assertIsNone(f.buff_manager)
+
+        # a fixed buffer of one write, flushed in independent data mode
+        mgr = f.attach_buff(nbytes, policy = 'fixed')
+        f.begin_indep()
+        reqs = []
+        for i in range(num_vars):
+            buf[:] = 100 + i
+            reqs.append(f.variables['var_%d' % i].bput_var(buf, start = [nsteps, rank * xdim, 0], count = count))
+        # the requests completed by the flushes are skipped
+        f.wait(num_vars, reqs)
+        f.end_indep()
+        stats = mgr.stats()
+        self.assertEqual(stats['bufsize'], nbytes)
+        self.assertEqual(stats['flushes'], num_vars - 1)
+        self.assertEqual(stats['overflows'], 0)
+        self.assertTrue(0 < stats['usage_high_water'] <= nbytes)
+        f.detach_buff()
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing bput with a managed attached buffer"""
+        f = pnetcdf.File(self.file_path, 'r')
+        for i in range(num_vars):
+            v = f.variables['var_%d' % i]
+            self.assertEqual(v.shape[0], nsteps + 1)
+            for step in range(nsteps):
+                assert_array_equal(v[step], step * 10 + i)
+            assert_array_equal(v[nsteps], 100 + i)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(BuffManagerTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests opening a file with lazy=True, in which case
+   `File.dimensions` and `File.variables` create `Dimension` and `Variable`
+   instances on first access. The mappings must behave as the dictionaries
+   of a file opened without lazy, including after defining and renaming
+   dimensions and variables.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_file_lazy.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_file_lazy.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+nvars = 20; xdim = 5
+
+
+class FileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        dim_t = f.def_dim('t', -1)
+        dim_x = f.def_dim('x', xdim)
+        for i in range(nvars):
+            f.def_var('var_%d' % i, pnetcdf.NC_INT, (dim_t, dim_x))
+        f.enddef()
+        for i in range(nvars):
+            f.variables['var_%d' % i][0:2, :] = np.full((2, xdim), i, dtype=np.int32)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing lazy dimensions and variables"""
+        f = pnetcdf.File(self.file_path, mode='r', comm=comm, lazy=True)
+        self.assertEqual(len(f.dimensions), 2)
+        self.assertEqual(list(f.dimensions), ['t', 'x'])
+        self.assertEqual(len(f.variables), nvars)
+        self.assertEqual(list(f.variables), ['var_%d' % i for i in range(nvars)])
+        self.assertTrue('var_3' in f.variables)
+        self.assertFalse('var_x' in f.variables)
+        with self.assertRaises(KeyError):
+            f.variables['var_x']
+
+        # instances are created once and cached
+        v = f.variables['var_7']
+        self.assertIs(f.variables['var_7'], v)
+        self.assertEqual(v.shape, (2, xdim))
+        self.assertEqual(v.dimensions, ('t', 'x'))
+        self.assertIs(v.get_dims()[0], f.dimensions['t'])
+        self.assertTrue(f.dimensions['t'].isunlimited())
+        self.assertIs(f.inq_unlimdim(), f.dimensions['t'])
+        assert_array_equal(v[:], np.full((2, xdim), 7, dtype=np.int32))
+        f.close()
+
+        # define and rename in a file opened with lazy=True
+        f = pnetcdf.File(self.file_path, mode='a', comm=comm, lazy=True)
+        v = f.variables['var_1']
+        f.redef()
+        dim_y = f.def_dim('y', 3)
+        w = f.def_var('new', pnetcdf.NC_INT, ('t', 'y'))
+        f.enddef()
+        self.assertEqual(len(f.variables), nvars + 1)
+        self.assertIs(f.variables['new'], w)
+        self.assertEqual(w.shape, (2, 3))
+        f.rename_var('var_1', 'one')
+        f.rename_var('var_2', 'two')
+        f.rename_dim('x', 'z')
+        self.assertFalse('var_1' in f.variables)
+        self.assertIs(f.variables['one'], v)
+        self.assertEqual(f.variables['two'].name, 'two')
+        self.assertEqual(v.dimensions, ('t', 'z'))
+        self.assertEqual(f.variables['var_9'].dimensions, ('t', 'z'))
+        f.close()
+
+        # the same file opened without lazy has the same contents
+        f = pnetcdf.File(self.file_path, mode='r', comm=comm)
+        g = pnetcdf.File(self.file_path, mode='r', comm=comm, lazy=True)
+        self.assertEqual(list(f.variables), list(g.variables))
+        self.assertEqual(list(f.dimensions), list(g.dimensions))
+        for name in f.variables:
+            self.assertEqual(f.variables[name].shape, g.variables[name].shape)
+        g.close()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(FileTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,137 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests File.put_many and File.get_many, which write and read
+   several variables with a single completion of nonblocking requests, in
+   collective and independent data modes.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_file_many.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_file_many.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+NVARS = 6
+NSTEPS = 3
+NX = 4
+names = ['var%d' % i for i in range(NVARS)]
+
+
+def step_data(name, step):
+    # data written by this process to variable name at time step
+    i = names.index(name)
+    return (np.arange(NX, dtype=np.int32) + 1000 * i + 100 * step + 10 * rank).reshape(1, NX)
+
+
+class FileManyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('time', -1)
+        f.def_dim('x', NX * size)
+        f.def_dim('three', 3)
+        for name in names:
+            f.def_var(name, pnetcdf.NC_INT, ('time', 'x'))
+        f.def_var('fixed', pnetcdf.NC_DOUBLE, ('x',))
+        f.def_var('strided', pnetcdf.NC_INT, ('x',))
+        f.def_var('triple', pnetcdf.NC_DOUBLE, ('three',))
+        f.enddef()
+        # one time step of all record variables per call, by name or
+        # instance
+        for step in range(NSTEPS):
+            f.put_many({name if step % 2 else f.variables[name]:
+                        (step_data(name, step), [step, rank * NX], [1, NX])
+                        for name in names})
+        # the entire variable, written by rank 0 only, and a strided write
+        acc = {'strided': (np.full(NX // 2, rank, np.int32), [rank * NX], [NX // 2], [2])}
+        if rank == 0:
+            acc['fixed'] = np.arange(NX * size, dtype=np.float64)
+        f.put_many(acc)
+        # a tuple holds the arguments, so tuple data must be wrapped
+        with self.assertRaises(TypeError):
+            f.put_many({'triple': (1.0, 2.0, 3.0)})
+        self.assertEqual(f.inq_nreqs(), 0)
+        f.put_many({'triple': ((1.0, 2.0, 3.0),)} if rank == 0 else {})
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing writes and reads of several variables at once"""
+        f = pnetcdf.File(self.file_path, 'r')
+        for step in range(NSTEPS):
+            data = f.get_many({name: ([step, rank * NX], [1, NX]) for name in names})
+            self.assertEqual(sorted(data), sorted(names))
+            for name in names:
+                assert_array_equal(data[name], step_data(name, step))
+
+        v = f.variables['strided']
+        data = f.get_many({'fixed': None, v: ([rank * NX], [NX // 2], [2]), 'var1': ([1, rank * NX],)})
+        assert_array_equal(data['fixed'], np.arange(NX * size, dtype=np.float64))
+        assert_array_equal(data[v], np.full(NX // 2, rank, np.int32))
+        self.assertEqual(data['var1'].shape, ())
+        self.assertEqual(data['var1'], step_data('var1', 1)[0, 0])
+        assert_array_equal(f.get_many({'triple': None})['triple'], [1.0, 2.0, 3.0])
+
+        # processes with nothing to read still take part
+        data = f.get_many({'var0': None} if rank == 0 else {})
+        if rank == 0:
+            self.assertEqual(data['var0'].shape, (NSTEPS, NX * size))
+        else:
+            self.assertEqual(data, {})
+
+        # independent data mode
+        f.begin_indep()
+        data = f.get_many({name: ([NSTEPS - 1, rank * NX], [1, NX]) for name in names[:2]})
+        for name in names[:2]:
+            assert_array_equal(data[name], step_data(name, NSTEPS - 1))
+        with self.assertRaises(ValueError):
+            f.get_many({'var0': ([0, 0], [1, 1], [1, 1], [1, 1])})
+        self.assertEqual(f.inq_nreqs(), 0)
+        f.end_indep()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(FileManyTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
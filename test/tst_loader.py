@@ -0,0 +1,149 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the data loading classes `VariableDataset` and
+   `DistributedBatchSampler`. Batches of samples are read from a variable of
+   samples and a variable of labels, with and without prefetching, and the
+   samples assigned to all processes by the sampler must cover the dataset.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_loader.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_loader.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+nsamples = 7 * size + 3; ydim = 4; xdim = 5
+samples = randint(0, 255, size=(nsamples, ydim, xdim)).astype('u1')
+labels = np.arange(nsamples, dtype='i4')
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('n', -1)
+        f.def_dim('y', ydim)
+        f.def_dim('x', xdim)
+        dtype = pnetcdf.NC_UBYTE if self._file_format == 'NC_64BIT_DATA' else pnetcdf.NC_BYTE
+        v = f.def_var('samples', dtype, ('n', 'y', 'x'))
+        l = f.def_var('labels', pnetcdf.NC_INT, ('n',))
+        f.enddef()
+        if self._file_format != 'NC_64BIT_DATA':
+            samples_w = samples.astype('i1')
+        else:
+            samples_w = samples
+        if rank == 0:
+            v.put_var_all(samples_w, start=[0, 0, 0], count=[nsamples, ydim, xdim])
+            l.put_var_all(labels, start=[0], count=[nsamples])
+        else:
+            v.put_var_all(samples_w[:0], start=[0, 0, 0], count=[0, ydim, xdim])
+            l.put_var_all(labels[:0], start=[0], count=[0])
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing VariableDataset and DistributedBatchSampler"""
+        expected = samples if self._file_format == 'NC_64BIT_DATA' else samples.astype('i1')
+        dataset = pnetcdf.VariableDataset(self.file_path, ['samples', 'labels'], comm=comm,
+                                          target_transform=lambda x: int(x))
+        self.assertEqual(len(dataset), nsamples)
+
+        # single sample
+        image, label = dataset[3]
+        assert_array_equal(image, expected[3])
+        self.assertEqual(label, 3)
+
+        # batches of runs of adjacent and isolated samples, in any order and
+        # with duplicates
+        for indices in ([0, 1, 2, 3], [5, 1, 2, 9, 1], [nsamples - 1, 0], []):
+            images, labels_b = dataset.get_batch(indices)
+            assert_array_equal(images, expected[indices])
+            assert_array_equal(labels_b, labels[indices])
+
+        # samples of a batch in the format of the DataLoader
+        batch = dataset.__getitems__([2, 4])
+        self.assertEqual(len(batch), 2)
+        assert_array_equal(batch[1][0], expected[4])
+        self.assertEqual(batch[1][1], 4)
+
+        with self.assertRaises(IndexError):
+            dataset.get_batch([nsamples])
+
+        # the samples assigned to all processes cover the dataset
+        for shuffle in (False, True):
+            sampler = pnetcdf.DistributedBatchSampler(dataset, 3, comm=comm, shuffle=shuffle, seed=1)
+            sampler.set_epoch(2)
+            mine = []
+            nbatches = 0
+            for batch in sampler:
+                images, labels_b = dataset.get_batch(batch)
+                assert_array_equal(images, expected[batch])
+                assert_array_equal(labels_b, labels[batch])
+                mine.extend(labels_b.tolist())
+                nbatches += 1
+            self.assertEqual(nbatches, len(sampler))
+            self.assertEqual(len(mine), sampler.num_samples)
+            covered = set(sum(comm.allgather(mine), []))
+            self.assertEqual(covered, set(range(nsamples)))
+
+        # a batch prefetched twice is read twice, and returned to two calls
+        dataset.prefetch([4, 2])
+        dataset.prefetch([4, 2])
+        self.assertEqual(dataset.file.inq_nreqs(), 4)
+        for i in range(2):
+            images, labels_b = dataset.get_batch([4, 2])
+            assert_array_equal(images, expected[[4, 2]])
+            assert_array_equal(labels_b, labels[[4, 2]])
+        self.assertEqual(dataset.file.inq_nreqs(), 0)
+
+        # an unconsumed prefetch is cancelled by close
+        dataset.prefetch([0, 1])
+        dataset.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
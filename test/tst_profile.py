@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests recording the I/O method calls with a profiler, for a
+   file opened with profile=True and for all files while pnetcdf.profile is
+   active, and the reduction and export of the records.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_profile.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io, json
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_profile.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 4; ydim = 5
+
+
+class FileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file, with profiling enabled
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None, profile=True)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        v = f.def_var('var', pnetcdf.NC_INT, ('x', 'y'))
+        w = f.def_var('var2', pnetcdf.NC_DOUBLE, ('x', 'y'))
+        f.enddef()
+        buf = np.full((xdim, ydim), rank, dtype=np.int32)
+        v.put_var_all(buf, start = [rank * xdim, 0], count = [xdim, ydim])
+        v[rank * xdim:(rank + 1) * xdim, :] = buf
+        buf2 = buf.astype(np.float64)
+        req_id = w.iput_var(buf2, start = [rank * xdim, 0], count = [xdim, ydim])
+        f.wait_all()
+        stats = {(r['variable'], r['api']): r for r in f.profiler.stats()}
+        self.assertEqual(len(stats), 4)
+        r = stats[('var', 'put_var_all')]
+        self.assertEqual((r['mode'], r['calls'], r['bytes']), ('collective', 1, buf.nbytes))
+        r = stats[('var', '__setitem__')]
+        self.assertEqual((r['mode'], r['calls'], r['bytes']), ('collective', 1, buf.nbytes))
+        r = stats[('var2', 'iput_var')]
+        self.assertEqual((r['mode'], r['calls'], r['bytes']), ('nonblocking', 1, buf2.nbytes))
+        r = stats[('', 'wait_all')]
+        self.assertEqual((r['mode'], r['calls'], r['bytes']), ('collective', 1, 0))
+        self.assertTrue(all(r['time'] >= 0 for r in stats.values()))
+        # statistics among all processes
+        reduced = f.profiler.reduce(comm)
+        self.assertEqual(len(reduced), 4)
+        for r in reduced:
+            self.assertEqual(r['calls_min'], r['calls_max'])
+            self.assertTrue(r['time_min'] <= r['time_mean'] <= r['time_max'])
+            self.assertTrue(r['imbalance'] >= 1.0)
+        lines = f.profiler.to_csv(comm = comm).splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['variable', 'api', 'mode', 'calls_min'])
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(f.profiler.to_json()), f.profiler.stats())
+        f.profiler.reset()
+        self.assertEqual(f.profiler.stats(), [])
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing profiling of I/O method calls"""
+        f = pnetcdf.File(self.file_path, mode='r', comm=comm)
+        self.assertIsNone(f.profiler)
+        v = f.variables['var']
+        buf = np.empty((xdim, ydim), dtype=np.int32)
+        with pnetcdf.profile() as prof:
+            v.get_var_all(buf, start = [rank * xdim, 0], count = [xdim, ydim])
+            f.begin_indep()
+            v[rank * xdim, :]
+            v.get(np.s_[rank * xdim:(rank + 1) * xdim, :], out = buf)
+            f.end_indep()
+        # calls made after the context are not recorded
+        v.get_var_all(buf, start = [rank * xdim, 0], count = [xdim, ydim])
+        assert_array_equal(buf, rank)
+        stats = {r['api']: r for r in prof.stats()}
+        self.assertEqual(sorted(stats), ['__getitem__', 'get', 'get_var_all'])
+        self.assertEqual((stats['get_var_all']['mode'], stats['get_var_all']['calls']), ('collective', 1))
+        self.assertEqual((stats['__getitem__']['mode'], stats['__getitem__']['bytes']), ('independent', ydim * 4))
+        self.assertEqual((stats['get']['mode'], stats['get']['bytes']), ('independent', buf.nbytes))
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(FileTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,136 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the Request objects returned by the nonblocking
+   methods. The buffers of the requests are not kept by the program, and are
+   kept alive by the requests until they are completed, by File.wait_all with
+   request objects, IDs or NC_REQ_ALL, by Request.result, or by File.cancel.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_request.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_request.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 4; ydim = 5
+num_reqs = 4
+
+
+class RequestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        for i in range(num_reqs + 1):
+            f.def_var('var_%d' % i, pnetcdf.NC_INT, ('x', 'y'))
+        f.enddef()
+        start = [rank * xdim, 0]
+        count = [xdim, ydim]
+        # the write buffers are temporary arrays, kept alive by the requests
+        reqs = [f.variables['var_%d' % i].iput_var(np.full(count, rank + i, dtype=np.int32), start = start, count = count)
+                for i in range(num_reqs - 1)]
+        for req in reqs:
+            self.assertIsInstance(req, pnetcdf.Request)
+            self.assertIsInstance(req, int)
+            self.assertFalse(req.done())
+            self.assertFalse(req.is_read())
+            self.assertEqual(req.nbytes, xdim * ydim * 4)
+        # the list passed to wait_all is set to NC_REQ_NULL, as for IDs
+        req_ids = list(reqs)
+        req_errs = [None] * len(reqs)
+        f.wait_all(len(req_ids), req_ids, req_errs)
+        self.assertEqual(req_errs, [pnetcdf.NC_NOERR] * len(reqs))
+        self.assertEqual(req_ids, [pnetcdf.NC_REQ_NULL] * len(reqs))
+        for req in reqs:
+            self.assertTrue(req.done())
+            self.assertEqual(req.status, pnetcdf.NC_NOERR)
+            self.assertIsNone(req.result())
+        # buffered write, completed by NC_REQ_ALL
+        f.attach_buff(xdim * ydim * 4)
+        req = f.variables['var_%d' % (num_reqs - 1)].bput_var(np.full(count, rank + num_reqs - 1, dtype=np.int32), start = start, count = count)
+        f.wait_all()
+        self.assertTrue(req.done())
+        f.detach_buff()
+        # cancelled request
+        req = f.variables['var_%d' % num_reqs].iput_var(np.full(count, -1, dtype=np.int32), start = start, count = count)
+        f.cancel(1, [req])
+        self.assertTrue(req.done())
+        self.assertTrue(req.cancelled())
+        with self.assertRaises(RuntimeError):
+            req.result()
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing Request objects of nonblocking methods"""
+        f = pnetcdf.File(self.file_path, mode='r', comm=comm)
+        start = [rank * xdim, 0]
+        count = [xdim, ydim]
+        # the read buffers are returned by Request.result
+        reqs = [f.variables['var_%d' % i].iget_var(np.empty(count, dtype=np.int32), start = start, count = count)
+                for i in range(num_reqs)]
+        self.assertTrue(all(req.is_read() for req in reqs))
+        # completed with the plain request IDs
+        f.wait_all(2, [int(req) for req in reqs[:2]])
+        for i, req in enumerate(reqs):
+            assert_array_equal(req.result(), rank + i)
+        # completed by Request.result, in independent mode
+        f.begin_indep()
+        req = f.variables['var_0'].iget_var(np.empty(count, dtype=np.int32), start = start, count = count)
+        assert_array_equal(req.result(), rank)
+        self.assertEqual(req.status, pnetcdf.NC_NOERR)
+        f.end_indep()
+        # read requests of iget_varn
+        starts = np.array([[rank * xdim, 0], [rank * xdim + 2, 0]])
+        counts = np.array([[1, ydim], [2, ydim]])
+        req = f.variables['var_1'].iget_varn(np.empty(3 * ydim, dtype=np.int32), 2, starts, counts)
+        f.wait_all()
+        assert_array_equal(req.result(), rank + 1)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(RequestTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,161 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests Variable.append and File.append_records, which write
+   records after the last one written, in collective and independent data
+   modes.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_append.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_append.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+NSTEPS = 8
+NX = 4
+names = ['temp', 'pres']
+
+
+def step_data(name, step):
+    # data written by this process to variable name at time step
+    i = names.index(name)
+    return np.arange(NX, dtype=np.int32) + 1000 * i + 100 * step + 10 * rank
+
+
+class VariableAppendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('time', -1)
+        f.def_dim('x', NX * size)
+        for name in names:
+            f.def_var(name, pnetcdf.NC_INT, ('time', 'x'))
+        f.def_var('fixed', pnetcdf.NC_INT, ('x',))
+        f.enddef()
+        temp = f.variables['temp']
+        pres = f.variables['pres']
+        # variables appended one after another write the same records
+        for step in range(2):
+            temp.append(step_data('temp', step), start = [rank * NX])
+            pres.append(step_data('pres', step), start = [rank * NX])
+        # two records at once, all of one variable then of the other
+        temp.append(np.stack([step_data('temp', 2), step_data('temp', 3)]), start = [rank * NX])
+        pres.append(np.stack([step_data('pres', 2), step_data('pres', 3)]), start = [rank * NX])
+        # one record of all variables per call, by name or instance
+        for step in range(4, 6):
+            f.append_records({name if step % 2 else f.variables[name]:
+                              (step_data(name, step), [rank * NX])
+                              for name in names})
+        # independent data mode
+        f.begin_indep()
+        f.append_records({name: (step_data(name, 6), [rank * NX]) for name in names})
+        f.end_indep()
+        # the next records are kept across define mode
+        f.redef()
+        f.enddef()
+        temp.append(step_data('temp', 7), start = [rank * NX])
+        pres.append(step_data('pres', 7), start = [rank * NX])
+        # an explicit first record, from which the appends continue
+        temp.append(step_data('temp', 0), start = [rank * NX], record = 0)
+        f.append_records({name: (step_data(name, 1), [rank * NX]) for name in names}, record = 1)
+        temp.append(step_data('temp', 2), start = [rank * NX])
+        f.append_records({name: (step_data(name, step), [rank * NX]) for name, step in
+                          (('temp', 3), ('pres', 2))})
+        temp.append(step_data('temp', NSTEPS), start = [rank * NX], record = NSTEPS)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing appends of records"""
+        f = pnetcdf.File(self.file_path, 'a')
+        self.assertEqual(len(f.dimensions['time']), NSTEPS + 1)
+        for name in names:
+            v = f.variables[name]
+            for step in range(NSTEPS):
+                assert_array_equal(v[step, rank * NX:(rank + 1) * NX], step_data(name, step))
+        v = f.variables['temp']
+        assert_array_equal(v[NSTEPS, rank * NX:(rank + 1) * NX], step_data('temp', NSTEPS))
+
+        # the first appends of a file start from its number of records
+        f.variables['pres'].append(step_data('pres', NSTEPS + 1), start = [rank * NX])
+        v.append(step_data('temp', NSTEPS + 1), start = [rank * NX])
+        self.assertEqual(len(f.dimensions['time']), NSTEPS + 2)
+        for name in names:
+            assert_array_equal(f.variables[name][NSTEPS + 1, rank * NX:(rank + 1) * NX],
+                               step_data(name, NSTEPS + 1))
+
+        # variables defined later start after the records written, and
+        # after those added by other means
+        f.redef()
+        rh = f.def_var('rh', pnetcdf.NC_INT, ('time', 'x'))
+        wind = f.def_var('wind', pnetcdf.NC_INT, ('time', 'x'))
+        f.enddef()
+        rh.append(np.full(NX, 1, np.int32), start = [rank * NX])
+        self.assertEqual(len(f.dimensions['time']), NSTEPS + 3)
+        v[NSTEPS + 3, rank * NX:(rank + 1) * NX] = step_data('temp', NSTEPS + 3)
+        wind.append(np.full(NX, 2, np.int32), start = [rank * NX])
+        self.assertEqual(len(f.dimensions['time']), NSTEPS + 5)
+        assert_array_equal(rh[NSTEPS + 2, rank * NX:(rank + 1) * NX], np.full(NX, 1, np.int32))
+        assert_array_equal(wind[NSTEPS + 4, rank * NX:(rank + 1) * NX], np.full(NX, 2, np.int32))
+        for name in names:
+            assert_array_equal(f.variables[name][NSTEPS + 1, rank * NX:(rank + 1) * NX],
+                               step_data(name, NSTEPS + 1))
+
+        # variables with no unlimited dimension, and data of the wrong shape
+        with self.assertRaises(ValueError):
+            f.variables['fixed'].append(step_data('temp', 0))
+        with self.assertRaises(ValueError):
+            v.append(np.zeros((1, 1, NX), np.int32))
+        with self.assertRaises(ValueError):
+            v.append(step_data('temp', 0), start = [0, 0])
+        with self.assertRaises(ValueError):
+            f.append_records({'fixed': step_data('temp', 0), 'temp': step_data('temp', 0)})
+        self.assertEqual(f.inq_nreqs(), 0)
+        self.assertEqual(len(f.dimensions['time']), NSTEPS + 5)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariableAppendTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
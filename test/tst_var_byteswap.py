@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests writing arrays in big-endian byte order, and reading
+   the data of variables in the big-endian byte order of the file, with the
+   indexer after Variable.set_auto_byteswap(False) and with Variable.get,
+   through MPI-IO and through the memory maps of a file opened with
+   mmap=True.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_byteswap.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_byteswap.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+NY = 4
+NX = 5 * size
+NRECS = 3
+types = {'flt': (pnetcdf.NC_FLOAT, 'f4'), 'int': (pnetcdf.NC_INT, 'i4'),
+         'dbl': (pnetcdf.NC_DOUBLE, 'f8'), 'sht': (pnetcdf.NC_SHORT, 'i2')}
+data = {name: (np.arange(NY * NX) - 7).astype(t).reshape(NY, NX) for name, (xtype, t) in types.items()}
+rec_data = np.arange(NRECS * NX, dtype=np.float32).reshape(NRECS, NX) / 8
+
+
+class VarByteswapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('rec', -1)
+        f.def_dim('y', NY)
+        f.def_dim('x', NX)
+        for name, (xtype, t) in types.items():
+            f.def_var(name, xtype, ('y', 'x'))
+        f.def_var('rec', pnetcdf.NC_FLOAT, ('rec', 'x'))
+        f.enddef()
+        lo, hi = rank * 5, (rank + 1) * 5
+        # arrays in big-endian byte order, written with the indexer and with
+        # the flexible API methods
+        f.variables['flt'][:, lo:hi] = data['flt'][:, lo:hi].astype('>f4')
+        f.variables['int'].put_var_all(data['int'][:, lo:hi].astype('>i4'), start = [0, lo], count = [NY, 5])
+        f.variables['dbl'].put_var_all(data['dbl'][:, lo:hi].astype('>f4'), start = [0, lo], count = [NY, 5])
+        big = data['sht'].astype('>i2')
+        f.variables['sht'].put_var_all(big[:, lo:hi], start = [0, lo], count = [NY, 5])
+        f.variables['rec'][:, lo:hi] = rec_data[:, lo:hi].astype('>f4')
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing reads and writes in big-endian byte order"""
+        expected = dict(data, rec=rec_data)
+        for mmap in (False, True):
+            f = pnetcdf.File(self.file_path, 'r', mmap=mmap)
+            for name, values in expected.items():
+                v = f.variables[name]
+                big = values.astype(values.dtype.newbyteorder('>'))
+                # native byte order by default
+                self.assertTrue(v[:].dtype.isnative)
+                assert_array_equal(v[:], values)
+
+                v.set_auto_byteswap(False)
+                value = v[:]
+                self.assertEqual(value.dtype, big.dtype)
+                self.assertEqual(value.tobytes(), big.tobytes())
+                assert_array_equal(v[1:3, ::2], values[1:3, ::2])
+                assert_array_equal(v[[0, 2], 1], values[[0, 2], 1])
+                # single elements are native numpy scalars
+                self.assertEqual(v[1, 2], values[1, 2])
+                self.assertTrue(v[1, 2].dtype.isnative)
+                v.set_auto_byteswap(True)
+
+                value = v.get(np.s_[1:, ::2], dtype=big.dtype)
+                self.assertEqual(value.dtype, big.dtype)
+                assert_array_equal(value, values[1:, ::2])
+                out = np.zeros((values.shape[1], values.shape[0]), dtype=big.dtype).T
+                v.get(out=out)
+                self.assertEqual(out.tobytes(order='C'), big.tobytes())
+            f.set_auto_byteswap(False)
+            self.assertEqual(f.variables['flt'][:].dtype, np.dtype('>f4'))
+            f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarByteswapTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
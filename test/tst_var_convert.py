@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests writing and reading variables with arrays of another
+   data type than the variable's, which PnetCDF converts when given the
+   predefined MPI datatype of the array as buftype: by the indexer, by
+   Variable.get with argument dtype, and by the blocking and nonblocking
+   put_var/get_var methods.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_convert.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_convert.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 4; ydim = 6
+# values of this process, exactly representable in all types used
+data = (np.arange(xdim * ydim, dtype=np.int16) - 10 + rank).reshape(xdim, ydim)
+
+
+class VarConvertTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        v1 = f.def_var('var1', pnetcdf.NC_SHORT, ('x', 'y'))
+        v2 = f.def_var('var2', pnetcdf.NC_SHORT, ('x', 'y'))
+        v3 = f.def_var('var3', pnetcdf.NC_FLOAT, ('x', 'y'))
+        v4 = f.def_var('var4', pnetcdf.NC_SHORT, ('x', 'y'))
+        f.enddef()
+        start = [rank * xdim, 0]
+        count = [xdim, ydim]
+        v1.put_var_all(data.astype(np.float32), start = start, count = count)
+        # a non-contiguous view of another type
+        buf = np.zeros((xdim, 2 * ydim), dtype=np.int64)
+        buf[:, ::2] = data
+        v2[rank * xdim:(rank + 1) * xdim] = buf[:, ::2]
+        v3[rank * xdim:(rank + 1) * xdim] = data
+        req = v4.iput_var(data.astype(np.float64), start = start, count = count)
+        f.wait_all(1, [req])
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing conversion of data types by PnetCDF"""
+        f = pnetcdf.File(self.file_path, 'r')
+        index = np.s_[rank * xdim:(rank + 1) * xdim, :]
+        start = [rank * xdim, 0]
+        count = [xdim, ydim]
+        for name in ('var1', 'var2', 'var3', 'var4'):
+            v = f.variables[name]
+            assert_array_equal(v[index], data)
+            out = v.get(index, dtype=np.float32)
+            self.assertEqual(out.dtype, np.float32)
+            assert_array_equal(out, data)
+            # into a non-contiguous view of another type
+            buf = np.zeros((xdim, 2 * ydim), dtype=np.float64)
+            v.get(index, out=buf[:, 1::2])
+            assert_array_equal(buf[:, 1::2], data)
+            assert_array_equal(buf[:, ::2], 0)
+            out = np.empty((xdim, ydim), dtype=np.int32)
+            v.get_var_all(out, start = start, count = count)
+            assert_array_equal(out, data)
+            out = np.empty((xdim, ydim), dtype=np.int64)
+            req = v.iget_var(out, start = start, count = count)
+            f.wait_all(1, [req])
+            assert_array_equal(out, data)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarConvertTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
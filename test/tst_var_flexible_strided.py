@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the flexible API methods with non-contiguous arrays and
+   no buftype, such as the interior of a buffer with ghost cells. The arrays
+   are described by MPI derived data types built from their strides, both
+   for writing, blocking and nonblocking, and for reading.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_flexible_strided.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_flexible_strided.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+ghost = 2; ydim = 6; zdim = 8
+ntimes = 3
+data = randint(0,10,size=(ydim,zdim)).astype('i4')
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('t', -1)
+        f.def_dim('y', ydim * size)
+        f.def_dim('z', zdim)
+        v = f.def_var('data', pnetcdf.NC_INT, ('t', 'y', 'z'))
+        w = f.def_var('data_t', pnetcdf.NC_DOUBLE, ('y', 'z'))
+        u = f.def_var('data_i', pnetcdf.NC_INT, ('y', 'z'))
+        f.enddef()
+        # each process writes the interior of its buffer with ghost cells,
+        # at every time step, using the same layout
+        local = np.full((ydim + 2 * ghost, zdim + 2 * ghost), -1, dtype='i4')
+        for t in range(ntimes):
+            local[ghost:-ghost, ghost:-ghost] = data + t
+            v.put_var_all(local[ghost:-ghost, ghost:-ghost], start = [t, rank * ydim, 0], count = [1, ydim, zdim])
+        # transposed array, in a nonblocking write
+        buf = np.asfortranarray(data.astype('f8'))
+        req_id = w.iput_var(buf, start = [rank * ydim, 0], count = [ydim, zdim])
+        req_errs = [None]
+        f.wait_all(1, [req_id], req_errs)
+        self.assertEqual(req_errs[0], pnetcdf.NC_NOERR)
+        # signed bytes, converted to the type of the variable
+        local = np.full((ydim + 2 * ghost, zdim + 2 * ghost), -1, dtype='i1')
+        local[ghost:-ghost, ghost:-ghost] = data - 5
+        u.put_var_all(local[ghost:-ghost, ghost:-ghost], start = [rank * ydim, 0], count = [ydim, zdim])
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing flexible API methods with non-contiguous arrays"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v = f.variables['data']
+        w = f.variables['data_t']
+        # read into the interior of a buffer with ghost cells
+        local = np.full((ydim + 2 * ghost, zdim + 2 * ghost), -1, dtype='i4')
+        for t in range(ntimes):
+            v.get_var_all(local[ghost:-ghost, ghost:-ghost], start = [t, rank * ydim, 0], count = [1, ydim, zdim])
+            assert_array_equal(local[ghost:-ghost, ghost:-ghost], data + t)
+            # ghost cells are left untouched
+            self.assertTrue(np.all(local[:ghost] == -1) and np.all(local[-ghost:] == -1))
+            self.assertTrue(np.all(local[:, :ghost] == -1) and np.all(local[:, -ghost:] == -1))
+        # read into a Fortran-ordered array, in independent mode
+        f.begin_indep()
+        buf = np.zeros((ydim, zdim), dtype='f8', order='F')
+        w.get_var(buf, start = [rank * ydim, 0], count = [ydim, zdim])
+        assert_array_equal(buf, data)
+        f.end_indep()
+        # signed bytes, converted from the type of the variable
+        u = f.variables['data_i']
+        assert_array_equal(u[rank * ydim:(rank + 1) * ydim], data - 5)
+        local = np.zeros((ydim, 2 * zdim), dtype='i1')
+        u.get_var_all(local[:, ::2], start = [rank * ydim, 0], count = [ydim, zdim])
+        assert_array_equal(local[:, ::2], data - 5)
+        self.assertTrue(np.all(local[:, 1::2] == 0))
+        # a read buffer with overlapping elements is rejected
+        buf = np.broadcast_to(np.zeros(zdim, dtype='f8'), (ydim, zdim))
+        with self.assertRaises(ValueError):
+            w.get_var_all(buf, start = [rank * ydim, 0], count = [ydim, zdim])
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
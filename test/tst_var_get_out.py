@@ -0,0 +1,145 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests reading variables with method `Variable.get`, which
+   reads the values selected by an indexer expression directly into a
+   caller-provided array, contiguous or not, in collective and independent
+   data modes.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_get_out.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_get_out.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim=9; ydim=10; zdim=11
+data = randint(0,10,size=(xdim,ydim,zdim)).astype('i4')
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x',xdim)
+        f.def_dim('xu',-1)
+        f.def_dim('y',ydim)
+        f.def_dim('z',zdim)
+        v1 = f.def_var('data1', pnetcdf.NC_INT, ('x','y','z'))
+        v1_u = f.def_var('data1u', pnetcdf.NC_INT, ('xu','y','z'))
+        v0 = f.def_var('scalar', pnetcdf.NC_INT, ())
+        f.enddef()
+        v1.put_var_all(data)
+        v1_u.put_var_all(data, start=[0, 0, 0], count=[xdim, ydim, zdim])
+        v0.put_var_all(np.array(7, dtype='i4'))
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing Variable.get with out argument"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v1 = f.variables['data1']
+        v1_u = f.variables['data1u']
+        v0 = f.variables['scalar']
+
+        # without out, a new array is returned
+        assert_array_equal(v1.get(), data)
+        assert_array_equal(v1_u.get(np.s_[2:5, 1, ::3]), data[2:5, 1, ::3])
+        assert_array_equal(v0.get(), np.int32(7))
+
+        # contiguous out
+        out = np.empty((ydim, zdim), dtype='i4')
+        self.assertIs(v1.get(3, out=out), out)
+        assert_array_equal(out, data[3])
+        out = np.empty((3, 4), dtype='i4')
+        v1.get(np.s_[1, 2:8:2, 5:9], out=out)
+        assert_array_equal(out, data[1, 2:8:2, 5:9])
+
+        # out is a row of a larger buffer, filled one record at a time
+        buf = np.zeros((xdim, ydim, zdim), dtype='i4')
+        for rec in range(xdim):
+            v1_u.get(rec, out=buf[rec])
+        assert_array_equal(buf, data)
+
+        # non-contiguous out, read with varm
+        buf = np.zeros((zdim, ydim), dtype='i4')
+        v1.get(np.s_[4, ...], out=buf.T)
+        assert_array_equal(buf.T, data[4])
+        buf = np.zeros((2 * xdim, ydim), dtype='i4')
+        v1.get(np.s_[:, :, 6], out=buf[::2])
+        assert_array_equal(buf[::2], data[:, :, 6])
+        assert_array_equal(buf[1::2], 0)
+        buf = np.zeros((xdim, ydim, zdim), dtype='i4', order='F')
+        v1.get(out=buf)
+        assert_array_equal(buf, data)
+
+        # independent mode
+        f.begin_indep()
+        out = np.empty((ydim, zdim), dtype='i4')
+        v1_u.get(np.s_[xdim - 1], out=out)
+        assert_array_equal(out, data[xdim - 1])
+        f.end_indep()
+
+        # invalid arguments are detected before reading
+        with self.assertRaises(TypeError):
+            v1.get(0, out=np.empty((ydim, zdim), dtype='c16'))
+        with self.assertRaises(TypeError):
+            v1.get(0, out=np.empty((ydim, zdim), dtype='f8'), dtype='f4')
+        with self.assertRaises(ValueError):
+            v1.get(0, out=np.empty((ydim, zdim + 1), dtype='i4'))
+        with self.assertRaises(ValueError):
+            v1.get(0, out=np.empty((ydim, zdim), dtype='i4')[::-1])
+        with self.assertRaises(IndexError):
+            v1.get(np.s_[::-1])
+        with self.assertRaises(IndexError):
+            v1.get(xdim)
+        with self.assertRaises(IndexError):
+            v1.get(np.s_[[0, 2, 3]])
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,152 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests reading and writing variables using indexer operators
+   made of integers, slices of step 1 and Ellipsis. Such expressions select a
+   single subarray and are handled internally by a single call to
+   ncmpi_put_vara/ncmpi_get_vara (collective or independent), without going
+   through the general orthogonal indexing path.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_indexer_slab.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal, assert_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_indexer_slab.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim=9; ydim=10; zdim=11
+# Numpy array data to be written to nc variable, each process owns a block of
+# ydim rows
+data = randint(0,10,size=(xdim,ydim*size,zdim)).astype('i4')
+rows = slice(rank * ydim, (rank + 1) * ydim)
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x',xdim)
+        f.def_dim('xu',-1)
+        f.def_dim('y',ydim*size)
+        f.def_dim('z',zdim)
+        v1 = f.def_var('data1', pnetcdf.NC_INT, ('x','y','z'))
+        v1_u = f.def_var('data1u', pnetcdf.NC_INT, ('xu','y','z'))
+        v2 = f.def_var('data2', pnetcdf.NC_INT, ('x','y','z'))
+        v2_u = f.def_var('data2u', pnetcdf.NC_INT, ('xu','y','z'))
+        v3 = f.def_var('data3', pnetcdf.NC_DOUBLE, ('y','z'))
+        f.enddef()
+
+        # collective writes, the record variable grows with the slice
+        v1[:, rows, :] = data[:, rows, :]
+        v1_u[0:xdim, rows, :] = data[:, rows, :]
+        # data of a different type is converted to the variable's type
+        v3[rows, ...] = data[0, rows, :].astype('i8')
+
+        # independent writes, one record at a time with an integer index
+        f.begin_indep()
+        for i in range(xdim):
+            v2[i, rows] = data[i, rows, :]
+            v2_u[i, rows, :] = data[i, rows, :]
+        f.end_indep()
+
+        # broadcast a scalar, then overwrite the last element of each row
+        # using a negative index
+        v1[xdim-1, rows, :] = np.int32(-1)
+        v1[xdim-1, rows, -1] = data[xdim-1, rows, -1]
+        # integers out of range of a fixed-size dimension raise an IndexError
+        with self.assertRaises(IndexError):
+            v1[xdim, rows, :] = data[0, rows, :]
+        with self.assertRaises(IndexError):
+            v3[ydim*size, 0] = 1.0
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing contiguous subarray indexing with CDF5/CDF2/CDF1 file format"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v1 = f.variables['data1']
+        v1_u = f.variables['data1u']
+        v2 = f.variables['data2']
+        v2_u = f.variables['data2u']
+        v3 = f.variables['data3']
+        self.assertEqual(v1_u.shape, (xdim, ydim*size, zdim))
+        self.assertEqual(v2_u.shape, (xdim, ydim*size, zdim))
+
+        expected = data.copy()
+        expected[xdim-1, :, :-1] = -1
+
+        # collective reads
+        assert_array_equal(v1[:], expected)
+        assert_array_equal(v1_u[...], data)
+        assert_array_equal(v1[2, 3:7, 1:5], expected[2, 3:7, 1:5])
+        assert_array_equal(v1[-1, ..., 2], expected[-1, :, 2])
+        assert_array_equal(v3[:, :], data[0].astype('f8'))
+        # slices past the end are clipped as for numpy arrays
+        assert_array_equal(v1_u[5:100, 0], data[5:, 0])
+        self.assertEqual(v1[0:0, :, :].shape, (0, ydim*size, zdim))
+
+        # an integer for every dimension returns a scalar
+        value = v1[1, 2, 3]
+        self.assertEqual(np.ndim(value), 0)
+        assert_equal(value, data[1, 2, 3])
+
+        # independent reads
+        f.begin_indep()
+        assert_array_equal(v2[:, rows, :], data[:, rows, :])
+        for i in range(xdim):
+            assert_array_equal(v2_u[i], data[i])
+        f.end_indep()
+
+        # integers out of range raise an IndexError
+        with self.assertRaises(IndexError):
+            v1[xdim, 0, 0]
+        with self.assertRaises(IndexError):
+            v1[-xdim-1]
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
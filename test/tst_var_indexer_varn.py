@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests reading and writing variables using indexer operators
+   that contain integer or boolean index arrays (orthogonal indexing). Such
+   selections consist of many data chunks, which are merged into runs of
+   adjacent chunks and accessed internally by a single call to
+   ncmpi_put_varn/ncmpi_get_varn (collective or independent).
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_indexer_varn.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_indexer_varn.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim=9; ydim=10; zdim=11
+data = randint(0,10,size=(xdim*size,ydim,zdim)).astype('i4')
+# records owned by this process, interleaved among all processes
+my_recs = np.arange(rank, xdim*size, size)
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x',xdim*size)
+        f.def_dim('xu',-1)
+        f.def_dim('y',ydim)
+        f.def_dim('z',zdim)
+        v1 = f.def_var('data1', pnetcdf.NC_INT, ('x','y','z'))
+        v1_u = f.def_var('data1u', pnetcdf.NC_INT, ('xu','y','z'))
+        v2 = f.def_var('data2', pnetcdf.NC_INT, ('x','y','z'))
+        f.enddef()
+
+        # collective writes of interleaved records
+        v1[my_recs] = data[my_recs]
+        v1_u[my_recs, :, :] = data[my_recs]
+
+        # independent writes, index arrays in two dimensions
+        f.begin_indep()
+        ys = [0, 1, 2, 5, 9]
+        zs = np.arange(zdim)
+        v2[my_recs, ys, :] = data[my_recs][:, ys, :]
+        others = [y for y in range(ydim) if y not in ys]
+        v2[my_recs, others, zs] = data[my_recs][:, others, :]
+        f.end_indep()
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing orthogonal indexing with CDF5/CDF2/CDF1 file format"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v1 = f.variables['data1']
+        v1_u = f.variables['data1u']
+        v2 = f.variables['data2']
+        self.assertEqual(v1_u.shape, (xdim*size, ydim, zdim))
+
+        assert_array_equal(v1[:], data)
+        assert_array_equal(v1_u[:], data)
+        assert_array_equal(v2[:], data)
+
+        # runs of adjacent indices and isolated indices
+        idx = [0, 1, 2, 5, 7, 8]
+        assert_array_equal(v1[idx], data[idx])
+        assert_array_equal(v1[idx, 3], data[idx, 3])
+        assert_array_equal(v1[idx, 2:6, -1], data[idx, 2:6, -1])
+        # index arrays in the inner dimensions
+        assert_array_equal(v1[1, :, [0, 3, 4]], data[1][:, [0, 3, 4]])
+        assert_array_equal(v1[:, [1, 2], [0, 3, 4]], data[:, [1, 2]][:, :, [0, 3, 4]])
+        # boolean index arrays
+        mask = np.zeros(ydim, dtype=bool)
+        mask[[1, 3, 4]] = True
+        assert_array_equal(v1[:, mask, 0], data[:, mask, 0])
+        # an empty index array selects nothing
+        self.assertEqual(v1[[], :, :].shape, (0, ydim, zdim))
+
+        f.begin_indep()
+        assert_array_equal(v2[my_recs], data[my_recs])
+        f.end_indep()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
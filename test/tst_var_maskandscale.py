@@ -0,0 +1,141 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the automatic masking of missing values and the
+   automatic packing and unpacking of data by the indexer of a variable,
+   turned on by Variable.set_auto_mask, Variable.set_auto_scale and
+   File.set_auto_maskandscale, following the CF conventions.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_maskandscale.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_maskandscale.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 10
+scale_factor = np.float32(0.25)
+add_offset = np.float32(100.)
+fill_value = np.int16(-999)
+# unpacked values written by this process, the third one is masked
+values = np.ma.masked_array(100. + 0.25 * np.arange(xdim) + rank, mask = [i == 2 for i in range(xdim)])
+packed = np.arange(xdim, dtype=np.int16) + 4 * rank
+packed[2] = fill_value
+
+
+class VarMaskAndScaleTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x', xdim * size)
+        v1 = f.def_var('var1', pnetcdf.NC_SHORT, ('x',))
+        v1.scale_factor = scale_factor
+        v1.add_offset = add_offset
+        v1._FillValue = fill_value
+        v2 = f.def_var('var2', pnetcdf.NC_INT, ('x',))
+        v2.missing_value = np.int32(-1)
+        v2.valid_max = np.int32(xdim * size)
+        # no fill value attribute, in the default no-fill mode
+        v3 = f.def_var('var3', pnetcdf.NC_INT, ('x',))
+        f.enddef()
+        # stored values are written as is by default
+        self.assertFalse(v1.mask or v1.scale)
+        v2[rank * xdim:(rank + 1) * xdim] = np.arange(xdim, dtype=np.int32) + rank * xdim
+        # packed and masked in the same pass
+        v1.set_auto_maskandscale(True)
+        v1[rank * xdim:(rank + 1) * xdim] = values
+        # masked values are written as the default fill value of the type
+        v3.set_auto_mask(True)
+        v3[rank * xdim:(rank + 1) * xdim] = np.ma.masked_array(np.arange(xdim, dtype=np.int32), mask = values.mask)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing automatic masking and scaling of variables"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v1 = f.variables['var1']
+        v2 = f.variables['var2']
+        assert_array_equal(v1[rank * xdim:(rank + 1) * xdim], packed)
+
+        v1.set_auto_scale(True)
+        data = v1[rank * xdim:(rank + 1) * xdim]
+        self.assertEqual(data.dtype, np.float32)
+        self.assertFalse(np.ma.isMaskedArray(data))
+        self.assertEqual(data[2], fill_value * scale_factor + add_offset)
+
+        v1.set_auto_mask(True)
+        data = v1[rank * xdim:(rank + 1) * xdim]
+        assert_array_equal(np.ma.getmaskarray(data), np.ma.getmaskarray(values))
+        assert_array_almost_equal(data.compressed(), values.compressed())
+        self.assertIs(v1[rank * xdim + 2], np.ma.masked)
+        self.assertAlmostEqual(v1[rank * xdim + 3], values[3])
+
+        v3 = f.variables['var3']
+        self.assertEqual(v3[rank * xdim + 2], pnetcdf.NC_FILL_INT)
+        self.assertEqual(v3[rank * xdim + 3], 3)
+
+        # masked with missing_value, valid_max applies to the stored values
+        f.set_auto_maskandscale(True)
+        data = v2[:]
+        self.assertFalse(np.ma.isMaskedArray(data))
+        self.assertEqual(data.dtype, np.int32)
+        f.close()
+
+        f = pnetcdf.File(self.file_path, 'a')
+        v2 = f.variables['var2']
+        v2[rank * xdim] = np.int32(-1)
+        v2.set_auto_mask(True)
+        data = v2[rank * xdim:(rank + 1) * xdim]
+        self.assertTrue(data.mask[0])
+        self.assertEqual(data.count(), xdim - 1)
+        # the cached attributes are updated when they change
+        f.redef()
+        v2.valid_range = np.array([0, 4], dtype=np.int32)
+        f.enddef()
+        self.assertEqual(v2[rank * xdim:(rank + 1) * xdim].count(), 4 if rank == 0 else 0)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarMaskAndScaleTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests Variable.as_memmap, which maps the data of a fixed-size
+   or record variable into memory, and the reads with the indexer of a file
+   opened with mmap=True. In the 64-bit formats, the variables are placed
+   after a large, unwritten variable, so that their offsets do not fit in 32
+   bits.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_memmap.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_memmap.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+NX = 4 * size
+NY = 3
+NRECS = 5
+BIGLEN = 2 ** 31 + 8
+
+fix_data = np.arange(NX * NY, dtype=np.int32).reshape(NX, NY)
+dbl_data = np.arange(NX, dtype=np.float64) / 4
+# 3 shorts per record are padded to 8 bytes
+recs_data = np.arange(NRECS * NY, dtype=np.int16).reshape(NRECS, NY)
+recd_data = np.arange(NRECS, dtype=np.float64) * 10
+
+
+class VarMemmapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('rec', -1)
+        f.def_dim('x', NX)
+        f.def_dim('y', NY)
+        if self._file_format is not None:
+            # never written, the file is sparse
+            f.def_dim('big', BIGLEN)
+            f.def_var('big', pnetcdf.NC_BYTE, ('big',))
+        f.def_var('fix', pnetcdf.NC_INT, ('x', 'y'))
+        f.def_var('dbl', pnetcdf.NC_DOUBLE, ('x',))
+        f.def_var('recs', pnetcdf.NC_SHORT, ('rec', 'y'))
+        f.def_var('recd', pnetcdf.NC_DOUBLE, ('rec',))
+        f.enddef()
+        lo, hi = rank * 4, (rank + 1) * 4
+        f.variables['fix'][lo:hi] = fix_data[lo:hi]
+        f.variables['dbl'][lo:hi] = dbl_data[lo:hi]
+        f.variables['recs'][:NRECS] = recs_data
+        f.variables['recd'][:NRECS] = recd_data
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing memory maps of variables"""
+        expected = {'fix': fix_data, 'dbl': dbl_data, 'recs': recs_data, 'recd': recd_data}
+        f = pnetcdf.File(self.file_path, 'r')
+        if self._file_format is not None:
+            self.assertGreater(f.variables['fix'].inq_offset(), BIGLEN)
+        for name, data in expected.items():
+            v = f.variables[name]
+            m = v.as_memmap()
+            self.assertIsInstance(m, np.memmap)
+            self.assertEqual(m.dtype, v.dtype.newbyteorder('>'))
+            self.assertFalse(m.flags.writeable)
+            assert_array_equal(m, data)
+        m = f.variables['recs'].as_memmap()
+        self.assertEqual(m.strides[0], f.inq_recsize())
+        f.close()
+
+        # reads with the indexer through the memory maps
+        f = pnetcdf.File(self.file_path, 'r', mmap=True)
+        lo, hi = rank * 4, (rank + 1) * 4
+        for name, data in expected.items():
+            v = f.variables[name]
+            value = v[lo % len(data):]
+            self.assertEqual(value.dtype, v.dtype)
+            assert_array_equal(value, data[lo % len(data):])
+            # strided reads go through MPI-IO
+            assert_array_equal(v[::2], data[::2])
+        v = f.variables['fix']
+        assert_array_equal(v[lo:hi, 1], fix_data[lo:hi, 1])
+        self.assertEqual(v[NX - 1, NY - 1], fix_data[-1, -1])
+        with self.assertRaises(IndexError):
+            v[NX, 0]
+        f.close()
+
+        with self.assertRaises(ValueError):
+            pnetcdf.File(self.file_path, 'a', mmap=True)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarMemmapTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
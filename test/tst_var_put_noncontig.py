@@ -0,0 +1,116 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests writing non-contiguous arrays, such as transposed,
+   Fortran-ordered and strided views, with the indexer in collective and
+   independent data modes, including negative-step slices and arrays whose
+   type differs from the variable's.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_put_noncontig.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.random import seed, randint
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+seed(0)
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_put_noncontig.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim=9; ydim=10; zdim=11
+data = randint(0,10,size=(xdim,ydim,zdim)).astype('i4')
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x',xdim)
+        f.def_dim('xu',-1)
+        f.def_dim('y',ydim)
+        f.def_dim('z',zdim)
+        for name in ('data1', 'data2', 'data3', 'data4', 'data5'):
+            f.def_var(name, pnetcdf.NC_INT, ('x','y','z'))
+        f.def_var('data1u', pnetcdf.NC_INT, ('xu','y','z'))
+        f.enddef()
+        v1 = f.variables['data1']
+        v2 = f.variables['data2']
+        v3 = f.variables['data3']
+        v4 = f.variables['data4']
+        v5 = f.variables['data5']
+        v1_u = f.variables['data1u']
+        # Fortran-ordered array
+        v1[:] = np.asfortranarray(data)
+        # transposed array, written one record at a time
+        buf = np.ascontiguousarray(data.transpose(2, 1, 0))
+        for rec in range(xdim):
+            v1_u[rec] = buf[:, :, rec].T
+        # strided view of a larger array
+        buf = np.zeros((xdim, 2 * ydim, zdim), dtype='i4')
+        buf[:, ::2, :] = data
+        v2[:] = buf[:, ::2, :]
+        # negative-step slice
+        v3[::-1, :, ::-1] = data[::-1, :, ::-1]
+        # non-contiguous array of a different type
+        v4[:] = np.asfortranarray(data.astype('i8'))
+        # strided write of a non-contiguous array, in independent mode
+        f.begin_indep()
+        if rank == 0:
+            v5[:] = np.zeros((xdim, ydim, zdim), dtype='i4')
+            v5[::2, 1::3, :] = np.asfortranarray(data[::2, 1::3, :])
+        f.end_indep()
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing writing non-contiguous arrays"""
+        f = pnetcdf.File(self.file_path, 'r')
+        for name in ('data1', 'data1u', 'data2', 'data3', 'data4'):
+            assert_array_equal(f.variables[name][:], data)
+        expected = np.zeros((xdim, ydim, zdim), dtype='i4')
+        expected[::2, 1::3, :] = data[::2, 1::3, :]
+        assert_array_equal(f.variables['data5'][:], expected)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
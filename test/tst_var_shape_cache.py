@@ -0,0 +1,136 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the variable metadata (shape, dimension names and name)
+   cached by `Variable` instances. The cached values must stay consistent with
+   the file after writing new records through blocking, nonblocking and
+   independent APIs, after renaming dimensions and variables, and after
+   switching between define and data modes.
+
+    To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_var_shape_cache.py [test_file_output_dir](optional)`
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_var_shape_cache.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 5
+
+
+class VariablesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing cached variable shape and dimension names"""
+        f = pnetcdf.File(filename=self.file_path, mode='w', format=self._file_format, comm=comm, info=None)
+        dim_t = f.def_dim('t', -1)
+        dim_x = f.def_dim('x', xdim * size)
+        v_rec = f.def_var('rec', pnetcdf.NC_INT, (dim_t, dim_x))
+        v_fix = f.def_var('fix', pnetcdf.NC_INT, (dim_x,))
+        self.assertEqual(v_rec.shape, (0, xdim * size))
+        self.assertEqual(v_fix.shape, (xdim * size,))
+        self.assertEqual(v_rec.ndim, 2)
+        f.enddef()
+
+        buf = np.full(xdim, rank, dtype=np.int32)
+        start = [rank * xdim]
+
+        # blocking write through the indexer grows the record dimension
+        v_rec[0, start[0]:start[0] + xdim] = buf
+        self.assertEqual(v_rec.shape, (1, xdim * size))
+        self.assertEqual(len(dim_t), 1)
+
+        # blocking write through the explicit API
+        v_rec.put_var_all(buf, start=[1, start[0]], count=[1, xdim])
+        self.assertEqual(v_rec.shape, (2, xdim * size))
+
+        # nonblocking write, the record count is updated at wait time
+        req_id = v_rec.iput_var(buf, start=[2, start[0]], count=[1, xdim])
+        f.wait_all(1, [req_id], [None])
+        self.assertEqual(v_rec.shape, (3, xdim * size))
+
+        # independent write, visible to all processes after end_indep
+        f.begin_indep()
+        if rank == 0:
+            v_rec.put_var(np.zeros(xdim * size, dtype=np.int32), start=[3, 0], count=[1, xdim * size])
+        f.end_indep()
+        self.assertEqual(v_rec.shape, (4, xdim * size))
+
+        # writing a fixed-size variable does not change its shape
+        v_fix[start[0]:start[0] + xdim] = buf
+        self.assertEqual(v_fix.shape, (xdim * size,))
+
+        # renaming a dimension is reflected by the cached dimension names
+        self.assertEqual(v_rec.dimensions, ('t', 'x'))
+        f.rename_dim('x', 'y')
+        self.assertEqual(v_rec.dimensions, ('t', 'y'))
+        self.assertEqual(v_fix.dimensions, ('y',))
+        self.assertEqual(dim_x.name, 'y')
+
+        # renaming a variable is reflected by the cached name
+        f.rename_var('fix', 'fox')
+        self.assertEqual(v_fix.name, 'fox')
+        self.assertTrue('fox' in f.variables)
+
+        # define a new variable after re-entering define mode
+        f.redef()
+        v_new = f.def_var('new', pnetcdf.NC_INT, (dim_t,))
+        f.enddef()
+        self.assertEqual(v_new.shape, (4,))
+        self.assertEqual(v_rec.dimensions, ('t', 'y'))
+
+        assert_array_equal(v_rec[0, start[0]:start[0] + xdim], buf)
+        f.close()
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+        # a file opened for reading reports the same metadata
+        f = pnetcdf.File(self.file_path, 'r')
+        v = f.variables['rec']
+        self.assertEqual(v.shape, (4, xdim * size))
+        self.assertEqual(v.dimensions, ('t', 'y'))
+        self.assertEqual(f.variables['fox'].shape, (xdim * size,))
+        f.close()
+
+
+# Unittest execution order: setUp -> test_method -> tearDown and repeat for each test method
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VariablesTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -118,6 +118,10 @@ class VariablesTestCase(unittest.TestCase):
         data2[0] = v2[0]
         data2[0,1] = v2[0,1]
         assert_array_equal(data2,datau)
+        # a single string, read from a 1-d array of characters
+        data2 = v2[-1,-1]
+        assert data2.shape == () and data2.dtype == 'U' + repr(nchar)
+        assert_equal(data2, datau[-1,-1])
         data3 = v3[:]
         assert_array_equal(data3,datau)
         # these slices should return a char array, not a string array
@@ -138,6 +142,24 @@ class VariablesTestCase(unittest.TestCase):
         assert_array_equal(data7, datac)
         f.close()
 
+        # conversions without decoding return views of the input
+        strings = chartostring(datac, encoding='none', copy=False)
+        assert_array_equal(strings, data)
+        assert np.shares_memory(strings, datac)
+        assert not np.shares_memory(chartostring(datac, encoding='none'), datac)
+        chars = stringtochar(data, copy=False)
+        assert_array_equal(chars, datac)
+        assert np.shares_memory(chars, data)
+        # multibyte characters are encoded and decoded string by string
+        words = np.array(['caf\u00e9', 'na\u00efve', 'ok'], 'U5')
+        chars = stringtochar(words, encoding='utf-8')
+        assert chars.dtype == 'S1' and chars.shape == (3, 6)
+        assert_array_equal(chartostring(chars, encoding='utf-8'), words)
+        # a 1-d array of characters gives a single string
+        strings = chartostring(datac[0,0], encoding='ascii')
+        assert strings.shape == () and strings.dtype == 'U' + repr(nchar)
+        assert_equal(strings, datau[0,0])
+
 if __name__ == '__main__':
     suite = unittest.TestSuite()
     for i in range(len(file_formats)):
@@ -0,0 +1,122 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests passing the starts and counts of the varn methods as
+   int64 arrays, lists or not at all (counts), and passing the requests and
+   statuses of File.wait_all, File.wait and File.cancel as int32 arrays,
+   which are updated in place.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_varn_arrays.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_varn_arrays.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+nsegs = 1000
+num_reqs = 8
+# each process writes every other element of its part of the variables
+starts = (rank * 2 * nsegs + 2 * np.arange(nsegs, dtype=np.int64)).reshape(nsegs, 1)
+counts = np.ones((nsegs, 1), dtype=np.int64)
+data = np.arange(nsegs, dtype=np.int32) + rank * nsegs
+
+
+class VarnArraysTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x', 2 * nsegs * size)
+        v1 = f.def_var('var1', pnetcdf.NC_INT, ('x',))
+        v2 = f.def_var('var2', pnetcdf.NC_INT, ('x',))
+        v3 = f.def_var('var3', pnetcdf.NC_INT, ('x',))
+        f.enddef()
+        # int64 arrays, used without a copy
+        v1.put_varn_all(data, nsegs, starts, counts)
+        # lists, and counts of all 1s by default
+        v2.put_varn_all(data, nsegs, starts.tolist())
+        # rows of a larger, non-contiguous array
+        wide = np.zeros((nsegs, 3), dtype=np.int64)
+        wide[:, 0] = starts[:, 0]
+        v3.put_varn_all(data, nsegs, wide[:, :1], counts)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing array arguments of varn methods and request lists"""
+        f = pnetcdf.File(self.file_path, 'a')
+        for name in ('var1', 'var2', 'var3'):
+            v = f.variables[name]
+            out = np.empty(nsegs, dtype=np.int32)
+            v.get_varn_all(out, nsegs, starts, counts)
+            assert_array_equal(out, data)
+            assert_array_equal(v[rank * 2 * nsegs:(rank + 1) * 2 * nsegs:2], data)
+
+        v = f.variables['var1']
+        # starts and counts of the wrong shape
+        with self.assertRaises(ValueError):
+            v.get_varn_all(np.empty(nsegs, dtype=np.int32), nsegs, starts[:nsegs - 1], counts)
+        with self.assertRaises(ValueError):
+            v.get_varn_all(np.empty(nsegs, dtype=np.int32), nsegs, starts, np.ones((nsegs, 2), dtype=np.int64))
+
+        # requests and statuses as int32 arrays, updated in place
+        bufs = [np.empty(nsegs, dtype=np.int32) for i in range(num_reqs)]
+        reqs = np.array([v.iget_varn(buf, nsegs, starts, counts) for buf in bufs], dtype=np.int32)
+        status = np.full(num_reqs, -1, dtype=np.int32)
+        f.wait_all(num_reqs, reqs, status)
+        assert_array_equal(reqs, pnetcdf.NC_REQ_NULL)
+        assert_array_equal(status, pnetcdf.NC_NOERR)
+        for buf in bufs:
+            assert_array_equal(buf, data)
+
+        # cancelled write requests
+        reqs = np.array([v.iput_var(np.int32(-1), start = [rank * 2 * nsegs]) for i in range(num_reqs)], dtype=np.int32)
+        f.cancel(num_reqs, reqs, status)
+        assert_array_equal(reqs, pnetcdf.NC_REQ_NULL)
+        f.wait_all()
+        self.assertEqual(v[rank * 2 * nsegs], data[0])
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarnArraysTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the normalization of the subarrays of the varn methods:
+   subarrays given out of file order, adjacent along the last dimension, are
+   sorted and merged by pnetcdf.VarnPlan before being passed to PnetCDF, and
+   the data is permuted accordingly for writes and reads.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_varn_normalize.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_varn_normalize.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+ydim = 4; xdim = 12
+# each process writes rows [rank * ydim, (rank + 1) * ydim), each row as 4
+# subarrays of 3 elements, given in reverse order
+num = ydim * 4
+starts = np.array([[rank * ydim + j, i * 3] for j in reversed(range(ydim)) for i in reversed(range(4))], dtype=np.int64)
+counts = np.tile(np.array([1, 3], dtype=np.int64), (num, 1))
+data = np.arange(num * 3, dtype=np.int32) + rank * 1000
+
+
+def expected():
+    # the values of the rows of this process written with data
+    out = np.empty((ydim, xdim), dtype=np.int32)
+    for k in range(num):
+        j, i = starts[k]
+        out[j - rank * ydim, i:i + 3] = data[k * 3:k * 3 + 3]
+    return out
+
+
+class VarnNormalizeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('y', ydim * size)
+        f.def_dim('x', xdim)
+        v1 = f.def_var('var1', pnetcdf.NC_INT, ('y', 'x'))
+        v2 = f.def_var('var2', pnetcdf.NC_INT, ('y', 'x'))
+        v3 = f.def_var('var3', pnetcdf.NC_INT, ('y', 'x'))
+        f.enddef()
+        # each row is merged into one subarray
+        plan = pnetcdf.VarnPlan(num, starts, counts)
+        self.assertEqual(plan.num, ydim)
+        self.assertEqual(plan.nmerged, num - ydim)
+        assert_array_equal(plan.counts, [[1, xdim]] * ydim)
+        # the plan built for normalize = True gives the subarrays merged
+        self.assertEqual(v1.put_varn_all(data, num, starts, counts, normalize = True).nmerged, num - ydim)
+        self.assertIs(v2.put_varn_all(data, num, starts, counts, normalize = plan), plan)
+        self.assertIsNone(v2.put_varn_all(data, num, starts, counts))
+        req = v3.iput_varn(data, num, starts, counts, normalize = plan)
+        self.assertIs(req.plan, plan)
+        f.wait_all(1, [req])
+        with self.assertRaises(ValueError):
+            v1.put_varn_all(data, num - 1, starts, counts, normalize = plan)
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing sorting and merging of varn subarrays"""
+        f = pnetcdf.File(self.file_path, 'r')
+        plan = pnetcdf.VarnPlan(num, starts, counts)
+        for name in ('var1', 'var2', 'var3'):
+            v = f.variables[name]
+            assert_array_equal(v[rank * ydim:(rank + 1) * ydim], expected())
+            # reads give the values in the order of the subarrays
+            out = np.empty(num * 3, dtype=np.int32)
+            self.assertEqual(v.get_varn_all(out, num, starts, counts, normalize = True).num, ydim)
+            assert_array_equal(out, data)
+            out = np.empty(num * 3, dtype=np.int32)
+            v.get_varn_all(out, num, starts, counts, normalize = plan)
+            assert_array_equal(out, data)
+            out = np.empty(num * 3, dtype=np.int32)
+            req = v.iget_varn(out, num, starts, counts, normalize = plan)
+            f.wait_all(1, [req])
+            assert_array_equal(out, data)
+            assert_array_equal(req.result(), data)
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(VarnNormalizeTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
@@ -0,0 +1,143 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests completing nonblocking requests from coroutines, with
+   File.wait_all_async, File.wait_async and by awaiting Request objects,
+   while other coroutines of the event loop run, and that the file rejects
+   the calls made while such a wait is pending.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_wait_async.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+import asyncio
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_wait_async.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 4; ydim = 5
+num_reqs = 4
+
+
+async def ticker(done):
+    # a coroutine that runs while the requests are completed
+    ticks = 0
+    while not done.is_set():
+        ticks += 1
+        await asyncio.sleep(0)
+    return ticks
+
+
+class AsyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        for i in range(num_reqs):
+            f.def_var('var_%d' % i, pnetcdf.NC_INT, ('x', 'y'))
+        f.enddef()
+
+        async def write():
+            start = [rank * xdim, 0]
+            count = [xdim, ydim]
+            reqs = [f.variables['var_%d' % i].iput_var(np.full(count, rank + i, dtype=np.int32), start = start, count = count)
+                    for i in range(num_reqs)]
+            req_errs = [None] * num_reqs
+            future = f.wait_all_async(num_reqs, list(reqs), req_errs)
+            # the file is guarded until the wait is done
+            v = f.variables['var_0']
+            with self.assertRaises(RuntimeError):
+                v.iput_var(np.full(count, -1, dtype=np.int32), start = start, count = count)
+            with self.assertRaises(RuntimeError):
+                v[rank * xdim:(rank + 1) * xdim, :] = np.full(count, -1, dtype=np.int32)
+            with self.assertRaises(RuntimeError):
+                v[rank * xdim:(rank + 1) * xdim, :]
+            with self.assertRaises(RuntimeError):
+                f.wait_all_async()
+            await future
+            self.assertEqual(req_errs, [pnetcdf.NC_NOERR] * num_reqs)
+            self.assertTrue(all(req.done() for req in reqs))
+            self.assertEqual(f.inq_nreqs(), 0)
+
+        async def main():
+            done = asyncio.Event()
+            task = asyncio.ensure_future(ticker(done))
+            await write()
+            done.set()
+            self.assertTrue(await task >= 1)
+
+        asyncio.run(main())
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing asynchronous completion of nonblocking requests"""
+        f = pnetcdf.File(self.file_path, mode='r', comm=comm)
+        start = [rank * xdim, 0]
+        count = [xdim, ydim]
+
+        async def main():
+            # awaiting requests one at a time
+            for i in range(num_reqs):
+                req = f.variables['var_%d' % i].iget_var(np.empty(count, dtype=np.int32), start = start, count = count)
+                assert_array_equal(await req, rank + i)
+            # all requests at once, in independent mode
+            f.begin_indep()
+            reqs = [f.variables['var_%d' % i].iget_var(np.empty(count, dtype=np.int32), start = start, count = count)
+                    for i in range(num_reqs)]
+            await f.wait_async()
+            for i, req in enumerate(reqs):
+                self.assertTrue(req.done())
+                assert_array_equal(await req, rank + i)
+            f.end_indep()
+
+        asyncio.run(main())
+        # the methods must be called from a coroutine
+        with self.assertRaises(RuntimeError):
+            f.wait_all_async()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(AsyncTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)
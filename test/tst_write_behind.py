@@ -0,0 +1,121 @@
+#
+# Copyright (C) 2024, Northwestern University and Argonne National Laboratory
+# See COPYRIGHT notice in top-level directory.
+#
+
+"""
+   This program tests the write-behind mode of a file, in which assignments
+   to variables with the indexer are posted as nonblocking requests and
+   committed together by File.flush, File.close, a read, or when the pending
+   bytes exceed a limit.
+
+   To run the test, execute the following
+    `mpiexec -n [num_process] python3 tst_write_behind.py [test_file_output_dir](optional)`
+
+"""
+import pnetcdf
+from numpy.testing import assert_array_equal
+import unittest, os, sys
+import numpy as np
+from mpi4py import MPI
+from utils import validate_nc_file
+import io
+
+# Format of the data file we will create (64BIT_DATA for CDF-5 and 64BIT_OFFSET for CDF-2 and None for CDF-1)
+file_formats = ['NC_64BIT_DATA', 'NC_64BIT_OFFSET', None]
+# Name of the test data file
+file_name = "tst_write_behind.nc"
+
+comm = MPI.COMM_WORLD
+rank = comm.Get_rank()
+size = comm.Get_size()
+
+xdim = 6; ydim = 8
+nrecs = 5
+
+
+class WriteBehindTestCase(unittest.TestCase):
+
+    def setUp(self):
+        if (len(sys.argv) == 2) and os.path.isdir(sys.argv[1]):
+            self.file_path = os.path.join(sys.argv[1], file_name)
+        else:
+            self.file_path = file_name
+        self._file_format = file_formats.pop(0)
+        # Create the test data file, written in write-behind mode
+        f = pnetcdf.File(filename=self.file_path, mode = 'w', format=self._file_format, comm=comm, info=None,
+                         write_behind=True)
+        f.def_dim('x', xdim * size)
+        f.def_dim('y', ydim)
+        f.def_dim('t', -1)
+        v = f.def_var('var', pnetcdf.NC_INT, ('x', 'y'))
+        rv = f.def_var('rec_var', pnetcdf.NC_DOUBLE, ('t', 'y'))
+        f.enddef()
+
+        # one row per assignment, from a buffer modified right after
+        row = np.empty(ydim, dtype=np.int64)
+        for i in range(xdim):
+            row[:] = rank * 100 + i
+            v[rank * xdim + i, :] = row
+            row[:] = -1
+        # records, with a strided and a reversed selection
+        for t in range(nrecs):
+            rv[t, ::2] = np.full(ydim // 2, t, dtype=np.float64)
+            rv[t, 1::2] = np.arange(ydim // 2, dtype=np.float64)[::-1]
+        f.close()
+        # Validate the created data file using ncvalidator tool
+        comm.Barrier()
+        assert validate_nc_file(os.environ.get('PNETCDF_DIR'), self.file_path) == 0 if os.environ.get('PNETCDF_DIR') is not None else True
+
+    def tearDown(self):
+        # Wait for all processes to finish testing (in multiprocessing mode)
+        comm.Barrier()
+        # Remove testing file
+        if (rank == 0) and not((len(sys.argv) == 2) and os.path.isdir(sys.argv[1])):
+            os.remove(self.file_path)
+
+    def runTest(self):
+        """testing write-behind mode"""
+        f = pnetcdf.File(self.file_path, 'r')
+        v = f.variables['var']
+        rv = f.variables['rec_var']
+        expected = np.repeat(np.arange(xdim * size) % xdim + np.arange(xdim * size) // xdim * 100, ydim)
+        assert_array_equal(v[:], expected.reshape(xdim * size, ydim))
+        self.assertEqual(rv.shape, (nrecs, ydim))
+        for t in range(nrecs):
+            assert_array_equal(rv[t, ::2], t)
+            assert_array_equal(rv[t, 1::2], np.arange(ydim // 2)[::-1])
+        f.close()
+
+        f = pnetcdf.File(self.file_path, 'a', write_behind=4 * ydim * 2)
+        v = f.variables['var']
+        rows = [rank * xdim + i for i in range(xdim)]
+        # the limit of two rows commits every second assignment
+        for i in range(3):
+            v[rows[i], :] = np.full(ydim, i, dtype=np.int32)
+        # a read commits the pending writes first
+        assert_array_equal(v[rows[0]:rows[2] + 1, :], np.repeat(np.arange(3), ydim).reshape(3, ydim))
+        # orthogonal selections are deferred as well
+        v[[rows[3], rows[5]], :] = np.full((2, ydim), 7, dtype=np.int32)
+        out = np.empty((2, ydim), dtype=np.int32)
+        assert_array_equal(v.get(np.s_[rows[3]:rows[5] + 1:2, :], out=out), 7)
+        # independent data mode
+        f.begin_indep()
+        v[rows[4], :] = np.full(ydim, 3, dtype=np.int32)
+        f.flush()
+        assert_array_equal(v[rows[4], :], 3)
+        f.end_indep()
+        f.close()
+
+
+if __name__ == '__main__':
+    suite = unittest.TestSuite()
+    for i in range(len(file_formats)):
+        suite.addTest(WriteBehindTestCase())
+    runner = unittest.TextTestRunner()
+    output = io.StringIO()
+    runner = unittest.TextTestRunner(stream=output)
+    result = runner.run(suite)
+    if not result.wasSuccessful():
+        print(output.getvalue())
+        sys.exit(1)